@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from get_readme import parse_owner_repo, get_repo_data, get_tree_sha, repo_info_from_data, analyze_repo
+
+# Outcomes reported by refresh_repo
+UNCHANGED = "unchanged"          # pushed_at matched, no further requests
+METADATA_ONLY = "metadata_only"  # pushed, but the tree SHA is the same (e.g. a new branch or tag)
+REANALYZED = "reanalyzed"        # content changed or never seen: full analysis
+
+
+class AnalysisStore:
+    """Persistent repo analyses keyed by ``owner/repo``, stored in SQLite.
+
+    Each record keeps the ``pushed_at`` timestamp and root tree SHA that the
+    analysis was computed from, so a refresh can tell whether the repository
+    content changed without re-running the analysis.
+    """
+
+    def __init__(self, path: str = "analysis_store.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                " key TEXT PRIMARY KEY,"
+                " pushed_at TEXT,"
+                " tree_sha TEXT,"
+                " analysis TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def key(owner: str, repo: str) -> str:
+        return f"{owner}/{repo}".lower()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pushed_at, tree_sha, analysis, updated_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"pushed_at": row[0], "tree_sha": row[1], "analysis": json.loads(row[2]), "updated_at": row[3]}
+
+    def put(self, key: str, pushed_at: str, tree_sha: str, analysis: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, pushed_at, tree_sha, analysis, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (key, pushed_at, tree_sha, json.dumps(analysis, ensure_ascii=False), time.time()),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def refresh_repo(repo_url: str, store: AnalysisStore, token: str | None = None,
+                 include_ai_description: bool = True, llm=None) -> Tuple[Dict, str]:
+    """Return an up-to-date analysis, re-running it only if the repo content changed.
+
+    One metadata request decides the common case: if ``pushed_at`` is unchanged
+    the stored analysis is returned with refreshed repo info (stars, forks...).
+    Otherwise the root tree SHA is compared, and only a changed tree triggers
+    ``detect_frameworks`` and ``generate_project_description`` again.
+
+    Returns ``(analysis, status)`` with status one of UNCHANGED, METADATA_ONLY,
+    REANALYZED.
+    """
+    owner, repo = parse_owner_repo(repo_url)
+    key = store.key(owner, repo)
+    data = get_repo_data(owner, repo, token)
+    pushed_at = data.get("pushed_at") or ""
+
+    stored = store.get(key)
+    if stored and include_ai_description and "ai_description" not in stored["analysis"]:
+        stored = None
+    if stored and not stored["tree_sha"]:  # rows stored without a tree SHA cannot be validated
+        stored = None
+
+    if stored and pushed_at and stored["pushed_at"] == pushed_at:
+        analysis = stored["analysis"]
+        analysis["info"] = repo_info_from_data(data)
+        return analysis, UNCHANGED
+
+    ref = data.get("default_branch") or "main"
+    tree_sha = get_tree_sha(owner, repo, ref, token)
+    # A failed tree lookup (None) proves nothing about the content, so re-analyze
+    if stored and tree_sha and stored["tree_sha"] == tree_sha:
+        analysis = stored["analysis"]
+        analysis["info"] = repo_info_from_data(data)
+        store.put(key, pushed_at, tree_sha, analysis)
+        return analysis, METADATA_ONLY
+
+    analysis = analyze_repo(repo_url, token=token, include_ai_description=include_ai_description,
+                            llm=llm, repo_data=data)
+    analysis["tree_sha"] = tree_sha
+    # Neither a fallback forced by the time budget nor an analysis without a tree SHA is worth keeping
+    if tree_sha and not analysis.get("degraded"):
+        store.put(key, pushed_at, tree_sha, analysis)
+    return analysis, REANALYZED
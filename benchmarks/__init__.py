@@ -0,0 +1 @@
+"""Offline benchmarks for the CV pipeline (run with ``python -m benchmarks.run``)."""
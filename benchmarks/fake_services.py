@@ -0,0 +1,266 @@
+import re
+import json
+import time
+import hashlib
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List
+from urllib.parse import urlparse, unquote, parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 overflows under concurrent connects, and
+    # the dropped SYNs are retried after 1s, which shows up as latency spikes
+    request_queue_size = 128
+
+
+class FakeGitHub:
+    """Local stand-in for the GitHub REST API and raw.githubusercontent.com.
+
+    Serves the subset of endpoints used by ``get_readme`` from in-memory
+    fixtures, with a configurable per-request latency. Use as a context
+    manager; ``api_url``/``raw_url`` are what ``GITHUB_API_URL`` and
+    ``GITHUB_RAW_URL`` should point at.
+    """
+
+    def __init__(self, fixtures: List[Dict], latency: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1"):
+        self.fixtures = {f"{f['owner']}/{f['repo']}".lower(): f for f in fixtures}
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._server = _Server((host, 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return self.base_url
+
+    @property
+    def raw_url(self) -> str:
+        return f"{self.base_url}/raw"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_count = 0
+            self.bytes_sent = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _delay(self):
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay += self._rng.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _route(self, path: str, query: str):
+        m = re.match(r"^/raw/([^/]+)/([^/]+)/([^/]+)/(.+)$", path)
+        if m:
+            fixture = self.fixtures.get(f"{m.group(1)}/{m.group(2)}".lower())
+            # Paths are case sensitive, like on raw.githubusercontent.com
+            content = fixture["files"].get(m.group(4)) if fixture else None
+            return (200, content, "text/plain") if content is not None else (404, "Not Found", "text/plain")
+
+        m = re.match(r"^/users/([^/]+)/repos$", path)
+        if m:
+            return self._owner_repos(m.group(1), parse_qs(query))
+
+        m = re.match(r"^/repos/([^/]+)/([^/]+)/commits/([^/]+)$", path)
+        if m:
+            fixture = self.fixtures.get(f"{m.group(1)}/{m.group(2)}".lower())
+            if fixture is None:
+                return 404, {"message": "Not Found"}, "application/json"
+            return 200, {"sha": self._tree_sha(fixture), "commit": {"tree": {"sha": self._tree_sha(fixture)}}}, \
+                "application/json"
+
+        m = re.match(r"^/repos/([^/]+)/([^/]+)/tarball/([^/]+)$", path)
+        if m:
+            fixture = self.fixtures.get(f"{m.group(1)}/{m.group(2)}".lower())
+            if fixture is None:
+                return 404, {"message": "Not Found"}, "application/json"
+            return 200, fixture_tarball(fixture), "application/x-gzip"
+
+        m = re.match(r"^/repos/([^/]+)/([^/]+)/readme$", path)
+        if m:
+            fixture = self.fixtures.get(f"{m.group(1)}/{m.group(2)}".lower())
+            # Like GitHub: the root-level README, whatever its case or extension
+            files = fixture["files"] if fixture else {}
+            names = sorted((p for p in files if "/" not in p and p.lower().startswith("readme")),
+                           key=lambda p: (not p.lower().endswith(".md"), p))
+            if not names:
+                return 404, {"message": "Not Found"}, "application/json"
+            return 200, fixture["files"][names[0]], "text/plain"
+
+        m = re.match(r"^/repos/([^/]+)/([^/]+)(?:/(languages|topics|contents)(?:/(.*))?)?$", path)
+        if not m:
+            return 404, {"message": "Not Found"}, "application/json"
+        fixture = self.fixtures.get(f"{m.group(1)}/{m.group(2)}".lower())
+        if fixture is None:
+            return 404, {"message": "Not Found"}, "application/json"
+
+        endpoint = m.group(3)
+        if endpoint is None:
+            return 200, fixture["info"], "application/json"
+        if endpoint == "languages":
+            return 200, fixture["languages"], "application/json"
+        if endpoint == "topics":
+            return 200, {"names": fixture["topics"]}, "application/json"
+        return self._contents(fixture, (m.group(4) or "").strip("/"))
+
+    def _owner_repos(self, owner: str, query: Dict):
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        repos = sorted(
+            (f for f in self.fixtures.values() if f["owner"].lower() == owner.lower()),
+            key=lambda f: f["info"].get("pushed_at", ""), reverse=True,
+        )
+        chunk = repos[(page - 1) * per_page:page * per_page]
+        body = [{**f["info"], "topics": f["topics"],
+                 "html_url": f"https://github.com/{f['owner']}/{f['repo']}"} for f in chunk]
+        headers = {}
+        if page * per_page < len(repos):
+            headers["Link"] = (f'<{self.api_url}/users/{owner}/repos?type=owner&sort=pushed&direction=desc'
+                               f'&per_page={per_page}&page={page + 1}>; rel="next"')
+        return 200, body, "application/json", headers
+
+    @staticmethod
+    def _tree_sha(fixture: Dict) -> str:
+        digest = hashlib.sha1()
+        for path in sorted(fixture["files"]):
+            digest.update(path.encode("utf-8") + b"\0" + fixture["files"][path].encode("utf-8"))
+        return digest.hexdigest()
+
+    def _contents(self, fixture: Dict, dir_path: str):
+        prefix = f"{dir_path}/" if dir_path else ""
+        entries = {}
+        for path, content in fixture["files"].items():
+            if not path.startswith(prefix):
+                continue
+            rest = path[len(prefix):]
+            name, sep, _ = rest.partition("/")
+            full = prefix + name
+            if sep:
+                entries.setdefault(full, {"name": name, "path": full, "type": "dir", "size": 0,
+                                          "download_url": None})
+            else:
+                entries[full] = {
+                    "name": name, "path": full, "type": "file", "size": len(content.encode("utf-8")),
+                    "download_url": f"{self.raw_url}/{fixture['owner']}/{fixture['repo']}/"
+                                    f"{fixture['default_branch']}/{full}",
+                }
+        if not entries:
+            return 404, {"message": "Not Found"}, "application/json"
+        return 200, sorted(entries.values(), key=lambda e: e["path"]), "application/json"
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                service._delay()
+                status, body, content_type, *extra = service._route(unquote(parsed.path), parsed.query)
+                if isinstance(body, bytes):
+                    payload = body
+                else:
+                    payload = (json.dumps(body) if content_type == "application/json" else body).encode("utf-8")
+                with service._lock:
+                    service.request_count += 1
+                    service.bytes_sent += len(payload)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def fixture_tarball(fixture: Dict) -> bytes:
+    """The fixture's files as a GitHub-style ``.tar.gz`` (single ``owner-repo-sha/`` top directory)"""
+    import io
+    import tarfile
+
+    top = f"{fixture['owner']}-{fixture['repo']}-{FakeGitHub._tree_sha(fixture)[:7]}"
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        dirs = {top}
+        info = tarfile.TarInfo(top)
+        info.type = tarfile.DIRTYPE
+        tar.addfile(info)
+        for path in sorted(fixture["files"]):
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                directory = f"{top}/{'/'.join(parts[:i])}"
+                if directory not in dirs:
+                    dirs.add(directory)
+                    info = tarfile.TarInfo(directory)
+                    info.type = tarfile.DIRTYPE
+                    tar.addfile(info)
+            data = fixture["files"][path].encode("utf-8")
+            info = tarfile.TarInfo(f"{top}/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class FakeLLM:
+    """Drop-in for ``ChatGoogleGenerativeAI.invoke`` with fixed latency.
+
+    Project-description prompts get a canned sentence; JD-optimization prompts
+    get the CV JSON from the prompt echoed back unchanged.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        prompt = "\n".join(content for _, content in messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        marker = "Current CV Data:"
+        if marker in prompt:
+            body = prompt.split(marker, 1)[1]
+            start, end = body.find("{"), body.rfind("}")
+            return SimpleNamespace(content=body[start:end + 1])
+
+        name = re.search(r"Tên dự án:\s*(.+)", prompt)
+        name = name.group(1).strip() if name else "dự án"
+        return SimpleNamespace(content=f"Dự án {name} là một ứng dụng mẫu dùng cho benchmark offline.")
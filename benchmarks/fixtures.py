@@ -0,0 +1,152 @@
+import os
+import json
+import random
+from typing import Dict, List
+
+MANIFEST_SAMPLES = {
+    "requirements.txt": "fastapi==0.110.0\nuvicorn\npydantic>=2\nsqlalchemy\ntorch==2.2.0\nnumpy\npandas\nopencv-python\n",
+    "package.json": json.dumps({
+        "name": "web",
+        "dependencies": {"react": "^18.2.0", "next": "14.1.0", "axios": "^1.6.0"},
+        "devDependencies": {"eslint": "^8.0.0", "jest": "^29.0.0", "tailwindcss": "^3.4.0"},
+    }, indent=2),
+    "pyproject.toml": "[project]\nname = \"svc\"\ndependencies = [\"django>=5\", \"celery\", \"redis\"]\n",
+    "go.mod": "module example.com/api\n\ngo 1.22\n\nrequire (\n\tgithub.com/gin-gonic/gin v1.9.1\n\tgorm.io/gorm v1.25.7\n)\n",
+    "cargo.toml": "[package]\nname = \"srv\"\n\n[dependencies]\naxum = \"0.7\"\nserde = \"1\"\n",
+    "pom.xml": "<project><dependencies><dependency><artifactId>spring-boot-starter-web</artifactId>"
+               "</dependency><dependency><artifactId>hibernate-core</artifactId></dependency></dependencies></project>",
+}
+
+README_SAMPLE = """# {name}
+
+[![CI](https://img.shields.io/badge/ci-passing-green.svg)](https://example.com)
+
+{name} is a sample project used by the offline benchmark suite. It exposes a small
+REST API, trains a model on a public dataset and ships a web dashboard.
+
+## Installation
+
+```bash
+pip install -r requirements.txt
+```
+
+## Usage
+
+Run `python main.py` and open the dashboard in a browser.
+"""
+
+SOURCE_SAMPLE = "import os\nimport numpy as np\n\n\ndef main():\n    return np.zeros(3)\n" * 4
+
+
+def synthetic_repo(owner: str, repo: str, n_files: int, n_manifests: int, depth: int = 3,
+                   seed: int = 0, n_vendored: int = 0) -> Dict:
+    """Build a deterministic fixture with ``n_files`` files spread over ``depth`` levels
+
+    ``n_vendored`` adds that many packages under ``node_modules/``, each with its
+    own package.json, like a repo that committed its dependencies.
+    """
+    rng = random.Random(f"{owner}/{repo}/{seed}")
+    files = {"README.md": README_SAMPLE.format(name=repo)}
+
+    manifest_names = list(MANIFEST_SAMPLES)
+    for i in range(n_manifests):
+        name = manifest_names[i % len(manifest_names)]
+        prefix = "" if i < len(manifest_names) else f"pkg{i}/"
+        files[prefix + name] = MANIFEST_SAMPLES[name]
+
+    dirs = [""]
+    for j in range(max(1, n_files // 40)):
+        parent = rng.choice(dirs)
+        if parent.count("/") < depth - 1:
+            dirs.append(f"{parent}dir_{j}/")
+    while len(files) < n_files:
+        files[f"{rng.choice(dirs)}module_{len(files)}.py"] = SOURCE_SAMPLE
+
+    for k in range(n_vendored):
+        files[f"node_modules/vendored-{k}/package.json"] = MANIFEST_SAMPLES["package.json"]
+        files[f"node_modules/vendored-{k}/index.js"] = "module.exports = {};\n"
+
+    languages = {"Python": sum(len(c) for p, c in files.items() if p.endswith(".py")) + 1,
+                 "JavaScript": 4000 * n_manifests, "Shell": 512}
+    return {
+        "owner": owner,
+        "repo": repo,
+        "default_branch": "main",
+        "info": {
+            "name": repo,
+            "full_name": f"{owner}/{repo}",
+            "description": f"Benchmark fixture {repo}",
+            "homepage": "",
+            "stargazers_count": rng.randint(0, 500),
+            "forks_count": rng.randint(0, 50),
+            "language": "Python",
+            "default_branch": "main",
+            "fork": False,
+            "created_at": "2023-01-01T00:00:00Z",
+            "updated_at": "2024-06-01T00:00:00Z",
+            "pushed_at": "2024-06-01T00:00:00Z",
+        },
+        "languages": languages,
+        "topics": ["benchmark", "fixture"],
+        "files": files,
+    }
+
+
+def default_fixtures() -> List[Dict]:
+    """Small, medium and large repos with increasing file and manifest counts"""
+    return [
+        synthetic_repo("bench", "small", n_files=20, n_manifests=1),
+        synthetic_repo("bench", "medium", n_files=200, n_manifests=4),
+        synthetic_repo("bench", "large", n_files=1000, n_manifests=12, n_vendored=40),
+    ]
+
+
+def save_fixture(fixture: Dict, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{fixture['owner']}__{fixture['repo']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+    return path
+
+
+def load_fixtures(directory: str) -> List[Dict]:
+    """Load fixtures saved with :func:`save_fixture` or :func:`record_fixture`"""
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                fixtures.append(json.load(f))
+    return fixtures
+
+
+def record_fixture(repo_url: str, token: str = None, max_depth: int = 3) -> Dict:
+    """Capture a real repository into the fixture format (needs network access)"""
+    import requests
+    import get_readme
+
+    owner, repo = get_readme.parse_owner_repo(repo_url)
+    headers = get_readme.API_HEADERS.copy()
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    base = f"{get_readme.GITHUB_API_URL}/repos/{owner}/{repo}"
+    info = requests.get(base, headers=headers, timeout=20).json()
+    ref = info.get("default_branch", "main")
+
+    files = {}
+    for item in get_readme.list_contents_recursive(owner, repo, ref, "", token, max_depth=max_depth):
+        if item.get("type") != "file":
+            continue
+        content = ""
+        if item.get("download_url") and item.get("size", 0) < 512 * 1024:
+            content = get_readme.fetch_raw(item["download_url"], token) or ""
+        files[item["path"]] = content
+
+    return {
+        "owner": owner,
+        "repo": repo,
+        "default_branch": ref,
+        "info": info,
+        "languages": requests.get(f"{base}/languages", headers=headers, timeout=20).json(),
+        "topics": requests.get(f"{base}/topics", headers=headers, timeout=20).json().get("names", []),
+        "files": files,
+    }
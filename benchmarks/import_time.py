@@ -0,0 +1,89 @@
+"""Track import cost of the pipeline modules with ``python -X importtime``.
+
+Usage:
+    python -m benchmarks.import_time --repeat 5 --json import_time.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+MODULES = ["cv_generator", "get_readme", "cv_system"]
+
+# Dependencies that should only load on first use of analyze_repo or the LLM
+LAZY_MODULES = ["requests", "langchain_google_genai", "dotenv"]
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """Parse ``-X importtime`` output into {module: {self_us, cumulative_us}}"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return timings
+
+
+def measure(module: str) -> Dict:
+    """Import ``module`` in a fresh interpreter and return its timings"""
+    check = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=_REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    timings = parse_importtime(proc.stderr)
+    return {
+        "cumulative_us": timings.get(module, {}).get("cumulative_us", 0),
+        "timings": timings,
+        "eager_heavy_imports": [m for m in proc.stdout.strip().split(",") if m],
+    }
+
+
+def run(modules: List[str], repeat: int, top: int) -> Dict:
+    results = {}
+    for module in modules:
+        samples = [measure(module) for _ in range(repeat)]
+        cumulative = [s["cumulative_us"] for s in samples]
+        last = samples[-1]
+        heaviest = sorted(last["timings"].items(), key=lambda kv: -kv[1]["self_us"])[:top]
+        results[module] = {
+            "median_ms": statistics.median(cumulative) / 1000,
+            "min_ms": min(cumulative) / 1000,
+            "max_ms": max(cumulative) / 1000,
+            "eager_heavy_imports": last["eager_heavy_imports"],
+            "heaviest": [{"module": name, "self_ms": t["self_us"] / 1000} for name, t in heaviest],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time of pipeline modules")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per module")
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.repeat, args.top)
+    for module, r in results.items():
+        eager = ", ".join(r["eager_heavy_imports"]) or "none"
+        print(f"{module:<16} median {r['median_ms']:8.1f} ms  (min {r['min_ms']:.1f}, max {r['max_ms']:.1f})"
+              f"  eager heavy imports: {eager}")
+        for h in r["heaviest"]:
+            print(f"    {h['module']:<40} {h['self_ms']:8.2f} ms")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Offline pipeline benchmarks against a local GitHub/LLM stand-in.
+
+Usage:
+    python -m benchmarks.run --iterations 5 --latency 0.02 --repos 10 --json bench.json
+"""
+import copy
+import json
+import math
+import time
+import argparse
+import threading
+from typing import Callable, Dict, List
+
+import get_readme
+from cv_generator import CVGenerator, sample_cv_data
+from readme_normalizer import normalize_stats
+from benchmarks.fake_services import FakeGitHub, FakeLLM
+from benchmarks.fixtures import default_fixtures, load_fixtures, synthetic_repo
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def settle(before: set, timeout: float = 30.0):
+    """Wait for worker threads started since ``before`` to finish
+
+    A scenario that stops early (e.g. closes a streaming scan after the first
+    result) leaves running analyses behind; their requests must not be counted
+    against the next iteration or scenario. Daemon threads (the fake server's
+    keep-alive handlers) are not waited for.
+    """
+    deadline = time.monotonic() + timeout
+    for thread in threading.enumerate():
+        if thread not in before and not thread.daemon and thread is not threading.current_thread():
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+
+def run_scenario(name: str, func: Callable[[], object], iterations: int, github: FakeGitHub,
+                 llm: FakeLLM, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        before = set(threading.enumerate())
+        func()
+        settle(before)
+
+    github.reset_counters()
+    llm_calls = llm.calls
+    latencies = []
+    total = 0.0
+    for _ in range(iterations):
+        before = set(threading.enumerate())
+        t0 = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t0)
+        total += latencies[-1]
+        settle(before)
+
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "throughput_per_s": iterations / total if total else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "http_requests_per_op": github.request_count / iterations,
+        "http_bytes_per_op": github.bytes_sent / iterations,
+        "llm_calls_per_op": (llm.calls - llm_calls) / iterations,
+    }
+
+
+def build_scenarios(fixtures: List[Dict], n_repos: int) -> List[tuple]:
+    scenarios = []
+    for fx in fixtures:
+        url = f"https://github.com/{fx['owner']}/{fx['repo']}"
+        scenarios.append((f"analyze_repo[{fx['repo']}]",
+                          lambda url=url: get_readme.analyze_repo(url, include_ai_description=True)))
+    for fx in fixtures:
+        url = f"https://github.com/{fx['owner']}/{fx['repo']}"
+        scenarios.append((f"analyze_repo[tarball:{fx['repo']}]",
+                          lambda url=url: get_readme.analyze_repo(url, include_ai_description=True, backend="tarball")))
+    for fx in fixtures:
+        scenarios.append((f"detect_frameworks[{fx['repo']}]",
+                          lambda fx=fx: get_readme.detect_frameworks(fx["owner"], fx["repo"])))
+    for fx in fixtures:
+        scenarios.append((f"detect_frameworks[deep:{fx['repo']}]",
+                          lambda fx=fx: get_readme.detect_frameworks(fx["owner"], fx["repo"], deep_scan=True)))
+
+    from cv_system import CVSystem
+    system = CVSystem()
+    repo_urls = [f"https://github.com/bench/portfolio{i}" for i in range(n_repos)]
+
+    def analyze_github_repos():
+        # One run per iteration: a fresh repo cache, as create_cv_from_input would use
+        with system.repo_cache():
+            return system._analyze_github_repos(repo_urls)
+
+    scenarios.append((f"_analyze_github_repos[n={n_repos}]", analyze_github_repos))
+
+    def first_portfolio_project():
+        # Closing the scan cancels queued analyses; run_scenario waits out the running ones
+        scan = get_readme.scan_portfolio("bench", max_workers=4, per_page=2)
+        try:
+            return next(scan)
+        finally:
+            scan.close()
+
+    def full_portfolio_scan():
+        return list(system.iter_portfolio_projects("bench", max_workers=4))
+
+    scenarios.append(("scan_portfolio[first result]", first_portfolio_project))
+    scenarios.append(("iter_portfolio_projects[all]", full_portfolio_scan))
+
+    generator = CVGenerator()
+    for template in sorted(generator.list_available_templates()):
+        scenarios.append((f"generate_cv[{template}]",
+                          lambda t=template: generator.generate_cv(t, copy.deepcopy(sample_cv_data))))
+    return scenarios
+
+
+def portfolio_fixtures(n_repos: int) -> List[Dict]:
+    """N repos cycling through small/medium/large shapes"""
+    shapes = [(20, 1), (120, 3), (400, 6)]
+    return [synthetic_repo("bench", f"portfolio{i}", *shapes[i % len(shapes)]) for i in range(n_repos)]
+
+
+def format_report(results: List[Dict]) -> str:
+    header = f"{'scenario':<36}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'http/op':>9}{'KB/op':>9}{'llm/op':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['scenario']:<36}{r['throughput_per_s']:>9.2f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['http_requests_per_op']:>9.1f}{r['http_bytes_per_op'] / 1024:>9.1f}{r['llm_calls_per_op']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline CV pipeline benchmarks")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake GitHub latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency per request (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="fake LLM latency per call (s)")
+    parser.add_argument("--repos", type=int, default=5, help="repos for the _analyze_github_repos scenario")
+    parser.add_argument("--fixtures", help="directory of recorded fixtures (default: synthetic)")
+    parser.add_argument("--filter", default="", help="only run scenarios containing this substring")
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else default_fixtures()
+    llm = FakeLLM(latency=args.llm_latency)
+
+    with FakeGitHub(fixtures + portfolio_fixtures(args.repos), latency=args.latency, jitter=args.jitter) as github:
+        get_readme.GITHUB_API_URL = github.api_url
+        get_readme.GITHUB_RAW_URL = github.raw_url
+        get_readme.set_description_llm(llm)
+
+        results = []
+        for name, func in build_scenarios(fixtures, args.repos):
+            if args.filter in name:
+                results.append(run_scenario(name, func, args.iterations, github, llm))
+
+    print(format_report(results))
+    stats = normalize_stats()
+    if stats["calls"]:
+        print(f"\nREADME normalizer: {stats['calls']} calls, {stats['cache_hits']} cache hits, "
+              f"{stats['original_tokens']} -> {stats['tokens']} tokens ({stats['tokens_saved']} saved)")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+import re
+import base64
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Google Fonts serves woff2 (split by unicode-range) only to modern user agents
+FONT_CSS_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+}
+
+FONT_MIME_TYPES = {
+    "woff2": "font/woff2",
+    "woff": "font/woff",
+    "ttf": "font/ttf",
+    "otf": "font/otf",
+}
+
+# Elements where whitespace is significant and must be left untouched
+RAW_TEXT_TAGS = ("pre", "textarea", "script", "style")
+
+# Whitespace next to these tags never renders, so it can be dropped entirely
+BLOCK_TAGS = (
+    "html", "head", "body", "meta", "title", "link", "style", "script",
+    "div", "p", "ul", "ol", "li", "section", "header", "footer", "main",
+    "aside", "nav", "article", "h1", "h2", "h3", "h4", "h5", "h6",
+    "table", "thead", "tbody", "tr", "td", "th", "br", "hr",
+)
+
+_CSS_STRING_RE = re.compile(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'")
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_IMPORT_RE = re.compile(r"@import\s+url\(\s*(['\"]?)([^'\")]+)\1\s*\)\s*;?")
+_FONT_FACE_RE = re.compile(r"@font-face\s*{[^}]*}", re.S)
+_FONT_URL_RE = re.compile(r"url\(\s*(['\"]?)(https?://[^'\")]+)\1\s*\)")
+_UNICODE_RANGE_RE = re.compile(r"unicode-range\s*:\s*([^;}]+)")
+_RAW_BLOCK_RE = re.compile(
+    r"(<(%s)\b[^>]*>.*?</\2\s*>)" % "|".join(RAW_TEXT_TAGS), re.S | re.I
+)
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_CSS_CONTENT_RE = re.compile(r"\bcontent\s*:([^;}]*)", re.I)
+_CSS_ESCAPE_RE = re.compile(r"\\(?:([0-9a-fA-F]{1,6})\s?|(.))", re.S)
+_BLOCK_TAG_RE = "|".join(BLOCK_TAGS)
+_SPACE_BEFORE_BLOCK_RE = re.compile(r"\s+(?=</?(?:%s)\b)" % _BLOCK_TAG_RE, re.I)
+_SPACE_AFTER_BLOCK_RE = re.compile(r"(<(?:/?(?:%s)\b[^>]*)>)\s+" % _BLOCK_TAG_RE, re.I)
+_STYLE_ATTR_RE = re.compile(r"\sstyle\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.I)
+_TAG_RE = re.compile(r"<[a-zA-Z][^<>]*>")
+_CLASS_ATTR_RE = re.compile(r"\sclass\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.I)
+_BODY_TAG_RE = re.compile(r"<body\b[^<>]*>", re.I)
+_ID_ATTR_RE = re.compile(r"\sid\s*=\s*(?:\"([^\"]*)\"|'([^']*)')", re.I)
+_CSS_IDENT_RE = re.compile(r"-?[_a-zA-Z][\w-]*")
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and redundant whitespace from CSS, leaving strings intact"""
+    parts = []
+    last = 0
+    for m in _CSS_STRING_RE.finditer(css):
+        parts.append(_minify_css_code(css[last:m.start()]))
+        parts.append(m.group(0))
+        last = m.end()
+    parts.append(_minify_css_code(css[last:]))
+    return "".join(parts).strip()
+
+
+def _minify_css_code(code: str) -> str:
+    code = _CSS_COMMENT_RE.sub("", code)
+    code = re.sub(r"\s+", " ", code)
+    code = re.sub(r"\s*([{};,>])\s*", r"\1", code)
+    code = re.sub(r":\s+", ":", code)
+    return code.replace(";}", "}")
+
+
+def minify_html(html: str) -> str:
+    """Collapse insignificant whitespace and comments, minifying embedded CSS"""
+    out = []
+    for i, segment in enumerate(_RAW_BLOCK_RE.split(html)):
+        # split() yields [text, block, tagname, text, block, tagname, ...]
+        kind = i % 3
+        if kind == 2:
+            continue
+        if kind == 1:
+            if segment[:6].lower() == "<style":
+                open_end = segment.index(">") + 1
+                close_start = segment.lower().rindex("</style")
+                segment = segment[:open_end] + minify_css(segment[open_end:close_start]) + segment[close_start:]
+            out.append(segment)
+            continue
+        segment = _HTML_COMMENT_RE.sub("", segment)
+        segment = re.sub(r"\s+", " ", segment)
+        segment = _SPACE_BEFORE_BLOCK_RE.sub("", segment)
+        segment = _SPACE_AFTER_BLOCK_RE.sub(r"\1", segment)
+        out.append(segment)
+    return "".join(out).strip()
+
+
+def dedupe_inline_styles(html: str, min_count: int = 2, prefix: str = "s") -> str:
+    """Move repeated ``style`` attributes into shared classes.
+
+    The generated rules are scoped under an id on ``<body>`` (added if
+    missing), so they outrank the template's class and element selectors the
+    way the inline styles did, without ``!important`` changing the cascade.
+    """
+    segments = _RAW_BLOCK_RE.split(html)
+    counts: Dict[str, int] = {}
+    for i in range(0, len(segments), 3):
+        for m in _STYLE_ATTR_RE.finditer(segments[i]):
+            key = _normalize_declarations(_attr_value(m))
+            if key:
+                counts[key] = counts.get(key, 0) + 1
+
+    classes = {}
+    for key, count in counts.items():
+        if count >= min_count:
+            classes[key] = f"{prefix}{len(classes) + 1}"
+    if not classes:
+        return html
+
+    def rewrite_tag(tag_match):
+        tag = tag_match.group(0)
+        style = _STYLE_ATTR_RE.search(tag)
+        # <body> carries the scoping id, which a descendant rule cannot match
+        if not style or _BODY_TAG_RE.match(tag):
+            return tag
+        cls = classes.get(_normalize_declarations(_attr_value(style)))
+        if not cls:
+            return tag
+        tag = tag[:style.start()] + tag[style.end():]
+        existing = _CLASS_ATTR_RE.search(tag)
+        if existing:
+            group = 1 if existing.group(1) is not None else 2
+            return tag[:existing.start(group)] + f"{existing.group(group)} {cls}".strip() + tag[existing.end(group):]
+        return _add_attr(tag, "class", cls)
+
+    for i in range(0, len(segments), 3):
+        segments[i] = _TAG_RE.sub(rewrite_tag, segments[i])
+
+    scope = ""
+    for i in range(0, len(segments), 3):
+        body = _BODY_TAG_RE.search(segments[i])
+        if body:
+            body_id = _ID_ATTR_RE.search(body.group(0))
+            if body_id is None:
+                scope = f"{prefix}-root"
+                tag = _add_attr(body.group(0), "id", scope)
+                segments[i] = segments[i][:body.start()] + tag + segments[i][body.end():]
+            elif _CSS_IDENT_RE.fullmatch(_attr_value(body_id)):
+                scope = _attr_value(body_id)
+            break
+
+    selector = f"#{scope} ." if scope else "."
+    rules = "".join(f"{selector}{cls}{{{key}}}" for key, cls in classes.items())
+    html = "".join(seg for i, seg in enumerate(segments) if i % 3 != 2)
+    close_style = html.lower().rfind("</style")
+    if close_style == -1:
+        head_end = html.lower().find("</head")
+        insert_at = head_end if head_end != -1 else 0
+        return html[:insert_at] + f"<style>{rules}</style>" + html[insert_at:]
+    return html[:close_style] + rules + html[close_style:]
+
+
+def _attr_value(match) -> str:
+    """Value of a double- or single-quoted attribute matched by one of the ``_*_ATTR_RE``"""
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def _add_attr(tag: str, name: str, value: str) -> str:
+    closing = 2 if tag.endswith("/>") else 1
+    return f'{tag[:-closing].rstrip()} {name}="{value}"{tag[-closing:]}'
+
+
+def _normalize_declarations(style: str) -> str:
+    declarations = []
+    for decl in style.split(";"):
+        if ":" not in decl:
+            continue
+        name, value = decl.split(":", 1)
+        value = re.sub(r"\s+", " ", value.strip())
+        if value.lower().endswith("!important"):
+            value = value[:-len("!important")].rstrip() + "!important"
+        declarations.append(f"{name.strip().lower()}:{value}")
+    return ";".join(declarations)
+
+
+def _parse_unicode_range(spec: str) -> List[Tuple[int, int]]:
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip().upper().removeprefix("U+")
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ranges.append((int(lo, 16), int(hi, 16)))
+        elif "?" in part:
+            ranges.append((int(part.replace("?", "0"), 16), int(part.replace("?", "F"), 16)))
+        else:
+            ranges.append((int(part, 16), int(part, 16)))
+    return ranges
+
+
+def subset_font_faces(font_css: str, text: str) -> str:
+    """Keep only the @font-face blocks whose unicode-range covers characters in text"""
+    codepoints = {ord(ch) for ch in set(text)}
+
+    def keep(face_match):
+        face = face_match.group(0)
+        m = _UNICODE_RANGE_RE.search(face)
+        if not m:
+            return face
+        for lo, hi in _parse_unicode_range(m.group(1)):
+            if any(lo <= cp <= hi for cp in codepoints):
+                return face
+        return ""
+
+    return _FONT_FACE_RE.sub(keep, font_css)
+
+
+class AssetPipeline:
+    """Post-render optimizer for generated CV HTML.
+
+    Everything that depends only on the template (minified stylesheets and the
+    font CSS fetched for ``@import`` rules) is computed once per template and
+    cached, as are downloaded font files, so repeated renders only pay for the
+    per-document HTML pass.
+    """
+
+    def __init__(self, minify: bool = True, dedupe_styles: bool = True, inline_fonts: bool = True,
+                 subset_fonts: bool = True, timeout: int = 20):
+        self.minify = minify
+        self.dedupe_styles = dedupe_styles
+        self.inline_fonts = inline_fonts
+        self.subset_fonts = subset_fonts
+        self.timeout = timeout
+        self._style_cache: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._font_cache: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def process(self, html: str, template_name: str) -> str:
+        """Run the enabled optimization stages over a rendered document"""
+        html = _RAW_BLOCK_RE.sub(lambda m: self._process_raw_block(m, template_name, html), html)
+        if self.dedupe_styles:
+            html = dedupe_inline_styles(html)
+        if self.minify:
+            html = minify_html(html)
+        return html
+
+    def clear_cache(self, template_name: str = None):
+        """Drop cached stylesheets for one template (or all of them)"""
+        with self._lock:
+            if template_name is None:
+                self._style_cache.clear()
+            else:
+                for key in [k for k in self._style_cache if k[0] == template_name]:
+                    del self._style_cache[key]
+
+    def _process_raw_block(self, block_match, template_name: str, document: str) -> str:
+        block = block_match.group(1)
+        if block_match.group(2).lower() != "style":
+            return block
+        open_end = block.index(">") + 1
+        close_start = block.lower().rindex("</style")
+        css = block[open_end:close_start]
+
+        key = (template_name, hashlib.sha1(css.encode("utf-8")).hexdigest())
+        with self._lock:
+            cached = self._style_cache.get(key)
+        if cached is None:
+            cached = self._prepare_stylesheet(css)
+            with self._lock:
+                self._style_cache[key] = cached
+        font_css, body_css = cached
+
+        if font_css and self.subset_fonts:
+            font_css = subset_font_faces(font_css, _visible_text(document) + _css_content_text(document))
+        return block[:open_end] + font_css + body_css + block[close_start:]
+
+    def _prepare_stylesheet(self, css: str) -> Tuple[str, str]:
+        """Split a template stylesheet into inlined font faces and the remaining rules"""
+        font_css = ""
+        if self.inline_fonts:
+            imports = []
+
+            def collect(m):
+                imports.append(m.group(2))
+                return ""
+
+            stripped = _CSS_IMPORT_RE.sub(collect, css)
+            fetched = [self._fetch_font_css(url) for url in imports]
+            if all(f is not None for f in fetched):
+                css = stripped
+                font_css = "".join(fetched)
+        if self.minify:
+            css = minify_css(css)
+            font_css = minify_css(font_css)
+        return font_css, css
+
+    def _fetch_font_css(self, url: str) -> Optional[str]:
+        import requests
+
+        try:
+            r = requests.get(url, headers=FONT_CSS_HEADERS, timeout=self.timeout)
+            r.raise_for_status()
+        except Exception as e:
+            logger.warning("Không thể tải font CSS %s: %s", url, e)
+            return None
+
+        inlined = []
+        for face in _FONT_FACE_RE.findall(r.text):
+            data_uri = None
+            m = _FONT_URL_RE.search(face)
+            if m:
+                data_uri = self._fetch_font_file(m.group(2))
+                if data_uri is None:
+                    return None
+                face = face[:m.start()] + f"url({data_uri})" + face[m.end():]
+            inlined.append(face)
+        return "".join(inlined)
+
+    def _fetch_font_file(self, url: str) -> Optional[str]:
+        with self._lock:
+            if url in self._font_cache:
+                return self._font_cache[url]
+        import requests
+
+        data_uri = None
+        try:
+            r = requests.get(url, timeout=self.timeout)
+            r.raise_for_status()
+            ext = url.rsplit(".", 1)[-1].lower()
+            mime = FONT_MIME_TYPES.get(ext, "application/octet-stream")
+            data_uri = f"data:{mime};base64,{base64.b64encode(r.content).decode('ascii')}"
+        except Exception as e:
+            logger.warning("Không thể tải font %s: %s", url, e)
+        with self._lock:
+            self._font_cache[url] = data_uri
+        return data_uri
+
+
+def _visible_text(html: str) -> str:
+    text = _RAW_BLOCK_RE.sub("", html)
+    return re.sub(r"<[^>]*>", "", text)
+
+
+def _unescape_css(text: str) -> str:
+    def replace(m):
+        if m.group(1):
+            codepoint = int(m.group(1), 16)
+            return chr(codepoint) if 0 < codepoint <= 0x10FFFF else "\ufffd"
+        return "" if m.group(2) == "\n" else m.group(2)
+
+    return _CSS_ESCAPE_RE.sub(replace, text)
+
+
+def _css_content_text(html: str) -> str:
+    """Characters generated by CSS ``content:`` strings (icons, bullets) in the document's styles"""
+    chars = []
+    for value in _CSS_CONTENT_RE.findall(html):
+        for literal in _CSS_STRING_RE.findall(value):
+            chars.append(_unescape_css(literal[1:-1]))
+    return "".join(chars)
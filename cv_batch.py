@@ -0,0 +1,215 @@
+"""Batch CV generation for many candidates.
+
+Usage:
+    python cv_batch.py profiles/ -o output/ --workers 8
+
+A profile is a dict with the ``CVSystem.create_cv_from_input`` arguments
+(personal_info, github_repos, experience, education, skills, certifications,
+job_description, template) plus an optional ``id``. The input directory may
+hold ``.json``/``.yaml``/``.yml`` files (one profile each) and ``.jsonl``
+files (one profile per line).
+"""
+import os
+import re
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+
+import get_readme
+from cv_metrics import submit
+from cv_system import CVSystem, repo_key
+from cv_models import CV_FILE_EXTENSIONS, read_data_file
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = (
+    "personal_info", "github_repos", "experience", "education", "skills",
+    "certifications", "job_description", "template", "max_projects",
+)
+
+# Alternate spellings accepted in profile files
+PROFILE_ALIASES = {"repos": "github_repos", "jd": "job_description"}
+
+
+def iter_profiles(directory: str, errors: Optional[List[Dict]] = None) -> Iterator[Dict]:
+    """Yield profiles from every supported file in ``directory``, in name order
+
+    With ``errors``, a file or JSONL line that cannot be parsed or is not a
+    valid profile is appended to it as a failed result entry and skipped;
+    without it the error is raised.
+    """
+    def failed(profile_id, source, e):
+        if errors is None:
+            raise e
+        logger.warning("Bỏ qua profile %s: %s", profile_id, e)
+        errors.append({"id": profile_id, "source": source, "status": "failed",
+                       "error": f"{type(e).__name__}: {e}"})
+
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext == ".jsonl":
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = list(f)
+            except (OSError, ValueError) as e:
+                failed(stem, path, e)
+                continue
+            for lineno, line in enumerate(lines, 1):
+                if line.strip():
+                    try:
+                        profile = _normalize_profile(json.loads(line), f"{stem}-{lineno}", path)
+                    except ValueError as e:
+                        failed(f"{stem}-{lineno}", f"{path}:{lineno}", e)
+                        continue
+                    yield profile
+        elif ext in CV_FILE_EXTENSIONS:
+            try:
+                profile = _normalize_profile(read_data_file(path), stem, path)
+            except (OSError, ValueError) as e:
+                failed(stem, path, e)
+                continue
+            yield profile
+
+
+def _normalize_profile(raw: Dict, default_id: str, source: str) -> Dict:
+    if not isinstance(raw, dict) or "personal_info" not in raw:
+        raise ValueError(f"{source}: profile must be a mapping with 'personal_info'")
+    profile = {PROFILE_ALIASES.get(k, k): v for k, v in raw.items()}
+    profile["id"] = str(profile.get("id") or default_id)
+    profile["source"] = source
+    return profile
+
+
+def _safe_filename(value: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", value).strip("_") or "cv"
+
+
+def _jd_cache_delta(before: Dict, after: Dict) -> Dict:
+    delta = {k: after[k] - before[k] for k in ("lookups", "exact_hits", "near_hits", "misses")}
+    hits = delta["exact_hits"] + delta["near_hits"]
+    delta["hit_rate"] = hits / delta["lookups"] if delta["lookups"] else 0.0
+    return delta
+
+
+def run_batch(profiles: List[Dict], output_dir: str, cv_system: CVSystem = None, workers: int = 4,
+              default_template: str = "modern", deadline: float | None = None,
+              failed_profiles: Optional[List[Dict]] = None) -> Dict:
+    """Generate a CV per profile, sharing one CVSystem (HTTP pool, caches, LLM client).
+
+    All candidates run in parallel; repos listed by several candidates are
+    analyzed once through a repo cache scoped to this batch (see
+    ``CVSystem.repo_cache``), concurrent requests for the same repo waiting
+    on the analysis already in flight.
+    ``deadline`` is the time budget in seconds of each candidate's CV (see
+    ``CVSystem.create_cv_from_input``). ``failed_profiles`` are entries for
+    profiles that could not be loaded (see ``iter_profiles``); they are
+    reported as failed. Returns the run summary.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cv_system = cv_system or CVSystem()
+    started = time.perf_counter()
+
+    all_repos = [url for p in profiles for url in (p.get("github_repos") or [])]
+    unique_repos, invalid_repos = set(), set()
+    for url in all_repos:
+        try:
+            unique_repos.add(repo_key(url))
+        except (ValueError, TypeError, AttributeError):
+            # Pipeline của ứng viên vẫn chạy, repo này thành project fallback
+            invalid_repos.add(url)
+    jd_before = cv_system.jd_index.stats()
+
+    def build(profile):
+        t0 = time.perf_counter()
+        output_path = os.path.join(output_dir, f"{_safe_filename(profile['id'])}.html")
+        kwargs = {k: profile[k] for k in PROFILE_FIELDS if k in profile}
+        kwargs.setdefault("template", default_template)
+        html_content, report = cv_system.create_cv_with_report(output_path=output_path, deadline=deadline, **kwargs)
+        if not html_content:
+            raise RuntimeError(f"template '{kwargs['template']}' rendered no output")
+        return output_path, report, time.perf_counter() - t0
+
+    results = []
+    with cv_system.repo_cache() as repo_flight, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {submit(pool, build, p): p for p in profiles}
+        for future in as_completed(futures):
+            profile = futures[future]
+            entry = {"id": profile["id"], "source": profile["source"]}
+            try:
+                output_path, report, seconds = future.result()
+                entry.update(status="ok", output=output_path, seconds=seconds, stages=report.to_dict()["stages"],
+                             degraded=report.degraded)
+            except Exception as e:
+                logger.warning("Lỗi khi tạo CV %s: %s", profile["id"], e)
+                entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+            results.append(entry)
+
+    results.extend(failed_profiles or [])
+    results.sort(key=lambda r: r["id"])
+    failed = [r for r in results if r["status"] != "ok"]
+    summary = {
+        "candidates": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "repos_listed": len(all_repos),
+        "repos_unique": len(unique_repos),
+        "repos_invalid": sorted(map(str, invalid_repos)),
+        "repo_analyses": repo_flight.stats(),
+        "jd_cache": _jd_cache_delta(jd_before, cv_system.jd_index.stats()),
+        "total_seconds": time.perf_counter() - started,
+        "results": results,
+    }
+    with open(os.path.join(output_dir, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate CVs for a directory of candidate profiles")
+    parser.add_argument("profiles", help="directory of .json/.jsonl/.yaml candidate profiles")
+    parser.add_argument("-o", "--output", default="output", help="output directory")
+    parser.add_argument("--workers", type=int, default=4, help="parallel repo analyses / CV renders")
+    parser.add_argument("--template", default="modern", help="template for profiles that do not set one")
+    parser.add_argument("--store", help="AnalysisStore path for incremental repo analysis")
+    parser.add_argument("--deadline", type=float, help="time budget in seconds per CV (slow steps degrade)")
+    parser.add_argument("--description-mode", choices=get_readme.DESCRIPTION_MODES,
+                        help="project descriptions: llm, extractive (offline README summary) or auto")
+    args = parser.parse_args(argv)
+    if args.description_mode:
+        get_readme.set_description_mode(args.description_mode)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    store = None
+    if args.store:
+        from analysis_store import AnalysisStore
+        store = AnalysisStore(args.store)
+
+    load_errors = []
+    profiles = list(iter_profiles(args.profiles, errors=load_errors))
+    cv_system = CVSystem(analysis_store=store)
+    try:
+        summary = run_batch(profiles, args.output, cv_system, args.workers, args.template,
+                            args.deadline, failed_profiles=load_errors)
+    finally:
+        cv_system.close()
+        if store is not None:
+            store.close()
+    print(f"✅ {summary['succeeded']}/{summary['candidates']} CV "
+          f"({summary['repos_unique']} repo duy nhất / {summary['repos_listed']} repo) "
+          f"trong {summary['total_seconds']:.1f}s")
+    jd_cache = summary["jd_cache"]
+    if jd_cache["lookups"]:
+        print(f"♻️  JD gần trùng: dùng lại {jd_cache['exact_hits'] + jd_cache['near_hits']}/{jd_cache['lookups']} "
+              f"kết quả tối ưu ({jd_cache['hit_rate']:.0%})")
+    if summary["failed"]:
+        print(f"❌ {summary['failed']} CV lỗi, xem {os.path.join(args.output, 'batch_summary.json')}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,89 @@
 import yaml
 from jinja2 import Environment, FileSystemLoader, Template
 import os
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 import json
+from cv_pdf import PDFExporter
+from cv_metrics import stage
+from cv_models import CVData, LoadedCV, YAML_LOADER, iter_cv_files, load_cv_file
+from template_fields import TemplateFields, analyze_template
 
 class CVGenerator:
-    def __init__(self, templates_dir: str = "templates"):
+    def __init__(self, templates_dir: str = "templates", optimize_output: bool = False,
+                 asset_pipeline=None):
         self.templates_dir = templates_dir
         self.env = Environment(loader=FileSystemLoader(templates_dir))
+        self.optimize_output = optimize_output
+        self._asset_pipeline = asset_pipeline
+        self._pdf_exporter = None
+        self._template_fields: Dict[str, TemplateFields] = {}
+        self._configs: Dict[str, tuple] = {}
+
+    @property
+    def asset_pipeline(self):
+        """Post-render optimizer, created on first use (see cv_assets.AssetPipeline)"""
+        if self._asset_pipeline is None:
+            from cv_assets import AssetPipeline
+            self._asset_pipeline = AssetPipeline()
+        return self._asset_pipeline
         
-    def load_cv_data(self, data_path: str = None, data_dict: dict = None) -> Dict[Any, Any]:
-        """Load CV data from YAML file or dictionary"""
+    def load_cv_data(self, data_path: str = None, data_dict: dict = None) -> CVData:
+        """Load and validate CV data from a YAML/JSON file or dictionary
+
+        Raises ``cv_models.CVValidationError`` naming the offending field.
+        """
         if data_dict:
-            return data_dict
+            return CVData.from_dict(data_dict)
         elif data_path:
-            with open(data_path, 'r', encoding='utf-8') as file:
-                return yaml.safe_load(file)
+            return load_cv_file(data_path)
         else:
             raise ValueError("Either data_path or data_dict must be provided")
+
+    def iter_cv_data(self, directory: str) -> Iterator[LoadedCV]:
+        """Lazily load every CV file in a directory, with per-file parse timings"""
+        return iter_cv_files(directory)
     
-    def generate_cv(self, template_name: str, cv_data: Dict[Any, Any], output_path: str = None) -> str:
-        """Generate CV HTML from template and data"""
+    def generate_cv(self, template_name: str, cv_data: Dict[Any, Any] | CVData, output_path: str = None,
+                    optimize: bool = None) -> str:
+        """Generate CV HTML from template and data
+
+        ``cv_data`` may be a plain dict or a validated ``cv_models.CVData``;
+        templates read both through the same attribute names.
+
+        When ``optimize`` (or ``optimize_output`` on the generator) is set, the
+        rendered HTML is minified, repeated inline styles are folded into
+        classes and web fonts are inlined via the asset pipeline.
+        """
         try:
-            # Load template
-            template = self.env.get_template(f"{template_name}/template.html")
-            
-            # Load template config
-            config_path = os.path.join(self.templates_dir, template_name, "config.yaml")
-            template_config = {}
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    template_config = yaml.safe_load(f)
-            
-            # Merge data with config
-            render_data = {
-                'cv': cv_data,
-                'config': template_config,
-                'generated_date': datetime.now().strftime("%B %Y")
-            }
-            
-            # Render template
-            html_content = template.render(**render_data)
+            with stage("template_render"):
+                # Load template
+                template = self.env.get_template(f"{template_name}/template.html")
+                
+                # Load template config
+                template_config = self.load_template_config(template_name)
+                
+                # Merge data with config
+                render_data = {
+                    'cv': cv_data,
+                    'config': template_config,
+                    'generated_date': datetime.now().strftime("%B %Y")
+                }
+                
+                # Render template
+                html_content = template.render(**render_data)
+
+            # Optional post-render optimization
+            if self.optimize_output if optimize is None else optimize:
+                with stage("asset_optimize"):
+                    html_content = self.asset_pipeline.process(html_content, template_name)
             
             # Save to file if output_path provided
             if output_path:
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
+                with stage("file_write"):
+                    with open(output_path, 'w', encoding='utf-8') as f:
+                        f.write(html_content)
                 print(f"CV generated successfully: {output_path}")
             
             return html_content
@@ -55,6 +92,75 @@ class CVGenerator:
             print(f"Error generating CV: {str(e)}")
             return ""
     
+    def generate_pdf(self, template_name: str, cv_data: Dict[Any, Any], output_path: str,
+                     exporter: PDFExporter = None, optimize: bool = None) -> Dict[str, Any]:
+        """Generate CV as PDF using a pool of warm WeasyPrint workers
+
+        Returns the worker result with per-stage timings (html, render, layout, write).
+        """
+        start = time.perf_counter()
+        html_content = self.generate_cv(template_name, cv_data, optimize=optimize)
+        html_time = time.perf_counter() - start
+        if not html_content:
+            raise ValueError(f"Could not render template '{template_name}'")
+
+        if exporter is None:
+            if self._pdf_exporter is None:
+                self._pdf_exporter = PDFExporter()
+            exporter = self._pdf_exporter
+
+        base_url = os.path.abspath(os.path.join(self.templates_dir, template_name))
+        result = exporter.export(html_content, output_path, base_url=base_url)
+        result["timings"] = {"html": html_time, **result["timings"]}
+        print(f"PDF generated successfully: {output_path}")
+        return result
+
+    def load_template_config(self, template_name: str) -> Dict[str, Any]:
+        """config.yaml of a template, re-parsed only when the file changes"""
+        config_path = os.path.join(self.templates_dir, template_name, "config.yaml")
+        try:
+            mtime = os.stat(config_path).st_mtime_ns
+        except OSError:
+            return {}
+        cached = self._configs.get(template_name)
+        if cached is None or cached[0] != mtime:
+            with open(config_path, 'rb') as f:
+                cached = (mtime, yaml.load(f, Loader=YAML_LOADER) or {})
+            self._configs[template_name] = cached
+        return cached[1]
+
+    def invalidate_template(self, template_name: str):
+        """Drop cached analysis/config for a template whose files changed
+
+        Jinja itself recompiles the template on the next ``get_template`` call.
+        """
+        self._template_fields.pop(template_name, None)
+        self._configs.pop(template_name, None)
+
+    def template_fields(self, template_name: str) -> TemplateFields:
+        """CV fields the template reads, from a static walk of its Jinja AST (cached)
+
+        Lets callers skip computing data the template never renders, e.g.
+        ``template_fields("minimal").uses("cv.projects[].highlights")``.
+        """
+        fields = self._template_fields.get(template_name)
+        if fields is None:
+            fields = analyze_template(self.env, f"{template_name}/template.html")
+            self._template_fields[template_name] = fields
+        return fields
+
+    def close(self):
+        """Shut down the PDF worker pool, if one was started"""
+        if self._pdf_exporter is not None:
+            self._pdf_exporter.close()
+            self._pdf_exporter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def list_available_templates(self) -> List[str]:
         """List all available templates"""
         templates = []
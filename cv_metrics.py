@@ -0,0 +1,192 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from functools import wraps
+from typing import Dict, List, Optional
+
+# Metrics collector and innermost stage for the code currently running.
+# Context variables keep concurrent pipelines (threads, asyncio tasks) apart.
+_active_metrics: contextvars.ContextVar = contextvars.ContextVar("cv_active_metrics", default=None)
+_active_stage: contextvars.ContextVar = contextvars.ContextVar("cv_active_stage", default=None)
+
+
+@dataclass
+class StageReport:
+    name: str
+    calls: int = 0
+    seconds: float = 0.0
+    errors: int = 0
+    http_requests: int = 0
+    http_bytes: int = 0
+
+
+@dataclass
+class MetricsReport:
+    """Snapshot of per-stage wall time, call counts and HTTP traffic
+
+    ``degraded`` maps steps that fell back to a cheaper result (time budget
+    running low, see ``deadline``) to the reason.
+    """
+    stages: List[StageReport] = field(default_factory=list)
+    total_seconds: float = 0.0
+    degraded: Dict[str, str] = field(default_factory=dict)
+
+    def get(self, name: str) -> Optional[StageReport]:
+        for stage_report in self.stages:
+            if stage_report.name == name:
+                return stage_report
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_seconds": self.total_seconds,
+            "stages": {s.name: {k: v for k, v in asdict(s).items() if k != "name"} for s in self.stages},
+            "degraded": dict(self.degraded),
+        }
+
+    def to_prometheus(self, prefix: str = "cv_pipeline") -> str:
+        """Render the report in the Prometheus text exposition format"""
+        metrics = [
+            ("stage_seconds_total", "Wall time spent in each pipeline stage", "seconds"),
+            ("stage_calls_total", "Number of times each pipeline stage ran", "calls"),
+            ("stage_errors_total", "Number of stage runs that raised", "errors"),
+            ("http_requests_total", "HTTP requests issued within each stage", "http_requests"),
+            ("http_bytes_total", "HTTP response bytes received within each stage", "http_bytes"),
+        ]
+        lines = []
+        for suffix, help_text, attr in metrics:
+            name = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for s in self.stages:
+                label = s.name.replace("\\", "\\\\").replace('"', '\\"')
+                value = getattr(s, attr)
+                lines.append(f'{name}{{stage="{label}"}} {value:.6f}' if isinstance(value, float)
+                             else f'{name}{{stage="{label}"}} {value}')
+        name = f"{prefix}_degraded_steps"
+        lines.append(f"# HELP {name} Steps that fell back to a cheaper result in this run")
+        lines.append(f"# TYPE {name} gauge")
+        for step in self.degraded:
+            label = step.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{name}{{step="{label}"}} 1')
+        lines.append(f"# HELP {prefix}_run_seconds Wall time of the whole run")
+        lines.append(f"# TYPE {prefix}_run_seconds gauge")
+        lines.append(f"{prefix}_run_seconds {self.total_seconds:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+class PipelineMetrics:
+    """Collects wall time, call counts and HTTP usage per pipeline stage.
+
+    Activate a collector around a run with :meth:`activate`; instrumented code
+    then reports into it through the module-level :func:`stage`, :func:`timed`
+    and :func:`record_http` helpers. Stages nest, and HTTP traffic is attributed
+    to the innermost active stage.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, StageReport] = {}
+        self._degraded: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._started = None
+        self._finished = None
+
+    @contextmanager
+    def activate(self):
+        token = _active_metrics.set(self)
+        self._started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._finished = time.perf_counter()
+            _active_metrics.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        token = _active_stage.set(name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            _active_stage.reset(token)
+            with self._lock:
+                s = self._stage(name)
+                s.calls += 1
+                s.seconds += elapsed
+                s.errors += failed
+
+    def record_http(self, nbytes: int, stage_name: str = None):
+        with self._lock:
+            s = self._stage(stage_name or _active_stage.get() or "unattributed")
+            s.http_requests += 1
+            s.http_bytes += nbytes
+
+    def record_degraded(self, step: str, reason: str):
+        with self._lock:
+            self._degraded.setdefault(step, reason)
+
+    def report(self) -> MetricsReport:
+        with self._lock:
+            stages = [StageReport(**asdict(s)) for s in self._stages.values()]
+            degraded = dict(self._degraded)
+        end = self._finished if self._finished is not None else time.perf_counter()
+        total = end - self._started if self._started is not None else 0.0
+        return MetricsReport(stages=stages, total_seconds=total, degraded=degraded)
+
+    def _stage(self, name: str) -> StageReport:
+        s = self._stages.get(name)
+        if s is None:
+            s = self._stages[name] = StageReport(name=name)
+        return s
+
+
+def current_metrics() -> Optional[PipelineMetrics]:
+    return _active_metrics.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as pipeline stage ``name``; a no-op when no collector is active"""
+    metrics = _active_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+
+def timed(name: str):
+    """Decorator form of :func:`stage`"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_http(nbytes: int):
+    """Count one HTTP response of ``nbytes`` against the innermost active stage"""
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.record_http(nbytes)
+
+
+def record_degraded(step: str, reason: str):
+    """Note that ``step`` fell back to a cheaper result (first reason per step is kept)"""
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.record_degraded(step, reason)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """``executor.submit`` that carries the active collector and stage into the worker"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
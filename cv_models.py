@@ -0,0 +1,372 @@
+import os
+import copy
+import json
+import time
+import datetime
+from dataclasses import dataclass, field, fields
+from typing import Any, ClassVar, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import yaml
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encode/decode
+    orjson = None
+
+# libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+CV_FILE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+class CVValidationError(ValueError):
+    """Raised when CV data does not match the expected structure"""
+
+
+def _str(value: Any, path: str, required: bool = False) -> str:
+    if value is None or value == "":
+        if required:
+            raise CVValidationError(f"{path}: required field is missing")
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):  # YAML parses unquoted dates
+        return value.isoformat()
+    raise CVValidationError(f"{path}: expected a string, got {type(value).__name__}")
+
+
+def _str_list(value: Any, path: str) -> List[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise CVValidationError(f"{path}: expected a list, got {type(value).__name__}")
+    return [_str(item, f"{path}[{i}]") for i, item in enumerate(value)]
+
+
+def _records(value: Any, path: str, record_cls) -> list:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise CVValidationError(f"{path}: expected a list, got {type(value).__name__}")
+    return [record_cls.from_dict(item, f"{path}[{i}]") for i, item in enumerate(value)]
+
+
+def _extra_attr(obj, name: str):
+    """Attribute fallback to the keys kept in ``extra``, so templates can use them"""
+    try:
+        extra = object.__getattribute__(obj, "extra")
+    except AttributeError:
+        raise AttributeError(name) from None
+    try:
+        return extra[name]
+    except KeyError:
+        raise AttributeError(f"{type(obj).__name__!r} object has no attribute {name!r}") from None
+
+
+class _Record:
+    """Shared from_dict/to_dict for flat records made of ``str`` and ``List[str]`` fields
+
+    Keys that are not fields are kept in ``extra`` (and written back by
+    to_dict), so custom keys used by a template still reach it.
+    """
+    __slots__ = ()
+    REQUIRED: ClassVar[Tuple[str, ...]] = ()
+    _kinds: ClassVar[Dict[type, List[Tuple[str, bool]]]] = {}
+
+    @classmethod
+    def _field_kinds(cls) -> List[Tuple[str, bool]]:
+        kinds = _Record._kinds.get(cls)
+        if kinds is None:
+            kinds = _Record._kinds[cls] = [(f.name, f.type is not str) for f in fields(cls) if f.name != "extra"]
+        return kinds
+
+    def __getattr__(self, name: str):
+        return _extra_attr(self, name)
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = ""):
+        if isinstance(data, cls):
+            return data
+        path = path or cls.__name__
+        if not isinstance(data, Mapping):
+            raise CVValidationError(f"{path}: expected an object, got {type(data).__name__}")
+        kwargs = {}
+        kinds = cls._field_kinds()
+        for name, is_list in kinds:
+            value = data.get(name)
+            kwargs[name] = (_str_list(value, f"{path}.{name}") if is_list
+                            else _str(value, f"{path}.{name}", name in cls.REQUIRED))
+        extra = {key: value for key, value in data.items() if key not in kwargs}
+        if extra:
+            kwargs["extra"] = extra
+        return cls(**kwargs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {name: (list(getattr(self, name)) if is_list else getattr(self, name))
+                  for name, is_list in self._field_kinds()}
+        result.update(self.extra)
+        return result
+
+    def copy(self):
+        return type(self).from_dict(copy.deepcopy(self.to_dict()))
+
+
+@dataclass(slots=True)
+class PersonalInfo(_Record):
+    REQUIRED: ClassVar[Tuple[str, ...]] = ("name",)
+    name: str
+    title: str = ""
+    email: str = ""
+    phone: str = ""
+    location: str = ""
+    website: str = ""
+    linkedin: str = ""
+    github: str = ""
+    extra: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass(slots=True)
+class Experience(_Record):
+    title: str = ""
+    company: str = ""
+    location: str = ""
+    duration: str = ""
+    achievements: List[str] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass(slots=True)
+class Project(_Record):
+    name: str = ""
+    description: str = ""
+    tech_stack: List[str] = field(default_factory=list)
+    github_url: str = ""
+    live_url: str = ""
+    highlights: List[str] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass(slots=True)
+class Education(_Record):
+    degree: str = ""
+    school: str = ""
+    duration: str = ""
+    gpa: str = ""
+    extra: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass(slots=True)
+class Certification(_Record):
+    name: str = ""
+    issuer: str = ""
+    date: str = ""
+    extra: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+class Skills:
+    """Ordered skill categories; behaves like the ``{category: [skills]}`` dict templates iterate"""
+    __slots__ = ("categories",)
+
+    def __init__(self, categories: Dict[str, List[str]] = None):
+        self.categories = categories if categories is not None else {}
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "skills") -> "Skills":
+        if isinstance(data, cls):
+            return data
+        if data is None:
+            return cls()
+        if not isinstance(data, Mapping):
+            raise CVValidationError(f"{path}: expected an object, got {type(data).__name__}")
+        return cls({_str(k, path, True): _str_list(v, f"{path}.{k}") for k, v in data.items()})
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {k: list(v) for k, v in self.categories.items()}
+
+    def copy(self) -> "Skills":
+        return Skills(self.to_dict())
+
+    def items(self):
+        return self.categories.items()
+
+    def keys(self):
+        return self.categories.keys()
+
+    def values(self):
+        return self.categories.values()
+
+    def get(self, key: str, default=None):
+        return self.categories.get(key, default)
+
+    def __getitem__(self, key: str) -> List[str]:
+        return self.categories[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.categories)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Skills) and self.categories == other.categories
+
+    def __repr__(self) -> str:
+        return f"Skills({self.categories!r})"
+
+
+@dataclass(slots=True)
+class CVData:
+    """Typed CV document.
+
+    Attribute names match the dict layout the Jinja templates were written
+    against, so an instance can be passed to ``CVGenerator.generate_cv`` as-is.
+    """
+    personal_info: PersonalInfo
+    summary: str = ""
+    experience: List[Experience] = field(default_factory=list)
+    projects: List[Project] = field(default_factory=list)
+    skills: Skills = field(default_factory=Skills)
+    education: List[Education] = field(default_factory=list)
+    certifications: List[Certification] = field(default_factory=list)
+    # Top-level keys other than the sections above (custom template sections), kept as-is
+    extra: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    _SECTIONS: ClassVar[Tuple[str, ...]] = (
+        "personal_info", "summary", "experience", "projects", "skills", "education", "certifications",
+    )
+
+    def __getattr__(self, name: str):
+        return _extra_attr(self, name)
+
+    @classmethod
+    def from_dict(cls, data: Any, path: str = "cv") -> "CVData":
+        """Build and validate in a single pass; raises CVValidationError on malformed input"""
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, Mapping):
+            raise CVValidationError(f"{path}: expected an object, got {type(data).__name__}")
+        if data.get("personal_info") is None:
+            raise CVValidationError(f"{path}.personal_info: required field is missing")
+        return cls(
+            personal_info=PersonalInfo.from_dict(data["personal_info"], f"{path}.personal_info"),
+            summary=_str(data.get("summary"), f"{path}.summary"),
+            experience=_records(data.get("experience"), f"{path}.experience", Experience),
+            projects=_records(data.get("projects"), f"{path}.projects", Project),
+            skills=Skills.from_dict(data.get("skills"), f"{path}.skills"),
+            education=_records(data.get("education"), f"{path}.education", Education),
+            certifications=_records(data.get("certifications"), f"{path}.certifications", Certification),
+            extra={key: value for key, value in data.items() if key not in cls._SECTIONS},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "personal_info": self.personal_info.to_dict(),
+            "summary": self.summary,
+            "experience": [e.to_dict() for e in self.experience],
+            "projects": [p.to_dict() for p in self.projects],
+            "skills": self.skills.to_dict(),
+            "education": [e.to_dict() for e in self.education],
+            "certifications": [c.to_dict() for c in self.certifications],
+            **self.extra,
+        }
+
+    def copy(self) -> "CVData":
+        return CVData(
+            personal_info=self.personal_info.copy(),
+            summary=self.summary,
+            experience=[e.copy() for e in self.experience],
+            projects=[p.copy() for p in self.projects],
+            skills=self.skills.copy(),
+            education=[e.copy() for e in self.education],
+            certifications=[c.copy() for c in self.certifications],
+            extra=copy.deepcopy(self.extra),
+        )
+
+    def to_json(self) -> str:
+        """Compact JSON (non-ASCII kept as-is)"""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict()).decode("utf-8")
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "CVData":
+        try:
+            raw = orjson.loads(data) if orjson is not None else json.loads(data)
+        except ValueError as e:
+            raise CVValidationError(f"invalid JSON: {e}") from e
+        return cls.from_dict(raw)
+
+    def to_msgpack(self) -> bytes:
+        import msgpack
+
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> "CVData":
+        import msgpack
+
+        try:
+            raw = msgpack.unpackb(data, raw=False)
+        except Exception as e:
+            raise CVValidationError(f"invalid MessagePack: {e}") from e
+        return cls.from_dict(raw)
+
+
+def read_data_file(path: str) -> Any:
+    """Parse a ``.json``/``.yaml``/``.yml`` file with the fastest available parser"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        if ext == ".json":
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        if ext in (".yaml", ".yml"):
+            return yaml.load(raw, Loader=YAML_LOADER)
+    except (ValueError, yaml.YAMLError) as e:
+        raise CVValidationError(f"{path}: could not parse file: {e}") from e
+    raise CVValidationError(f"{path}: unsupported file type '{ext}'")
+
+
+def load_cv_file(path: str) -> CVData:
+    """Read and validate one CV file; errors name the file and the failing field"""
+    return CVData.from_dict(read_data_file(path), path=os.path.basename(path))
+
+
+@dataclass(slots=True)
+class LoadedCV:
+    path: str
+    cv: Optional[CVData]
+    error: Optional[CVValidationError]
+    parse_seconds: float
+    validate_seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def iter_cv_files(directory: str) -> Iterator[LoadedCV]:
+    """Lazily load every CV file in ``directory`` (name order) with per-file timings.
+
+    Invalid files are yielded with ``error`` set instead of stopping the import.
+    """
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(CV_FILE_EXTENSIONS):
+            continue
+        path = os.path.join(directory, name)
+        t0 = time.perf_counter()
+        cv = error = None
+        try:
+            data = read_data_file(path)
+        except (OSError, CVValidationError) as e:
+            error = e if isinstance(e, CVValidationError) else CVValidationError(f"{path}: {e}")
+            yield LoadedCV(path, None, error, time.perf_counter() - t0, 0.0)
+            continue
+        t1 = time.perf_counter()
+        try:
+            cv = CVData.from_dict(data, path=name)
+        except CVValidationError as e:
+            error = e
+        yield LoadedCV(path, cv, error, t1 - t0, time.perf_counter() - t1)
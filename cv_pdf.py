@@ -0,0 +1,159 @@
+import os
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+_STYLE_BLOCK_RE = re.compile(r"<style\b([^>]*)>(.*?)</style\s*>", re.S | re.I)
+_CSS_IMPORT_RE = re.compile(r"""@import\s+(url\([^)]*\)|"[^"]*"|'[^']*')\s*([^;]*);""", re.I)
+_MEDIA_ATTR_RE = re.compile(r"""\bmedia\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+
+# Parsed stylesheets kept per worker, and how many recently seen CSS hashes are remembered.
+# Only CSS seen at least twice (template sheets shared by many CVs) is cached; per-document
+# CSS (e.g. after font subsetting) would only fill the cache.
+CSS_CACHE_SIZE = 32
+CSS_SEEN_SIZE = 256
+
+# Per-worker state, populated once by _init_worker and reused across jobs
+_FONT_CONFIG = None
+_CSS_CACHE: "OrderedDict[tuple, object]" = OrderedDict()
+_CSS_SEEN: "OrderedDict[tuple, None]" = OrderedDict()
+
+
+def _init_worker():
+    """Import WeasyPrint and load fonts once per worker process"""
+    global _FONT_CONFIG
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:  # WeasyPrint < 53
+        from weasyprint.fonts import FontConfiguration
+    _FONT_CONFIG = FontConfiguration()
+
+
+def _get_stylesheet(css_text: str, base_url: Optional[str]):
+    from weasyprint import CSS
+
+    # url() references resolve against base_url, so the parsed sheet depends on it too
+    key = (hashlib.sha1(css_text.encode("utf-8")).hexdigest(), base_url)
+    sheet = _CSS_CACHE.get(key)
+    if sheet is not None:
+        _CSS_CACHE.move_to_end(key)
+        return sheet, True
+
+    sheet = CSS(string=css_text, base_url=base_url, font_config=_FONT_CONFIG)
+    if key in _CSS_SEEN:
+        del _CSS_SEEN[key]
+        _CSS_CACHE[key] = sheet
+        if len(_CSS_CACHE) > CSS_CACHE_SIZE:
+            _CSS_CACHE.popitem(last=False)
+    else:
+        _CSS_SEEN[key] = None
+        if len(_CSS_SEEN) > CSS_SEEN_SIZE:
+            _CSS_SEEN.popitem(last=False)
+    return sheet, False
+
+
+def _block_css(attributes: str, css_text: str) -> str:
+    """CSS of a <style> block, wrapped in @media when the block has a media attribute
+
+    @import is not allowed inside @media, so imports are hoisted out and get
+    the block's media list themselves (imports with their own list keep it).
+    """
+    m = _MEDIA_ATTR_RE.search(attributes)
+    media = next((g for g in m.groups() if g is not None), "").strip() if m else ""
+    if not media or media.lower() == "all":
+        return css_text
+
+    imports = []
+
+    def hoist(match):
+        imports.append(f"@import {match.group(1)} {match.group(2).strip() or media};")
+        return ""
+
+    rules = _CSS_IMPORT_RE.sub(hoist, css_text)
+    return "".join(f"{rule}\n" for rule in imports) + f"@media {media} {{\n{rules}\n}}"
+
+
+def _render_pdf_job(html: str, output_path: str, base_url: Optional[str]) -> Dict:
+    """Render one document to PDF inside a worker, timing each stage"""
+    from weasyprint import HTML
+
+    if _FONT_CONFIG is None:
+        _init_worker()
+
+    timings = {}
+    start = time.perf_counter()
+
+    # Template stylesheets are identical across CVs, so they are parsed once
+    # per worker and passed in as pre-built CSS objects
+    stylesheets = []
+    cache_hits = 0
+    for attributes, css_text in _STYLE_BLOCK_RE.findall(html):
+        sheet, hit = _get_stylesheet(_block_css(attributes, css_text), base_url)
+        stylesheets.append(sheet)
+        cache_hits += hit
+    document_html = HTML(string=_STYLE_BLOCK_RE.sub("", html), base_url=base_url)
+    timings["render"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    document = document_html.render(stylesheets=stylesheets, font_config=_FONT_CONFIG)
+    timings["layout"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    document.write_pdf(output_path)
+    timings["write"] = time.perf_counter() - start
+
+    return {
+        "output_path": output_path,
+        "pages": len(document.pages),
+        "timings": timings,
+        "css_cache_hits": cache_hits,
+        "worker_pid": os.getpid(),
+    }
+
+
+class PDFExporter:
+    """Pool of warm WeasyPrint workers for HTML-to-PDF conversion.
+
+    Each worker imports WeasyPrint and builds its font configuration once at
+    start-up and keeps parsed template stylesheets between jobs, so only the
+    first CV per template and worker pays for CSS parsing.
+    """
+
+    def __init__(self, max_workers: int = None, base_url: str = None):
+        self.base_url = base_url
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Imported here: pulls in multiprocessing, which render-only callers never need
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+        return self._executor
+
+    def submit(self, html: str, output_path: str, base_url: str = None):
+        """Queue a PDF render; the future resolves to a result dict with stage timings"""
+        return self._get_executor().submit(_render_pdf_job, html, output_path, base_url or self.base_url)
+
+    def export(self, html: str, output_path: str, base_url: str = None) -> Dict:
+        """Render a single document and wait for the result"""
+        return self.submit(html, output_path, base_url).result()
+
+    def export_many(self, jobs: List[tuple]) -> List[Dict]:
+        """Render (html, output_path) pairs in parallel, preserving order"""
+        futures = [self.submit(html, path) for html, path in jobs]
+        return [f.result() for f in futures]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
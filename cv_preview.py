@@ -0,0 +1,402 @@
+"""Live preview server for template development.
+
+Usage:
+    python cv_preview.py --data my_cv.yaml --port 8000
+    python cv_preview.py --repos https://github.com/user/repo
+
+Open http://localhost:8000/ and edit ``templates/<name>/template.html`` or
+``config.yaml``: only the changed template (and templates that include it) is
+re-rendered and the browser reloads through Server-Sent Events. CV data and
+repo analyses are built once and kept in memory; the ``--data`` file is
+watched too.
+"""
+import os
+import time
+import json
+import errno
+import select
+import struct
+import logging
+import argparse
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Set
+from urllib.parse import unquote, urlparse
+
+from jinja2 import meta
+
+from cv_generator import CVGenerator, sample_cv_data
+from cv_models import CVData, CVValidationError, load_cv_file
+
+logger = logging.getLogger(__name__)
+
+# inotify flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+RELOAD_SCRIPT = """<script>
+(function () {
+  var source = new EventSource("/events?template=%s");
+  source.addEventListener("reload", function () { location.reload(); });
+})();
+</script>"""
+
+
+class FileWatcher:
+    """Report changed files under ``roots`` (recursively) or in ``files`` to ``callback(paths)``.
+
+    Uses inotify through ctypes on Linux and falls back to mtime polling
+    elsewhere. Changes arriving within ``debounce`` seconds (an editor's
+    write + rename) are delivered as one batch.
+    """
+
+    def __init__(self, roots: Iterable[str], callback: Callable[[Set[str]], None], files: Iterable[str] = (),
+                 debounce: float = 0.05, poll_interval: float = 0.5):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.files = {os.path.abspath(f) for f in files}
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.backend = None
+
+    def start(self):
+        libc = self._load_inotify()
+        if libc is not None:
+            self.backend = "inotify"
+            target = lambda: self._run_inotify(libc)
+        else:
+            self.backend = "polling"
+            target = self._run_polling
+        self._thread = threading.Thread(target=target, name="cv-preview-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    @staticmethod
+    def _load_inotify():
+        try:
+            import ctypes
+            import ctypes.util
+
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        except OSError:
+            return None
+        return libc if hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch") else None
+
+    def _run_inotify(self, libc):
+        import ctypes
+
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            logger.warning("inotify không khả dụng (%s), chuyển sang polling", os.strerror(ctypes.get_errno()))
+            self.backend = "polling"
+            return self._run_polling()
+
+        def add_watch(directory, recursive=True):
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK)
+            if wd >= 0:
+                watches[wd] = directory
+                recursive_dirs[wd] = recursive
+
+        watches: Dict[int, str] = {}
+        recursive_dirs: Dict[int, bool] = {}
+        try:
+            for root in self.roots:
+                for directory, _, _ in os.walk(root):
+                    add_watch(directory)
+            for directory in {os.path.dirname(f) for f in self.files}:
+                add_watch(directory, recursive=False)
+
+            pending: Set[str] = set()
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], self.debounce if pending else 0.5)
+                if not readable:
+                    if pending:
+                        self.callback(pending)
+                        pending = set()
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except OSError as e:
+                    if e.errno == errno.EAGAIN:
+                        continue
+                    raise
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                    offset += _EVENT_HEADER.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                    offset += length
+                    directory = watches.get(wd)
+                    if directory is None or not name:
+                        continue
+                    path = os.path.join(directory, name)
+                    if not recursive_dirs[wd]:
+                        if path in self.files:
+                            pending.add(path)
+                        continue
+                    if mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            add_watch(path)
+                        continue
+                    pending.add(path)
+        finally:
+            os.close(fd)
+
+    def _snapshot(self) -> Dict[str, int]:
+        mtimes = {}
+        for root in self.roots:
+            for directory, _, files in os.walk(root):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime_ns
+                    except OSError:
+                        pass
+        for path in self.files:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            changed = {p for p in previous.keys() | current.keys() if previous.get(p) != current.get(p)}
+            previous = current
+            if changed:
+                self.callback(changed)
+
+
+class PreviewState:
+    """In-memory CV data, rendered pages and the template dependency graph"""
+
+    def __init__(self, generator: CVGenerator, cv: CVData, data_path: Optional[str] = None):
+        self.generator = generator
+        self.cv = cv
+        self.data_path = os.path.abspath(data_path) if data_path else None
+        self.templates = sorted(generator.list_available_templates())
+        self.versions: Dict[str, int] = {name: 0 for name in self.templates}
+        self._pages: Dict[str, str] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.changed = threading.Condition()
+        for name in self.templates:
+            self._index_dependencies(name)
+
+    def _index_dependencies(self, template_name: str):
+        """Record every template ``template_name`` includes/extends, directly or transitively"""
+        env = self.generator.env
+        for deps in self._dependents.values():
+            deps.discard(template_name)
+        queue, seen = [f"{template_name}/template.html"], set()
+        while queue:
+            ref = queue.pop()
+            if ref in seen:
+                continue
+            seen.add(ref)
+            try:
+                source, _, _ = env.loader.get_source(env, ref)
+                refs = meta.find_referenced_templates(env.parse(source))
+            except Exception as e:
+                logger.warning("Không đọc được template %s: %s", ref, e)
+                continue
+            for sub in refs:
+                if sub:
+                    self._dependents.setdefault(sub, set()).add(template_name)
+                    queue.append(sub)
+
+    def affected_templates(self, paths: Set[str]) -> Set[str]:
+        """Template names whose output depends on any of ``paths``"""
+        root = os.path.abspath(self.generator.templates_dir)
+        affected: Set[str] = set()
+        for path in paths:
+            rel = os.path.relpath(os.path.abspath(path), root)
+            if rel.startswith(".."):
+                continue
+            ref = rel.replace(os.sep, "/")
+            name = ref.split("/", 1)[0]
+            if "/" in ref and name in self.versions:
+                affected.add(name)
+            affected |= self._dependents.get(ref, set())
+        return affected
+
+    def render(self, template_name: str) -> str:
+        with self._lock:
+            page = self._pages.get(template_name)
+        if page is not None:
+            return page
+        start = time.perf_counter()
+        html_content = self.generator.generate_cv(template_name, self.cv)
+        if not html_content:
+            html_content = f"<h1>Lỗi khi render template {template_name}</h1><p>Xem log của server.</p>"
+        script = RELOAD_SCRIPT % template_name
+        page = html_content.replace("</body>", script + "</body>") if "</body>" in html_content else html_content + script
+        logger.info("Render %s trong %.1f ms", template_name, (time.perf_counter() - start) * 1000)
+        with self._lock:
+            self._pages[template_name] = page
+        return page
+
+    def on_files_changed(self, paths: Set[str]):
+        affected = set()
+        if self.data_path and self.data_path in {os.path.abspath(p) for p in paths}:
+            try:
+                self.cv = load_cv_file(self.data_path)
+                affected = set(self.templates)
+                logger.info("Đã tải lại dữ liệu CV từ %s", self.data_path)
+            except (OSError, CVValidationError) as e:
+                logger.warning("Dữ liệu CV không hợp lệ, giữ bản cũ: %s", e)
+
+        templates_now = sorted(self.generator.list_available_templates())
+        for name in set(templates_now) - set(self.templates):
+            self.versions[name] = 0
+        self.templates = templates_now
+
+        affected |= self.affected_templates(paths)
+        if not affected:
+            return
+        for name in affected:
+            self.generator.invalidate_template(name)
+            self._index_dependencies(name)
+            with self._lock:
+                self._pages.pop(name, None)
+            if name in self.templates:
+                self.render(name)  # re-render now so the reload is served from memory
+        with self.changed:
+            for name in affected:
+                self.versions[name] = self.versions.get(name, 0) + 1
+            self.changed.notify_all()
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    state: PreviewState = None
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        if path == "/":
+            self._send_index()
+        elif path.startswith("/preview/"):
+            name = path[len("/preview/"):].strip("/")
+            if name not in self.state.templates:
+                self.send_error(HTTPStatus.NOT_FOUND, f"Unknown template '{name}'")
+                return
+            self._send(HTTPStatus.OK, self.state.render(name).encode("utf-8"), "text/html; charset=utf-8")
+        elif path == "/events":
+            query = dict(p.split("=", 1) for p in url.query.split("&") if "=" in p)
+            self._stream_events(unquote(query.get("template", "")))
+        elif path == "/data.json":
+            self._send(HTTPStatus.OK, self.state.cv.to_json().encode("utf-8"), "application/json")
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def _send(self, status, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_index(self):
+        items = "".join(f'<li><a href="/preview/{name}">{name}</a></li>' for name in self.state.templates)
+        body = f"<!DOCTYPE html><meta charset='utf-8'><title>CV preview</title><h1>Templates</h1><ul>{items}</ul>"
+        self._send(HTTPStatus.OK, body.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _stream_events(self, template_name: str):
+        """Server-Sent Events: one ``reload`` event each time the template is re-rendered"""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        state = self.state
+        seen = state.versions.get(template_name, 0)
+        try:
+            while True:
+                with state.changed:
+                    state.changed.wait_for(lambda: state.versions.get(template_name, 0) != seen, timeout=15)
+                    version = state.versions.get(template_name, 0)
+                if version != seen:
+                    seen = version
+                    self.wfile.write(f"event: reload\ndata: {json.dumps({'template': template_name, 'version': version})}\n\n".encode())
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def build_cv(data_path: Optional[str], repos: Optional[list]) -> CVData:
+    """CV data for the preview: a data file or the sample, plus analyzed repos (run once)"""
+    cv_data = load_cv_file(data_path).to_dict() if data_path else dict(sample_cv_data)
+    if repos:
+        from cv_system import CVSystem
+
+        system = CVSystem()
+        projects = system._analyze_github_repos(repos)
+        cv_data["projects"] = projects
+        cv_data["skills"] = system._merge_skills_from_repos(cv_data.get("skills") or {}, projects)
+    return CVData.from_dict(cv_data)
+
+
+def serve(generator: CVGenerator, cv: CVData, host: str = "127.0.0.1", port: int = 8000,
+          data_path: Optional[str] = None) -> ThreadingHTTPServer:
+    """Start watching and serving in background threads; returns the running server"""
+    state = PreviewState(generator, cv, data_path)
+    handler = type("BoundPreviewHandler", (PreviewHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    watcher = FileWatcher([generator.templates_dir], state.on_files_changed,
+                          files=[data_path] if data_path else ()).start()
+    server.preview_state = state
+    server.watcher = watcher
+
+    threading.Thread(target=server.serve_forever, name="cv-preview-http", daemon=True).start()
+    logger.info("Preview: http://%s:%d/ (theo dõi file bằng %s)", host, server.server_address[1], watcher.backend)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live preview of CV templates")
+    parser.add_argument("--templates", default="templates", help="templates directory")
+    parser.add_argument("--data", help="CV data file (.yaml/.json); defaults to the sample CV")
+    parser.add_argument("--repos", nargs="*", help="GitHub repos to analyze once and add as projects")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    generator = CVGenerator(args.templates)
+    server = serve(generator, build_cv(args.data, args.repos), args.host, args.port, args.data)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.watcher.stop()
+        server.shutdown()
+        generator.close()
+
+
+if __name__ == "__main__":
+    main()
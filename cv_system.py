@@ -1,31 +1,184 @@
 import os
+import copy
 import json
-from typing import Dict, List, Optional
+import hashlib
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
 from cv_generator import CVGenerator, sample_cv_data
-from get_readme import analyze_repo, GITHUB_TOKEN, GOOGLE_API_KEY
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
+from cv_models import CVData, CVValidationError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cv_metrics import PipelineMetrics, MetricsReport, stage, submit, record_degraded
+from deadline import Deadline, DeadlineExceeded, call_with_deadline, has_budget, use_deadline
+from analysis_store import refresh_repo
+from singleflight import SingleFlight
+from jd_index import JDIndex
+from template_fields import TemplateFields
+import get_readme
+from get_readme import analyze_repo, add_project_description, llm_timeout_arg, scan_portfolio, parse_owner_repo, FRAMEWORK_PATTERNS, FILE_PATTERNS
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+
+# Cache phân tích repo của lần chạy hiện tại (create_cv_with_report hoặc cả một batch)
+_run_repo_cache: contextvars.ContextVar = contextvars.ContextVar("cv_run_repo_cache", default=None)
+
+# Thời gian tối thiểu (giây) còn lại trong ngân sách để bắt đầu gọi LLM tối ưu theo JD,
+# và phần thời gian luôn giữ lại cho bước render
+JD_MIN_SECONDS = 8.0
+JD_RESERVE_SECONDS = 1.0
+
+# Các nhóm skill mặc định khi người dùng chưa khai báo skills
+SKILL_BUCKETS = ("programming_languages", "frontend", "backend", "databases", "tools")
+
+# Category trong FRAMEWORK_PATTERNS/FILE_PATTERNS ánh xạ thẳng sang nhóm skill
+CATEGORY_BUCKETS = {
+    "CSS": "frontend",
+    "Database": "databases",
+}
+
+# Category không phải tên ngôn ngữ lập trình
+NON_LANGUAGE_CATEGORIES = {
+    "CSS", "Mobile", "Database", "DevOps", "Cloud", "Build", "Config", "Deployment", ".NET",
+}
+
+# Alias cho các tech mà category không đủ để phân loại (frontend/backend cùng ngôn ngữ)
+SKILL_ALIASES = {
+    "programming_languages": [
+        "JavaScript", "TypeScript", "Python", "Java", "Go", "Golang", "Rust", "PHP", "Ruby", "Dart",
+        "Kotlin", "Swift", "C", "C++", "C/CPP", "C#", "Scala", "R",
+    ],
+    "frontend": [
+        "React", "Next.js", "Vue.js", "Nuxt.js", "Svelte", "SvelteKit", "Angular", "Astro", "Remix",
+        "Gatsby", "HTML5", "CSS3",
+    ],
+    "backend": [
+        "FastAPI", "Fast API", "Django", "Flask", "Starlette", "Tornado", "Pyramid", "Bottle", "CherryPy",
+        "Express.js", "Node.js", "NestJS", "Koa", "Fastify", "Hapi", "Spring Boot", "Spring Framework",
+        "Laravel", "Symfony", "CodeIgniter", "CakePHP", "Ruby on Rails", "Sinatra", "Gin", "Fiber",
+        "Gorilla Mux", "Echo", "Rocket", "Actix Web", "Axum", "Warp", "ASP.NET Core",
+    ],
+    "databases": [
+        "SQLAlchemy", "Elasticsearch", "Milvus",
+    ],
+}
+
+
+def _build_skill_index() -> Dict[str, str]:
+    """Bảng tech (lowercase) -> nhóm skill, dựng một lần khi import"""
+    index = {}
+    for category, tech in list(FRAMEWORK_PATTERNS.values()) + list(FILE_PATTERNS.values()):
+        bucket = CATEGORY_BUCKETS.get(category)
+        if bucket:
+            index.setdefault(tech.lower(), bucket)
+        for language in category.split("/"):
+            if language not in NON_LANGUAGE_CATEGORIES:
+                index.setdefault(language.lower(), "programming_languages")
+    for bucket, names in SKILL_ALIASES.items():
+        for name in names:
+            index[name.lower()] = bucket
+    return index
+
+
+SKILL_INDEX = _build_skill_index()
+
+
+def repo_key(repo_url: str) -> str:
+    """Khóa owner/repo (lowercase) để nhận ra cùng một repo viết theo nhiều URL khác nhau"""
+    owner, repo = parse_owner_repo(repo_url)
+    return f"{owner}/{repo}".lower()
+
+
+# Các phần CV mà JD optimization được phép điều chỉnh, kèm yêu cầu cho LLM
+JD_SECTIONS = {
+    "summary": "Điều chỉnh summary để highlight các kỹ năng phù hợp với JD",
+    "skills": "Reorder và emphasize skills phù hợp",
+    "projects": "Điều chỉnh project descriptions để align với requirements",
+}
+
+
+def cv_fingerprint(cv_data: Dict, sections: Sequence[str]) -> str:
+    """Khóa của dữ liệu CV đầu vào cho JD optimization
+
+    Bỏ qua summary (sinh ra từ các phần còn lại) và thứ tự skill trong nhóm (đã được
+    xếp theo JD), để các JD gần giống nhau của cùng một CV có cùng khóa.
+    """
+    data = CVData.from_dict(cv_data).to_dict()
+    data.pop("summary", None)
+    data["skills"] = {group: sorted(items) for group, items in data["skills"].items()}
+    payload = json.dumps([data, sorted(sections)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _strip_code_fence(text: str) -> str:
+    """Bỏ khối ```json ... ``` mà LLM hay bọc quanh JSON"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def classify_skill(tech: str) -> str:
+    """Nhóm skill của một tech; tech chưa biết được xếp vào tools"""
+    return SKILL_INDEX.get(tech.lower(), "tools")
 
 class CVSystem:
-    def __init__(self):
+    def __init__(self, analysis_store=None):
         self.cv_generator = CVGenerator()
-        self.github_token = GITHUB_TOKEN
-        self.google_api_key = GOOGLE_API_KEY
+        self.github_token = get_readme.GITHUB_TOKEN
+        self.google_api_key = get_readme.GOOGLE_API_KEY
+        self.last_report: Optional[MetricsReport] = None
+        # LLM cho mô tả project (None = client dùng chung của get_readme)
+        self.description_llm = None
+        # AnalysisStore (analysis_store.py): chỉ phân tích lại repo có nội dung thay đổi
+        self.analysis_store = analysis_store
+        # Single-flight theo owner/repo: các yêu cầu đồng thời cho cùng repo (kể cả từ các
+        # lần chạy khác nhau) dùng chung một lần phân tích. Kết quả chỉ được giữ trong
+        # cache của từng lần chạy (xem repo_cache), để lần chạy sau thấy repo đã cập nhật
+        self.repo_flight = SingleFlight(cache_results=False)
+        # Kết quả JD optimization theo CV, dùng lại cho các JD gần trùng (MinHash/LSH)
+        self.jd_index = JDIndex()
         
-        # Initialize Gemini for JD optimization
-        if self.google_api_key:
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash",
-                temperature=0.3,
-                max_tokens=2000,
-                timeout=30,
-                max_retries=2,
-            )
-        else:
-            self.llm = None
-            print("⚠️ Không tìm thấy Google API key. Chức năng tối ưu theo JD sẽ không khả dụng.")
+        # Gemini cho JD optimization được khởi tạo khi dùng lần đầu (xem property llm)
+        self._llm = _UNSET
+        if not self.google_api_key:
+            logger.warning("Không tìm thấy Google API key. Chức năng tối ưu theo JD sẽ không khả dụng.")
+
+    def close(self):
+        """Giải phóng tài nguyên dùng chung (pool PDF worker của CVGenerator)"""
+        self.cv_generator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def llm(self):
+        """Gemini client cho JD optimization, None nếu không có API key"""
+        if self._llm is _UNSET:
+            if self.google_api_key:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                self._llm = ChatGoogleGenerativeAI(
+                    model="gemini-2.0-flash",
+                    temperature=0.3,
+                    max_tokens=2000,
+                    timeout=30,
+                    max_retries=2,
+                )
+            else:
+                self._llm = None
+        return self._llm
+
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
     
     def create_cv_from_input(
         self, 
@@ -37,7 +190,9 @@ class CVSystem:
         certifications: List[Dict] = None,
         job_description: str = None,
         template: str = "modern",
-        output_path: str = None
+        output_path: str = None,
+        deadline: float | Deadline = None,
+        max_projects: Optional[int] = None
     ) -> str:
         """
         Tạo CV từ thông tin đầu vào của người dùng
@@ -52,8 +207,39 @@ class CVSystem:
             job_description: Mô tả công việc để tối ưu CV
             template: Template CV (minimal, modern, tech)
             output_path: Đường dẫn file output
+            deadline: Tổng thời gian (giây, hoặc Deadline) cho cả lần tạo CV. Mọi request
+                HTTP và lời gọi LLM bị giới hạn theo thời gian còn lại; khi sắp hết, các
+                bước tuỳ chọn chuyển sang phương án rẻ (mô tả fallback, bỏ tối ưu JD)
+            max_projects: Khi có job_description, chỉ giữ lại số dự án này (liên quan nhất
+                tới JD) trước mọi lời gọi LLM; None (mặc định) để giữ tất cả
+
+        Thời gian và số request HTTP của từng bước được lưu trong ``self.last_report``
+        (xem ``MetricsReport.to_dict()`` / ``to_prometheus()``); các bước bị giảm chất
+        lượng do hết thời gian nằm trong ``self.last_report.degraded``.
         """
-        
+        html_content, self.last_report = self.create_cv_with_report(
+            personal_info, github_repos, experience, education, skills,
+            certifications, job_description, template, output_path, deadline, max_projects
+        )
+        return html_content
+
+    def create_cv_with_report(self, personal_info, github_repos=None, experience=None, education=None,
+                              skills=None, certifications=None, job_description=None, template="modern",
+                              output_path=None, deadline=None, max_projects=None):
+        """Như create_cv_from_input nhưng trả về (html, MetricsReport), an toàn khi chạy song song"""
+        metrics = PipelineMetrics()
+        with metrics.activate(), use_deadline(deadline), self.repo_cache():
+            html_content = self._run_pipeline(
+                personal_info, github_repos, experience, education, skills,
+                certifications, job_description, template, output_path, max_projects
+            )
+        report = metrics.report()
+        if report.degraded:
+            logger.warning("Hết ngân sách thời gian, các bước dùng phương án rẻ: %s", ", ".join(report.degraded))
+        return html_content, report
+
+    def _run_pipeline(self, personal_info, github_repos, experience, education, skills,
+                      certifications, job_description, template, output_path, max_projects=None) -> str:
         # 1. Xây dựng dữ liệu CV cơ bản
         cv_data = {
             "personal_info": personal_info,
@@ -64,70 +250,271 @@ class CVSystem:
             "projects": []
         }
         
+        # Các field template thực sự render: bỏ qua những bước tạo ra dữ liệu không dùng đến
+        fields = self._template_fields(template)
+        uses_summary = fields.uses("cv.summary")
+        uses_skills = fields.uses("cv.skills")
+        uses_descriptions = fields.uses("cv.projects[].description")
+
         # 2. Phân tích GitHub repos để tạo projects
-        if github_repos:
-            print("🔍 Đang phân tích GitHub repositories...")
-            projects = self._analyze_github_repos(github_repos)
+        if github_repos and (fields.uses("cv.projects") or uses_skills or uses_summary):
+            if job_description and max_projects is not None and len(github_repos) > max_projects:
+                with stage("project_ranking"):
+                    github_repos = self._select_relevant_repos(github_repos, job_description, max_projects)
+            logger.info("Đang phân tích %d GitHub repositories", len(github_repos))
+            projects = self._analyze_github_repos(
+                github_repos,
+                include_ai_description=uses_descriptions,
+                include_highlights=fields.uses("cv.projects[].highlights"),
+            )
             cv_data["projects"] = projects
             
             # Cập nhật skills từ GitHub repos
-            cv_data["skills"] = self._merge_skills_from_repos(cv_data["skills"], projects)
+            if uses_skills:
+                with stage("skill_merge"):
+                    cv_data["skills"] = self._merge_skills_from_repos(cv_data["skills"], projects)
+                if job_description:
+                    with stage("skill_ranking"):
+                        cv_data["skills"] = self._rank_skills(cv_data["skills"], job_description)
+        elif github_repos:
+            logger.info("Template %s không hiển thị projects/skills/summary, bỏ qua phân tích GitHub", template)
         
         # 3. Tạo summary tự động
-        cv_data["summary"] = self._generate_summary(cv_data, template)
+        if uses_summary:
+            with stage("summary"):
+                cv_data["summary"] = self._generate_summary(cv_data, template)
         
-        # 4. Tối ưu CV theo Job Description (nếu có)
-        if job_description and self.llm:
-            print("🤖 Đang tối ưu CV theo Job Description...")
-            cv_data = self._optimize_for_job_description(cv_data, job_description)
+        # 4. Tối ưu CV theo Job Description (nếu có), chỉ cho các phần template hiển thị
+        sections = [name for name, used in (("summary", uses_summary), ("skills", uses_skills),
+                                            ("projects", uses_descriptions)) if used]
+        cached = None
+        if job_description and sections:
+            with stage("jd_cache"):
+                cached = self._cached_jd_optimization(cv_data, job_description, sections)
+        if cached is not None:
+            cv_data = cached
+        elif job_description and sections and self.llm:
+            if not has_budget(JD_MIN_SECONDS):
+                record_degraded("jd_optimization", "time budget too low for an LLM call")
+                logger.info("Không đủ thời gian, bỏ qua tối ưu theo Job Description")
+            else:
+                logger.info("Đang tối ưu CV theo Job Description")
+                with stage("jd_optimization"):
+                    cv_data = self._optimize_for_job_description(cv_data, job_description, sections)
         
-        # 5. Generate CV
-        print(f"📄 Đang tạo CV với template {template}...")
+        # 5. Kiểm tra cấu trúc dữ liệu trước khi render
+        cv = CVData.from_dict(cv_data)
+
+        # 6. Generate CV
+        logger.info("Đang tạo CV với template %s", template)
         html_content = self.cv_generator.generate_cv(
             template_name=template,
-            cv_data=cv_data,
+            cv_data=cv,
             output_path=output_path
         )
         
         return html_content
     
-    def _analyze_github_repos(self, repo_urls: List[str]) -> List[Dict]:
+    def _template_fields(self, template: str) -> TemplateFields:
+        """Field template sử dụng; coi như dùng tất cả nếu không phân tích được template"""
+        try:
+            return self.cv_generator.template_fields(template)
+        except Exception as e:
+            logger.warning("Không phân tích được template %s: %s", template, e)
+            return TemplateFields.everything()
+
+    def _analyze_github_repos(self, repo_urls: List[str], include_ai_description: bool = True,
+                              include_highlights: bool = True) -> List[Dict]:
         """Phân tích GitHub repos và chuyển đổi thành định dạng projects"""
         projects = []
         
         for repo_url in repo_urls:
             try:
-                print(f"  📊 Phân tích: {repo_url}")
-                analysis = analyze_repo(repo_url, token=self.github_token, include_ai_description=True)
-                
-                # Chuyển đổi sang định dạng project cho CV
-                project = {
-                    "name": analysis["info"]["name"],
-                    "description": analysis.get("ai_description", analysis["info"].get("description", "")),
-                    "tech_stack": analysis["frameworks"][:8],  # Giới hạn số lượng tech
-                    "github_url": repo_url,
-                    "highlights": self._generate_project_highlights(analysis)
-                }
-                
-                # Thêm homepage nếu có
-                if analysis["info"].get("homepage"):
-                    project["live_url"] = analysis["info"]["homepage"]
-                
-                projects.append(project)
+                logger.info("Phân tích: %s", repo_url)
+                analysis = self._analyze_repo(repo_url, include_ai_description)
+                projects.append(self._project_from_analysis(analysis, repo_url, include_highlights))
                 
             except Exception as e:
-                print(f"  ❌ Lỗi khi phân tích {repo_url}: {str(e)}")
+                logger.warning("Lỗi khi phân tích %s: %s", repo_url, e)
+                if isinstance(e, DeadlineExceeded):
+                    record_degraded(f"github_analysis:{repo_key(repo_url)}", str(e))
                 # Thêm project cơ bản nếu không phân tích được
-                repo_name = repo_url.split("/")[-1]
-                projects.append({
-                    "name": repo_name,
-                    "description": f"Dự án {repo_name}",
-                    "tech_stack": [],
-                    "github_url": repo_url,
-                    "highlights": []
-                })
+                projects.append(self._fallback_project(repo_url))
         
         return projects
+
+    def prefetch_repos(self, repo_urls: List[str], max_workers: int = 8,
+                       include_ai_description: bool = True) -> Dict[str, Optional[Exception]]:
+        """Phân tích song song các repo (mỗi owner/repo một lần) và lưu vào cache của lần chạy
+
+        Trả về {repo_key: lỗi hoặc None}; URL không hợp lệ có khóa là chính URL.
+        """
+        unique, errors = {}, {}
+        for url in repo_urls:
+            try:
+                unique.setdefault(repo_key(url), url)
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.warning("URL repo không hợp lệ %s: %s", url, e)
+                errors[url] = e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {submit(pool, self._analyze_repo, url, include_ai_description): key
+                       for key, url in unique.items()}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    errors[futures[future]] = None
+                except Exception as e:
+                    logger.warning("Lỗi khi phân tích %s: %s", unique[futures[future]], e)
+                    errors[futures[future]] = e
+        return errors
+
+    def _select_relevant_repos(self, repo_urls: List[str], job_description: str, k: int) -> List[str]:
+        """k repo liên quan nhất tới JD, theo thứ tự người dùng đã liệt kê
+
+        Chỉ dùng phân tích không có mô tả AI (metadata, topics, frameworks) nên không tốn
+        lời gọi LLM nào cho các repo bị loại.
+        """
+        try:
+            from project_ranker import project_document, top_k
+        except ImportError as e:
+            logger.warning("Không xếp hạng được dự án (%s), giữ tất cả %d repo", e, len(repo_urls))
+            return repo_urls
+
+        self.prefetch_repos(repo_urls, include_ai_description=False)
+        documents = []
+        for url in repo_urls:
+            try:
+                analysis = self._analyze_repo(url, include_ai_description=False)
+            except Exception:
+                analysis = None  # lỗi đã được log khi prefetch; chỉ xếp hạng theo tên repo
+            documents.append(project_document(analysis, name=url.rstrip("/").split("/")[-1]))
+
+        keep = set(top_k(job_description, documents, k))
+        dropped = [url for i, url in enumerate(repo_urls) if i not in keep]
+        logger.warning("Chọn %d/%d dự án liên quan nhất tới JD (max_projects=%d), bỏ qua: %s",
+                       len(keep), len(repo_urls), k, ", ".join(dropped))
+        return [url for i, url in enumerate(repo_urls) if i in keep]
+
+    def _rank_skills(self, skills: Dict, job_description: str) -> Dict:
+        """Đưa các skill JD yêu cầu lên đầu mỗi nhóm"""
+        try:
+            from project_ranker import rank_skills
+        except ImportError:
+            return skills
+        return rank_skills(job_description, skills)
+
+    @contextmanager
+    def repo_cache(self):
+        """Phạm vi một lần chạy: mỗi owner/repo được phân tích một lần, kết quả bỏ đi khi kết thúc
+
+        Lồng nhau thì dùng lại cache bên ngoài (vd. các CV của một batch dùng chung cache
+        của batch). Trả về SingleFlight của lần chạy (stats() cho số lần phân tích).
+        """
+        cache = _run_repo_cache.get()
+        if cache is not None:
+            yield cache
+            return
+        cache = SingleFlight()
+        token = _run_repo_cache.set(cache)
+        try:
+            yield cache
+        finally:
+            _run_repo_cache.reset(token)
+            cache.clear()
+
+    def clear_repo_cache(self):
+        cache = _run_repo_cache.get()
+        if cache is not None:
+            cache.clear()
+
+    def _analyze_repo(self, repo_url: str, include_ai_description: bool = True) -> Dict:
+        """analyze_repo qua single-flight: mỗi owner/repo chỉ được phân tích một lần mỗi lần chạy
+
+        Bản phân tích có mô tả AI cũng dùng được cho yêu cầu không cần mô tả. Ngoài một
+        lần chạy (không có repo_cache) chỉ các lời gọi đồng thời được gộp lại.
+        """
+        key = (repo_key(repo_url), include_ai_description)
+        cache = _run_repo_cache.get()
+        if cache is None:
+            return self.repo_flight.do(key, self._analyze_repo_uncached, repo_url, include_ai_description)
+        if not include_ai_description and cache.has_result((key[0], True)):
+            key = (key[0], True)
+        if include_ai_description and cache.has_result((key[0], False)):
+            # Đã có bản phân tích metadata (vd. khi xếp hạng theo JD): chỉ cần thêm README và mô tả
+            base = cache.do((key[0], False), self._analyze_repo_uncached, repo_url, False)
+            analysis = cache.do(key, self._describe_analysis, base)
+        else:
+            analysis = cache.do(key, self.repo_flight.do, key, self._analyze_repo_uncached, repo_url, key[1])
+        if analysis.get("degraded"):
+            # Bản fallback do hết thời gian chỉ dùng cho lần chạy này, không giữ lại cho lần sau
+            cache.forget(key)
+        return analysis
+
+    def _describe_analysis(self, analysis: Dict) -> Dict:
+        """Bản phân tích metadata cộng mô tả AI, cập nhật vào AnalysisStore nếu có"""
+        analysis = add_project_description(analysis, token=self.github_token, llm=self.description_llm)
+        if self.analysis_store is not None and not analysis.get("degraded"):
+            key = self.analysis_store.key(analysis["owner"], analysis["repo"])
+            stored = self.analysis_store.get(key)
+            if stored is not None:
+                self.analysis_store.put(key, stored["pushed_at"], stored["tree_sha"], analysis)
+        return analysis
+
+    def _analyze_repo_uncached(self, repo_url: str, include_ai_description: bool = True) -> Dict:
+        if self.analysis_store is None:
+            return analyze_repo(repo_url, token=self.github_token, include_ai_description=include_ai_description,
+                                llm=self.description_llm)
+        analysis, status = refresh_repo(repo_url, self.analysis_store, token=self.github_token,
+                                        include_ai_description=include_ai_description, llm=self.description_llm)
+        logger.info("%s: %s", repo_url, status)
+        return analysis
+
+    def iter_portfolio_projects(self, owner: str, max_workers: int = 4, **filters) -> Iterator[Dict]:
+        """Quét toàn bộ repos của một GitHub user/org, trả về projects ngay khi phân tích xong
+
+        Args:
+            owner: Tên user hoặc organization trên GitHub
+            max_workers: Số repo được phân tích song song
+            **filters: min_stars, pushed_after, include_forks, include_archived
+                (lọc trên dữ liệu listing trước khi gọi API cho từng repo)
+        """
+        for repo_url, analysis, error in scan_portfolio(
+            owner, token=self.github_token, max_workers=max_workers, include_ai_description=True,
+            llm=self.description_llm, **filters
+        ):
+            if error is not None:
+                logger.warning("Lỗi khi phân tích %s: %s", repo_url, error)
+                yield self._fallback_project(repo_url)
+            else:
+                yield self._project_from_analysis(analysis, repo_url)
+
+    def _project_from_analysis(self, analysis: Dict, repo_url: str, include_highlights: bool = True) -> Dict:
+        """Chuyển kết quả analyze_repo sang định dạng project cho CV"""
+        project = {
+            "name": analysis["info"]["name"],
+            "description": analysis.get("ai_description", analysis["info"].get("description", "")),
+            "tech_stack": analysis["frameworks"][:8],  # Giới hạn số lượng tech
+            "github_url": repo_url,
+            "highlights": self._generate_project_highlights(analysis) if include_highlights else []
+        }
+        
+        # Thêm homepage nếu có
+        if analysis["info"].get("homepage"):
+            project["live_url"] = analysis["info"]["homepage"]
+        
+        return project
+
+    def _fallback_project(self, repo_url: str) -> Dict:
+        """Project cơ bản khi không phân tích được repo"""
+        repo_name = repo_url.rstrip("/").split("/")[-1]
+        return {
+            "name": repo_name,
+            "description": f"Dự án {repo_name}",
+            "tech_stack": [],
+            "github_url": repo_url,
+            "highlights": []
+        }
     
     def _generate_project_highlights(self, analysis: Dict) -> List[str]:
         """Tạo highlights cho project từ analysis"""
@@ -151,50 +538,26 @@ class CVSystem:
         return highlights[:3]  # Giới hạn 3 highlights
     
     def _merge_skills_from_repos(self, existing_skills: Dict, projects: List[Dict]) -> Dict:
-        """Merge skills từ GitHub repos vào skills hiện có"""
+        """Merge skills từ GitHub repos vào skills hiện có
+
+        Mỗi tech được phân loại bằng tra cứu SKILL_INDEX; các nhóm giữ thứ tự
+        xuất hiện và dùng set để kiểm tra trùng, nên merge tuyến tính theo tổng
+        số tech và kết quả không phụ thuộc thứ tự hash.
+        """
         if not existing_skills:
-            existing_skills = {
-                "programming_languages": [],
-                "frontend": [],
-                "backend": [],
-                "databases": [],
-                "tools": []
-            }
-        
-        # Thu thập tất cả tech từ projects
-        all_tech = []
+            existing_skills = {bucket: [] for bucket in SKILL_BUCKETS}
+
+        # Skill đã có ở bất kỳ nhóm nào (kể cả nhóm tự đặt) thì không thêm lại
+        seen = {skill.lower() for skills in existing_skills.values() for skill in skills}
+
         for project in projects:
-            all_tech.extend(project.get("tech_stack", []))
-        
-        # Phân loại và thêm vào skills
-        for tech in set(all_tech):
-            tech_lower = tech.lower()
-            
-            # Programming languages
-            if any(lang in tech_lower for lang in ['python', 'javascript', 'typescript', 'java', 'go', 'rust', 'php', 'ruby', 'dart']):
-                if tech not in existing_skills["programming_languages"]:
-                    existing_skills["programming_languages"].append(tech)
-            
-            # Frontend
-            elif any(fe in tech_lower for fe in ['react', 'vue', 'angular', 'svelte', 'next', 'nuxt', 'gatsby']):
-                if tech not in existing_skills["frontend"]:
-                    existing_skills["frontend"].append(tech)
-            
-            # Backend
-            elif any(be in tech_lower for be in ['express', 'fastapi', 'django', 'flask', 'spring', 'gin', 'rails']):
-                if tech not in existing_skills["backend"]:
-                    existing_skills["backend"].append(tech)
-            
-            # Databases
-            elif any(db in tech_lower for db in ['mongodb', 'postgresql', 'mysql', 'redis', 'sqlite']):
-                if tech not in existing_skills["databases"]:
-                    existing_skills["databases"].append(tech)
-            
-            # Tools
-            else:
-                if tech not in existing_skills["tools"]:
-                    existing_skills["tools"].append(tech)
-        
+            for tech in project.get("tech_stack", []):
+                key = tech.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                existing_skills.setdefault(classify_skill(tech), []).append(tech)
+
         return existing_skills
     
     def _generate_summary(self, cv_data: Dict, template: str) -> str:
@@ -235,28 +598,52 @@ class CVSystem:
         
         return summary
     
-    def _optimize_for_job_description(self, cv_data: Dict, job_description: str) -> Dict:
-        """Tối ưu CV theo Job Description sử dụng Gemini"""
+    def _cached_jd_optimization(self, cv_data: Dict, job_description: str,
+                                sections: Sequence[str]) -> Optional[Dict]:
+        """CV đã tối ưu cho một JD gần trùng trước đó (cùng dữ liệu CV), hoặc None
+
+        JD gần trùng nhưng không giống hệt thì skills được xếp lại theo JD mới (không gọi LLM).
+        """
+        match = self.jd_index.lookup(cv_fingerprint(cv_data, sections), job_description)
+        if match is None:
+            return None
+        logger.info("Dùng lại kết quả tối ưu của JD gần trùng (độ tương đồng %.2f)", match.similarity)
+        optimized_data = dict(cv_data)
+        optimized_data.update(copy.deepcopy(match.value))
+        if not match.exact and "skills" in optimized_data and "skills" in sections:
+            optimized_data["skills"] = self._rank_skills(optimized_data["skills"], job_description)
+        return optimized_data
+
+    def _optimize_for_job_description(self, cv_data: Dict, job_description: str,
+                                      sections: Sequence[str] = tuple(JD_SECTIONS)) -> Dict:
+        """Tối ưu CV theo Job Description sử dụng Gemini
+
+        ``sections`` giới hạn các phần được tối ưu (summary, skills, projects),
+        thường là các phần template đang dùng có hiển thị. Kết quả thành công được lưu
+        vào ``jd_index`` để dùng lại cho các JD gần trùng.
+        """
         if not self.llm:
             return cv_data
         
-        system_prompt = """Bạn là chuyên gia tối ưu CV. Hãy điều chỉnh CV data để phù hợp hơn với Job Description được cung cấp.
+        requirements = [JD_SECTIONS[name] for name in sections]
+        requirements += [
+            "Giữ nguyên thông tin factual, chỉ điều chỉnh cách diễn đạt",
+            "Return JSON format chính xác như input",
+        ]
+        numbered = "\n".join(f"{i}. {text}" for i, text in enumerate(requirements, 1))
+        system_prompt = f"""Bạn là chuyên gia tối ưu CV. Hãy điều chỉnh CV data để phù hợp hơn với Job Description được cung cấp.
 
 Yêu cầu:
-1. Điều chỉnh summary để highlight các kỹ năng phù hợp với JD
-2. Reorder và emphasize skills phù hợp
-3. Điều chỉnh project descriptions để align với requirements
-4. Giữ nguyên thông tin factual, chỉ điều chỉnh cách diễn đạt
-5. Return JSON format chính xác như input
+{numbered}
 
-Chỉ điều chỉnh: summary, skills order, project descriptions. KHÔNG thay đổi personal_info, experience, education."""
+Chỉ điều chỉnh: {", ".join(sections)}. KHÔNG thay đổi personal_info, experience, education."""
         
         user_prompt = f"""
 Job Description:
 {job_description}
 
 Current CV Data:
-{json.dumps(cv_data, ensure_ascii=False, indent=2)}
+{CVData.from_dict(cv_data).to_json()}
 
 Hãy tối ưu CV data để phù hợp với JD. Return JSON:"""
 
@@ -265,14 +652,32 @@ Hãy tối ưu CV data để phù hợp với JD. Return JSON:"""
                 ("system", system_prompt),
                 ("human", user_prompt)
             ]
-            response = self.llm.invoke(messages)
+            response = call_with_deadline(self.llm.invoke, messages, what="jd_optimization",
+                                          reserve=JD_RESERVE_SECONDS, timeout_arg=llm_timeout_arg(self.llm))
             
-            # Parse JSON response
-            optimized_data = json.loads(response.content.strip())
+            # Parse và kiểm tra JSON trả về; chỉ nhận các phần được phép thay đổi
+            optimized = CVData.from_json(_strip_code_fence(response.content))
+            fields = {}
+            if "summary" in sections:
+                fields["summary"] = optimized.summary
+            if "skills" in sections:
+                fields["skills"] = optimized.skills.to_dict()
+            if "projects" in sections:
+                fields["projects"] = [p.to_dict() for p in optimized.projects]
+            self.jd_index.put(cv_fingerprint(cv_data, sections), job_description, fields)
+            optimized_data = dict(cv_data)
+            optimized_data.update(copy.deepcopy(fields))
             return optimized_data
-            
+
+        except CVValidationError as e:
+            logger.warning("LLM trả về CV không hợp lệ, giữ nguyên bản gốc: %s", e)
+            return cv_data
+        except DeadlineExceeded as e:
+            record_degraded("jd_optimization", str(e))
+            logger.warning("Hết thời gian khi tối ưu CV theo JD, giữ nguyên bản gốc")
+            return cv_data
         except Exception as e:
-            print(f"⚠️ Lỗi khi tối ưu CV theo JD: {str(e)}")
+            logger.warning("Lỗi khi tối ưu CV theo JD: %s", e)
             return cv_data
 
 # Example usage function
@@ -342,7 +747,9 @@ def create_cv_example():
     )
     
     print("✅ CV đã được tạo thành công!")
+    print(cv_system.last_report.to_prometheus())
     return html_content
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     create_cv_example()
@@ -0,0 +1,147 @@
+"""Overall time budget for a pipeline run, shared by every HTTP and LLM call in it.
+
+A :class:`Deadline` is activated around a run with :func:`use_deadline`. Code
+underneath reads it through a context variable, which ``cv_metrics.submit``
+carries into worker threads.
+- HTTP timeouts are capped with :func:`remaining_timeout`.
+- Blocking calls that take no timeout (LLM clients) go through
+  :func:`call_with_deadline`. Clients that take a per-request timeout get the
+  remaining time through ``timeout_arg``, so they stop on their own. Other
+  calls keep running in the background after the deadline. At most
+  MAX_ABANDONED_CALLS of those may be running at once; beyond that, new calls
+  fail fast with DeadlineExceeded.
+- Optional steps ask :func:`has_budget` before starting, and take their cheap
+  fallback when the answer is no.
+
+Without an active deadline, every helper behaves as if time were unlimited.
+"""
+import time
+import threading
+import contextvars
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Optional
+
+_active_deadline: contextvars.ContextVar = contextvars.ContextVar("cv_active_deadline", default=None)
+
+# Calls past their deadline that are still running in their (daemon) threads
+MAX_ABANDONED_CALLS = 8
+_abandoned = 0
+_abandoned_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run's time budget ran out before the operation finished"""
+
+
+class Deadline:
+    """A point in (monotonic) time by which the run must finish"""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, what: str = "operation"):
+        if self.expired:
+            raise DeadlineExceeded(f"{what}: time budget of {self.budget}s exhausted")
+
+    def timeout(self, default: float | None = None, what: str = "operation") -> float:
+        """``default`` capped at the remaining time; raises if nothing is left"""
+        self.check(what)
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _active_deadline.get()
+
+
+@contextmanager
+def use_deadline(deadline: "Deadline | float | None"):
+    """Make ``deadline`` (a Deadline or a budget in seconds) active for the block"""
+    if deadline is not None and not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    token = _active_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _active_deadline.reset(token)
+
+
+def remaining_timeout(default: float | None, what: str = "request") -> float | None:
+    """Timeout for a blocking call: ``default`` capped by the active deadline"""
+    deadline = _active_deadline.get()
+    return default if deadline is None else deadline.timeout(default, what)
+
+
+def has_budget(seconds: float) -> bool:
+    """True if at least ``seconds`` remain (always True without a deadline)"""
+    deadline = _active_deadline.get()
+    return deadline is None or deadline.remaining() >= seconds
+
+
+def abandoned_calls() -> int:
+    """Number of timed-out calls still running in the background"""
+    with _abandoned_lock:
+        return _abandoned
+
+
+def call_with_deadline(fn, *args, what: str = "call", reserve: float = 0.0, timeout_arg: str | None = None,
+                       **kwargs):
+    """Run ``fn`` and wait for it at most until the active deadline, minus ``reserve`` seconds.
+
+    The call runs in a daemon thread. If time runs out, DeadlineExceeded is
+    raised and the thread is abandoned (its result is discarded). ``reserve``
+    keeps time for the steps after this one. With ``timeout_arg``, the time
+    left is also passed to ``fn`` as that keyword, so a client that takes a
+    request timeout gives up by itself instead of running on. Without a
+    deadline, ``fn`` runs inline.
+    """
+    global _abandoned
+
+    deadline = _active_deadline.get()
+    if deadline is None:
+        return fn(*args, **kwargs)
+    remaining = deadline.timeout(None, what) - reserve
+    if remaining <= 0:
+        raise DeadlineExceeded(f"{what}: less than the {reserve}s reserve left")
+    with _abandoned_lock:
+        if _abandoned >= MAX_ABANDONED_CALLS:
+            raise DeadlineExceeded(f"{what}: {_abandoned} timed-out calls are still running")
+    if timeout_arg:
+        kwargs[timeout_arg] = remaining
+
+    future = Future()
+    context = contextvars.copy_context()
+    state = {"done": False, "abandoned": False}
+
+    def run():
+        global _abandoned
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(fn, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with _abandoned_lock:
+                state["done"] = True
+                if state["abandoned"]:
+                    _abandoned -= 1
+
+    threading.Thread(target=run, name=f"deadline-{what}", daemon=True).start()
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeout:
+        with _abandoned_lock:
+            if not state["done"]:
+                state["abandoned"] = True
+                _abandoned += 1
+        raise DeadlineExceeded(f"{what}: no result within the remaining {remaining:.1f}s") from None
@@ -1,14 +1,41 @@
-import re, requests, json
+import re, json, codecs, fnmatch, threading
 from urllib.parse import urlparse
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
 import os
+from cv_metrics import stage, timed, record_http, record_degraded
+from deadline import DeadlineExceeded, call_with_deadline, has_budget, remaining_timeout
+from readme_normalizer import normalize_readme
+
+# requests, langchain and python-dotenv are imported on first use so that
+# importing this module (e.g. from render-only workers) stays cheap.
+# GITHUB_TOKEN / GOOGLE_API_KEY and the base URLs are resolved lazily (after .env is
+# loaded) through __getattr__ below.
+_ENV_VARS = ("GITHUB_TOKEN", "GOOGLE_API_KEY")
+# Base URLs, overridable (in the environment, .env, or by assigning the module attribute)
+# to point the analyzer at a GitHub Enterprise host or a local stand-in
+_URL_DEFAULTS = {
+    "GITHUB_API_URL": "https://api.github.com",
+    "GITHUB_RAW_URL": "https://raw.githubusercontent.com",
+}
+_env_loaded = False
+
+
+def load_env():
+    """Load variables from .env once"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
 
-load_dotenv()
 
-# Load environment variables
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+def __getattr__(name):
+    if name in _ENV_VARS:
+        load_env()
+        return os.getenv(name)
+    if name in _URL_DEFAULTS:
+        load_env()
+        return os.getenv(name, _URL_DEFAULTS[name]).rstrip("/")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 API_HEADERS = {
     "Accept": "application/vnd.github+json",
@@ -16,6 +43,47 @@ API_HEADERS = {
 }
 RAW_HEADERS = {"Accept": "application/vnd.github.raw"}
 
+MANIFEST_FILES = {
+    "package.json", "requirements.txt", "pyproject.toml", "pipfile",
+    "pom.xml", "build.gradle", "build.gradle.kts",
+    "go.mod", "cargo.toml", "composer.json", "gemfile",
+    "pubspec.yaml", "mix.exs",
+}
+
+# Manifests are streamed in chunks and capped at this many bytes; larger ones
+# are skipped (size known up front) or truncated, with a note in the result
+MANIFEST_MAX_BYTES = 1024 * 1024
+MANIFEST_CHUNK_SIZE = 64 * 1024
+
+
+def _base_url(name: str) -> str:
+    """A base URL: the module attribute if one was assigned, else from the environment"""
+    value = globals().get(name)
+    return value if value is not None else __getattr__(name)
+
+
+# Shared LLM client for project descriptions, created on first use
+_description_llm = None
+
+# How project descriptions are written: "llm" (Gemini), "extractive" (offline README
+# summary, see readme_summarizer) or "auto" (llm when a client or API key is available)
+DESCRIPTION_MODES = ("llm", "extractive", "auto")
+# None = CV_DESCRIPTION_MODE from the environment (read after .env is loaded), else "auto"
+_description_mode = None
+
+# Shared HTTP session (connection pool), created on first request
+HTTP_POOL_SIZE = 32
+# Concurrent requests per repository while analyze_repo walks its fetch graph
+ANALYZE_WORKERS = 8
+# An LLM description is not started with less time than this left in the run's budget,
+# and may only wait until DESCRIPTION_RESERVE_SECONDS are left for the rest of the run
+DESCRIPTION_MIN_SECONDS = 3.0
+DESCRIPTION_RESERVE_SECONDS = 2.0
+# README tokens sent in a description prompt (after readme_normalizer strips the noise)
+README_PROMPT_TOKENS = 300
+_session = None
+_session_lock = threading.Lock()
+
 # Expanded framework patterns with more comprehensive detection
 FRAMEWORK_PATTERNS = {
     # Python Web Frameworks
@@ -185,6 +253,44 @@ FILE_PATTERNS = {
     "netlify.toml": ("Deployment", "Netlify"),
 }
 
+# Entries a tree walk never lists or descends into: vendored code, build
+# output, virtualenvs and data dumps. Globs are matched case-insensitively
+# against the entry name and its full path.
+TREE_IGNORE = (
+    "node_modules", "bower_components", "vendor", "third_party", "dist", "build",
+    ".venv", "venv", "__pycache__", ".tox", "*.egg-info", ".next", ".nuxt",
+    "coverage", "data", "dataset", "datasets",
+)
+# Hard cap on listed entries per repository
+TREE_MAX_ITEMS = 2000
+
+_MAX_PATTERN_LEN = max(len(pattern) for pattern in FRAMEWORK_PATTERNS)
+
+
+def get_session():
+    """Shared requests.Session so connections to GitHub are pooled across calls and threads"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _http_get(url: str, headers: dict, endpoint: str, timeout: int = 20):
+    """GET a GitHub URL, recording the request under the ``github.<endpoint>`` stage"""
+    with stage(f"github.{endpoint}"):
+        r = get_session().get(url, headers=headers, timeout=remaining_timeout(timeout, f"github.{endpoint}"))
+        record_http(len(r.content))
+        return r
+
 
 def parse_owner_repo(repo_url: str):
     u = urlparse(repo_url)
@@ -198,7 +304,7 @@ def parse_owner_repo(repo_url: str):
 def get_default_branch(owner, repo, token: str | None = None):
     headers = API_HEADERS.copy()
     if token: headers["Authorization"] = f"Bearer {token}"
-    r = requests.get(f"https://api.github.com/repos/{owner}/{repo}", headers=headers, timeout=20)
+    r = _http_get(f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}", headers, "repo")
     r.raise_for_status()
     return r.json().get("default_branch", "main")
 
@@ -206,19 +312,41 @@ def get_default_branch(owner, repo, token: str | None = None):
 def get_languages(owner, repo, token: str | None = None):
     headers = API_HEADERS.copy()
     if token: headers["Authorization"] = f"Bearer {token}"
-    r = requests.get(f"https://api.github.com/repos/{owner}/{repo}/languages", headers=headers, timeout=20)
+    r = _http_get(f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}/languages", headers, "languages")
     r.raise_for_status()
-    data = r.json()
+    return language_summary(r.json())
+
+
+def language_summary(data: dict):
+    """Turn ``{language: bytes}`` into the bytes/percent/primary structure used in analyses"""
     total = sum(data.values()) or 1
     pct = {k: round(v * 100 / total, 2) for k, v in sorted(data.items(), key=lambda x: -x[1])}
     primary = next(iter(pct)) if pct else None
     return {"bytes": data, "percent": pct, "primary": primary}
 
 
+def get_repo_data(owner, repo, token: str | None = None):
+    """Get the raw GitHub repository object (one request; includes pushed_at and default_branch)"""
+    headers = API_HEADERS.copy()
+    if token: headers["Authorization"] = f"Bearer {token}"
+    r = _http_get(f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}", headers, "repo_info")
+    r.raise_for_status()
+    return r.json()
+
+
+def get_tree_sha(owner, repo, ref: str, token: str | None = None):
+    """Get the SHA of the root tree at ``ref``; equal SHAs mean identical content"""
+    headers = API_HEADERS.copy()
+    if token: headers["Authorization"] = f"Bearer {token}"
+    r = _http_get(f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}/commits/{ref}", headers, "commit")
+    r.raise_for_status()
+    return r.json()["commit"]["tree"]["sha"]
+
+
 def get_topics(owner, repo, token: str | None = None):
     headers = API_HEADERS.copy()
     if token: headers["Authorization"] = f"Bearer {token}"
-    r = requests.get(f"https://api.github.com/repos/{owner}/{repo}/topics", headers=headers, timeout=20)
+    r = _http_get(f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}/topics", headers, "topics")
     if r.status_code == 404:
         return []
     r.raise_for_status()
@@ -227,11 +355,11 @@ def get_topics(owner, repo, token: str | None = None):
 
 def get_repo_info(owner, repo, token: str | None = None):
     """Get basic repository information including description"""
-    headers = API_HEADERS.copy()
-    if token: headers["Authorization"] = f"Bearer {token}"
-    r = requests.get(f"https://api.github.com/repos/{owner}/{repo}", headers=headers, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    return repo_info_from_data(get_repo_data(owner, repo, token))
+
+
+def repo_info_from_data(data: dict):
+    """Extract the fields used by the analysis from a GitHub repository object"""
     return {
         "name": data.get("name", ""),
         "description": data.get("description", ""),
@@ -240,37 +368,131 @@ def get_repo_info(owner, repo, token: str | None = None):
         "forks": data.get("forks_count", 0),
         "language": data.get("language", ""),
         "created_at": data.get("created_at", ""),
-        "updated_at": data.get("updated_at", "")
+        "updated_at": data.get("updated_at", ""),
+        "pushed_at": data.get("pushed_at", ""),
+        "default_branch": data.get("default_branch", ""),
     }
 
 
-def list_contents_recursive(owner, repo, ref: str, path: str = "", token: str | None = None, max_depth: int = 2,
-                            current_depth: int = 0):
-    """Recursively list repository contents with depth limit"""
-    if current_depth >= max_depth:
-        return []
+def _to_github_timestamp(value) -> str:
+    """Normalize a datetime/date/ISO string to GitHub's ``YYYY-MM-DDTHH:MM:SSZ`` form"""
+    from datetime import date, datetime, timezone
 
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%dT00:00:00Z")
+    return str(value)
+
+
+def iter_owner_repos(owner: str, token: str | None = None, min_stars: int = 0, pushed_after=None,
+                     include_forks: bool = False, include_archived: bool = False, per_page: int = 100):
+    """Lazily page through all public repositories of a user or organization.
+
+    Repositories are requested most recently pushed first, so paging stops as
+    soon as ``pushed_after`` is passed. Filters run on the listing data before
+    any per-repository request is made.
+    """
+    headers = API_HEADERS.copy()
+    if token: headers["Authorization"] = f"Bearer {token}"
+    cutoff = _to_github_timestamp(pushed_after) if pushed_after else None
+
+    url = f"{_base_url('GITHUB_API_URL')}/users/{owner}/repos?type=owner&sort=pushed&direction=desc&per_page={per_page}"
+    while url:
+        r = _http_get(url, headers, "owner_repos")
+        r.raise_for_status()
+        for data in r.json():
+            if cutoff and (data.get("pushed_at") or "") < cutoff:
+                return
+            if data.get("fork") and not include_forks:
+                continue
+            if data.get("archived") and not include_archived:
+                continue
+            if data.get("stargazers_count", 0) < min_stars:
+                continue
+            yield data
+        url = r.links.get("next", {}).get("url")
+
+
+class _TreeFilter:
+    """Drop ignored entries and enforce the item cap as listings arrive, before any recursion"""
+
+    def __init__(self, ignore=TREE_IGNORE, max_items: int | None = TREE_MAX_ITEMS):
+        self.ignore = tuple(pattern.lower() for pattern in ignore)
+        # All globs folded into one regex: one match per name/path instead of one per pattern
+        self._ignore_re = re.compile("|".join(fnmatch.translate(p) for p in self.ignore)) if self.ignore else None
+        self.max_items = max_items
+        self.items = 0
+        self.skipped_paths = 0
+        self.skipped_sample = []
+        self.truncated = False
+
+    def is_ignored(self, item: dict) -> bool:
+        if self._ignore_re is None:
+            return False
+        name = item.get("name", "").lower()
+        path = item.get("path", name).lower()
+        return self._ignore_re.match(name) is not None or self._ignore_re.match(path) is not None
+
+    def filter(self, items: list) -> list:
+        kept = []
+        for item in items:
+            if self.is_ignored(item):
+                self.skipped_paths += 1
+                if len(self.skipped_sample) < 20:
+                    self.skipped_sample.append(item.get("path", item.get("name", "")))
+            elif self.max_items is not None and self.items >= self.max_items:
+                self.truncated = True
+            else:
+                self.items += 1
+                kept.append(item)
+        return kept
+
+    def stats(self) -> dict:
+        return {"items": self.items, "skipped_paths": self.skipped_paths,
+                "skipped_sample": self.skipped_sample, "truncated": self.truncated}
+
+
+def _list_dir(owner, repo, ref: str, path: str = "", token: str | None = None):
+    """List one directory of the repository (no recursion); [] if it does not exist"""
     headers = API_HEADERS.copy()
     if token: headers["Authorization"] = f"Bearer {token}"
 
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}?ref={ref}"
-    r = requests.get(url, headers=headers, timeout=20)
+    url = f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}/contents/{path}?ref={ref}"
+    r = _http_get(url, headers, "contents")
     if r.status_code == 404:
         return []
     r.raise_for_status()
+    data = r.json()
+    return data if isinstance(data, list) else [data]
 
-    items = r.json() if isinstance(r.json(), list) else [r.json()]
-    all_items = []
 
-    for item in items:
+def list_contents_recursive(owner, repo, ref: str, path: str = "", token: str | None = None, max_depth: int = 2,
+                            current_depth: int = 0, ignore=(), max_items: int | None = None,
+                            _filter: _TreeFilter | None = None):
+    """Recursively list repository contents with depth limit
+
+    Entries matching an ``ignore`` glob are neither returned nor descended
+    into, and listing stops after ``max_items`` entries.
+    """
+    if current_depth >= max_depth:
+        return []
+    tree_filter = _filter or _TreeFilter(ignore, max_items)
+
+    all_items = []
+    for item in tree_filter.filter(_list_dir(owner, repo, ref, path, token)):
         all_items.append(item)
         if item.get("type") == "dir" and current_depth < max_depth - 1:
-            sub_items = list_contents_recursive(owner, repo, ref, item["path"], token, max_depth, current_depth + 1)
+            sub_items = list_contents_recursive(owner, repo, ref, item["path"], token, max_depth, current_depth + 1,
+                                                _filter=tree_filter)
             all_items.extend(sub_items)
 
     return all_items
 
 
+@timed("readme_fetch")
 def get_readme_content(owner, repo, ref: str, token: str | None = None):
     """Fetch README content"""
     readme_files = ["readme.md", "readme.txt", "readme", "readme.rst"]
@@ -280,14 +502,14 @@ def get_readme_content(owner, repo, ref: str, token: str | None = None):
 
     for readme_name in readme_files:
         try:
-            url = f"https://raw.githubusercontent.com/{owner}/{repo}/{ref}/{readme_name}"
-            r = requests.get(url, headers=headers, timeout=20)
+            url = f"{_base_url('GITHUB_RAW_URL')}/{owner}/{repo}/{ref}/{readme_name}"
+            r = _http_get(url, headers, "readme")
             if r.ok and r.text.strip():
                 return r.text
 
             # Try uppercase
-            url = f"https://raw.githubusercontent.com/{owner}/{repo}/{ref}/{readme_name.upper()}"
-            r = requests.get(url, headers=headers, timeout=20)
+            url = f"{_base_url('GITHUB_RAW_URL')}/{owner}/{repo}/{ref}/{readme_name.upper()}"
+            r = _http_get(url, headers, "readme")
             if r.ok and r.text.strip():
                 return r.text
         except Exception:
@@ -296,23 +518,246 @@ def get_readme_content(owner, repo, ref: str, token: str | None = None):
     return None
 
 
+@timed("readme_fetch")
+def get_readme(owner, repo, token: str | None = None, ref: str | None = None):
+    """Fetch the README GitHub itself picks for the repo (any name/case) in one request.
+
+    Without ``ref`` the default branch is used, so this does not have to wait
+    for the repository metadata.
+    """
+    headers = RAW_HEADERS.copy()
+    if token: headers["Authorization"] = f"Bearer {token}"
+
+    url = f"{_base_url('GITHUB_API_URL')}/repos/{owner}/{repo}/readme"
+    if ref:
+        url += f"?ref={ref}"
+    try:
+        r = _http_get(url, headers, "readme")
+    except Exception:
+        return None
+    return r.text if r.ok and r.text.strip() else None
+
+
 def fetch_raw(download_url: str, token: str | None = None) -> str | None:
     headers = RAW_HEADERS.copy()
     if token: headers["Authorization"] = f"Bearer {token}"
     try:
-        rr = requests.get(download_url, headers=headers, timeout=20)
+        rr = _http_get(download_url, headers, "raw")
         return rr.text if rr.ok else None
     except Exception:
         return None
 
 
-def detect_frameworks(owner, repo, token: str | None = None):
-    ref = get_default_branch(owner, repo, token)
-    items = list_contents_recursive(owner, repo, ref, "", token, max_depth=3)
+class ManifestScanner:
+    """Incrementally match FRAMEWORK_PATTERNS against a manifest fed in chunks.
+
+    Each chunk is lowercased on its own and only the last
+    ``len(longest pattern) - 1`` characters are carried over, so patterns that
+    straddle a chunk boundary are still found while memory stays at one chunk.
+    Input beyond ``max_bytes`` is dropped and the scan marked truncated.
+    """
+
+    def __init__(self, name: str, max_bytes: int = None, keep_text: bool = False):
+        self.name = name
+        self.max_bytes = max_bytes if max_bytes is not None else MANIFEST_MAX_BYTES
+        self.matched = set()
+        self.bytes_read = 0
+        self.truncated = False
+        self.skipped_size = None
+        self._tail = ""
+        self._parts = [] if keep_text else None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data: bytes) -> bool:
+        """Scan the next chunk; returns False once the byte ceiling is reached"""
+        remaining = self.max_bytes - self.bytes_read
+        if len(data) > remaining:
+            data = data[:remaining]
+            self.truncated = True
+        self.bytes_read += len(data)
+        self._scan(self._decoder.decode(data, final=self.truncated))
+        return not self.truncated
+
+    def close(self):
+        if not self.truncated:
+            self._scan(self._decoder.decode(b"", final=True))
+
+    def skip(self, size: int):
+        """Mark the manifest as skipped because its known size exceeds the ceiling"""
+        self.skipped_size = size
+
+    @property
+    def text(self) -> str | None:
+        return "".join(self._parts) if self._parts is not None else None
+
+    def _scan(self, text: str):
+        if not text:
+            return
+        if self._parts is not None:
+            self._parts.append(text)
+        window = self._tail + text.lower()
+        for pattern in FRAMEWORK_PATTERNS:
+            if pattern not in self.matched and pattern in window:
+                self.matched.add(pattern)
+        self._tail = window[-(_MAX_PATTERN_LEN - 1):]
+
+
+def scan_manifest(download_url: str, name: str, token: str | None = None, max_bytes: int = None,
+                  chunk_size: int = MANIFEST_CHUNK_SIZE) -> ManifestScanner | None:
+    """Stream a manifest and match it chunk by chunk without holding the whole file"""
+    headers = RAW_HEADERS.copy()
+    if token: headers["Authorization"] = f"Bearer {token}"
+    scanner = ManifestScanner(name, max_bytes, keep_text=name.lower() == "package.json")
+
+    with stage("github.raw"):
+        try:
+            with get_session().get(download_url, headers=headers, timeout=remaining_timeout(20, "github.raw"),
+                                   stream=True) as r:
+                if not r.ok:
+                    return None
+                length = r.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > scanner.max_bytes:
+                    scanner.skip(int(length))
+                    return scanner
+                for chunk in r.iter_content(chunk_size):
+                    if not scanner.feed(chunk):
+                        break
+                scanner.close()
+        except Exception:
+            return None
+        finally:
+            record_http(scanner.bytes_read)
+    return scanner
+
+
+def _add_tech(found: set, evidence: dict, category_summary: dict, category: str, tech: str, reason: str):
+    if tech not in found:
+        found.add(tech)
+        evidence[tech] = reason
+        category_summary[category] = category_summary.get(category, []) + [tech]
+
+
+def _record_manifest(scanner: ManifestScanner, path: str, found: set, evidence: dict, category_summary: dict,
+                     notes: dict):
+    """Merge one manifest scan into the detection result"""
+    if scanner.skipped_size is not None:
+        notes[path] = f"skipped: {scanner.skipped_size} bytes exceeds the {scanner.max_bytes}-byte limit"
+        return
+    suffix = ""
+    if scanner.truncated:
+        notes[path] = f"truncated: only the first {scanner.max_bytes} bytes were scanned"
+        suffix = " (truncated)"
+
+    # JSON parsing for package.json
+    if scanner.name.lower() == "package.json" and scanner.text is not None and not scanner.truncated:
+        try:
+            pkg = json.loads(scanner.text)
+            all_deps = {}
+            all_deps.update(pkg.get("dependencies", {}))
+            all_deps.update(pkg.get("devDependencies", {}))
+            all_deps.update(pkg.get("peerDependencies", {}))
+
+            for dep_name in all_deps.keys():
+                dep_lower = dep_name.lower()
+                for pattern, (category, tech) in FRAMEWORK_PATTERNS.items():
+                    if pattern in dep_lower:
+                        _add_tech(found, evidence, category_summary, category, tech,
+                                  f"{scanner.name}: dependency '{dep_name}'")
+        except Exception:
+            pass
+
+    # Text-based detection for other files
+    for pattern, (category, tech) in FRAMEWORK_PATTERNS.items():
+        if pattern in scanner.matched:
+            _add_tech(found, evidence, category_summary, category, tech,
+                      f"{scanner.name}: contains '{pattern}'{suffix}")
+
+
+def is_manifest(filename: str) -> bool:
+    filename = filename.lower()
+    return filename in MANIFEST_FILES or filename.endswith(".csproj")
+
+
+class _FetchGraph:
+    """Run dependent requests concurrently, each starting as soon as its inputs exist.
+
+    ``start(callback, fn, *args)`` submits ``fn`` to the pool; when it finishes
+    ``callback(result)`` runs on the thread calling :meth:`run`, where it may
+    start further requests. Callbacks never run concurrently, so they can
+    update shared state without locks. The first failure cancels what is
+    still queued and is re-raised.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.pending = {}
+
+    def start(self, callback, fn, *args):
+        from cv_metrics import submit
+
+        self.pending[submit(self.pool, fn, *args)] = callback
+
+    def run(self):
+        from concurrent.futures import wait, FIRST_COMPLETED
+
+        try:
+            while self.pending:
+                done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.pending.pop(future)(future.result())
+        finally:
+            for future in self.pending:
+                future.cancel()
+
+
+def _start_tree_scan(graph: _FetchGraph, owner, repo, ref: str, token: str | None, listings: dict, scanners: dict,
+                     tree_filter: _TreeFilter, max_depth: int = 3, max_manifest_bytes: int = MANIFEST_MAX_BYTES):
+    """Walk the tree directory by directory, starting each manifest download as soon as it is listed
+
+    Ignored directories are pruned before they are requested. Listings arrive
+    concurrently, so with a truncated walk which entries made the cap depends
+    on response order.
+    """
+
+    def store_scan(path):
+        return lambda scanner: scanners.__setitem__(path, scanner)
+
+    def on_listing(path, depth):
+        def callback(items):
+            items = listings[path] = tree_filter.filter(items)
+            for item in items:
+                if item.get("type") == "dir" and depth < max_depth - 1:
+                    graph.start(on_listing(item["path"], depth + 1), _list_dir, owner, repo, ref, item["path"], token)
+                elif (item.get("type") == "file" and is_manifest(item["name"]) and item.get("download_url")
+                      and item.get("size", 0) <= max_manifest_bytes):
+                    graph.start(store_scan(item["path"]), scan_manifest, item["download_url"], item["name"], token,
+                                max_manifest_bytes)
+        return callback
+
+    graph.start(on_listing("", 0), _list_dir, owner, repo, ref, "", token)
+
+
+def _walk_listings(listings: dict, path: str = ""):
+    """Items in the same depth-first order as list_contents_recursive"""
+    for item in listings.get(path, []):
+        yield item
+        if item.get("type") == "dir":
+            yield from _walk_listings(listings, item["path"])
+
+
+def _frameworks_from_tree(listings: dict, scanners: dict, ref: str, tree_filter: _TreeFilter,
+                          max_manifest_bytes: int = MANIFEST_MAX_BYTES):
+    """Build the detect_frameworks result from fetched listings and manifest scans.
+
+    Items are merged in listing order, so the result does not depend on the
+    order in which the concurrent requests finished.
+    """
+    items = list(_walk_listings(listings))
 
     found = set()
     evidence = {}
     category_summary = {}
+    manifest_notes = {}
 
     # Check file patterns first
     for item in items:
@@ -323,86 +768,158 @@ def detect_frameworks(owner, repo, token: str | None = None):
             # Check file patterns
             for pattern, (category, tech) in FILE_PATTERNS.items():
                 if pattern in filename or pattern in filepath:
-                    if tech not in found:
-                        found.add(tech)
-                        evidence[tech] = f"File: {item['path']}"
-                        category_summary[category] = category_summary.get(category, []) + [tech]
+                    _add_tech(found, evidence, category_summary, category, tech, f"File: {item['path']}")
 
     # Check manifest files
-    manifest_files = []
-    for item in items:
-        if item.get("type") == "file":
-            filename = item["name"].lower()
-            if filename in [
-                "package.json", "requirements.txt", "pyproject.toml", "pipfile",
-                "pom.xml", "build.gradle", "build.gradle.kts",
-                "go.mod", "cargo.toml", "composer.json", "gemfile",
-                "pubspec.yaml", "mix.exs"
-            ] or filename.endswith(".csproj"):
-                manifest_files.append(item)
+    manifest_files = [item for item in items if item.get("type") == "file" and is_manifest(item["name"])]
 
     for item in manifest_files:
-        if not item.get("download_url"):
-            continue
-
-        content = fetch_raw(item["download_url"], token)
-        if not content:
-            continue
-
-        content_lower = content.lower()
-
-        # JSON parsing for package.json
-        if item["name"].lower() == "package.json":
-            try:
-                pkg = json.loads(content)
-                all_deps = {}
-                all_deps.update(pkg.get("dependencies", {}))
-                all_deps.update(pkg.get("devDependencies", {}))
-                all_deps.update(pkg.get("peerDependencies", {}))
-
-                for dep_name in all_deps.keys():
-                    dep_lower = dep_name.lower()
-                    for pattern, (category, tech) in FRAMEWORK_PATTERNS.items():
-                        if pattern in dep_lower and tech not in found:
-                            found.add(tech)
-                            evidence[tech] = f"{item['name']}: dependency '{dep_name}'"
-                            category_summary[category] = category_summary.get(category, []) + [tech]
-            except Exception:
-                pass
-
-        # Text-based detection for other files
-        for pattern, (category, tech) in FRAMEWORK_PATTERNS.items():
-            if pattern in content_lower and tech not in found:
-                found.add(tech)
-                evidence[tech] = f"{item['name']}: contains '{pattern}'"
-                category_summary[category] = category_summary.get(category, []) + [tech]
+        # The listing already tells us the size: oversized manifests were never requested
+        if item.get("size", 0) > max_manifest_bytes:
+            scanner = ManifestScanner(item["name"], max_manifest_bytes)
+            scanner.skip(item["size"])
+        else:
+            scanner = scanners.get(item["path"])
+            if scanner is None:
+                continue
+
+        _record_manifest(scanner, item.get("path", item["name"]), found, evidence, category_summary,
+                         manifest_notes)
 
     return {
         "frameworks": sorted(found),
         "evidence": evidence,
         "category_summary": category_summary,
         "ref": ref,
-        "checked_files": [item["name"] for item in manifest_files]
+        "checked_files": [item["name"] for item in manifest_files],
+        "manifest_notes": manifest_notes,
+        "tree_stats": tree_filter.stats(),
     }
 
 
-def generate_project_description(readme_content: str, repo_info: dict, frameworks: list, languages: dict, topics: list):
-    """Use LLM to generate project description based on README and detected technologies"""
+@timed("detect_frameworks")
+def detect_frameworks(owner, repo, token: str | None = None, max_manifest_bytes: int = MANIFEST_MAX_BYTES,
+                      ignore=TREE_IGNORE, max_items: int | None = TREE_MAX_ITEMS, deep_scan=False):
+    """Detect frameworks from file patterns and manifests; ``deep_scan`` also samples source imports"""
+    from concurrent.futures import ThreadPoolExecutor
 
-    # Initialize the LLM
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        temperature=0.3,
-        max_tokens=1000,
-        timeout=30,
-        max_retries=2,
-    )
+    ref = get_default_branch(owner, repo, token)
+    listings, scanners = {}, {}
+    tree_filter = _TreeFilter(ignore, max_items)
+    with ThreadPoolExecutor(max_workers=ANALYZE_WORKERS) as pool:
+        graph = _FetchGraph(pool)
+        _start_tree_scan(graph, owner, repo, ref, token, listings, scanners, tree_filter,
+                         max_manifest_bytes=max_manifest_bytes)
+        graph.run()
+    fw_analysis = _frameworks_from_tree(listings, scanners, ref, tree_filter, max_manifest_bytes)
+    return _deep_scan_api(fw_analysis, listings, token, deep_scan)
+
+
+def _deep_scan_api(fw_analysis: dict, listings: dict, token: str | None, mode) -> dict:
+    """Run the source-import deep scan over raw downloads if ``mode`` asks for it"""
+    from source_imports import should_deep_scan, deep_scan, fetch_source, merge_deep_scan
+
+    if not should_deep_scan(mode, fw_analysis):
+        return fw_analysis
+    items = [item for item in _walk_listings(listings) if item.get("download_url")]
+    scan = deep_scan(items, lambda item: fetch_source(item["download_url"], token), read_workers=ANALYZE_WORKERS)
+    return merge_deep_scan(fw_analysis, scan)
+
+
+def get_description_llm():
+    """Return the shared LLM client used for project descriptions"""
+    global _description_llm
+    if _description_llm is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        load_env()
+        _description_llm = ChatGoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            temperature=0.3,
+            max_tokens=1000,
+            timeout=30,
+            max_retries=2,
+        )
+    return _description_llm
+
+
+def llm_timeout_arg(llm) -> str | None:
+    """Keyword through which ``llm.invoke`` takes a per-request timeout, if known
+
+    ChatGoogleGenerativeAI passes invoke keywords on to ``generate_content``,
+    which takes ``timeout``; other clients get no extra keyword.
+    """
+    return "timeout" if type(llm).__name__ == "ChatGoogleGenerativeAI" else None
+
+
+def set_description_llm(llm):
+    """Replace the shared description LLM (e.g. with a stand-in for benchmarks)"""
+    global _description_llm
+    _description_llm = llm
+
+
+def set_description_mode(mode: str):
+    """Set the default description mode (one of DESCRIPTION_MODES)"""
+    global _description_mode
+    if mode not in DESCRIPTION_MODES:
+        raise ValueError(f"Unknown description mode: {mode!r}")
+    _description_mode = mode
 
+
+def resolve_description_mode(mode: str | None = None, llm=None) -> str:
+    """"llm" or "extractive" for a call; "auto" picks llm only if a client or GOOGLE_API_KEY exists"""
+    if not mode and not _description_mode:
+        load_env()
+    mode = mode or _description_mode or os.getenv("CV_DESCRIPTION_MODE", "auto")
+    if mode not in DESCRIPTION_MODES:
+        raise ValueError(f"Unknown description mode: {mode!r}")
+    if mode == "auto":
+        load_env()
+        return "llm" if llm is not None or _description_llm is not None or os.getenv("GOOGLE_API_KEY") else "extractive"
+    return mode
+
+
+def generate_project_description(readme_content: str, repo_info: dict, frameworks: list, languages: dict, topics: list,
+                                 llm=None, mode: str | None = None):
+    """Use LLM to generate project description based on README and detected technologies
+
+    ``mode`` overrides the default description mode (see DESCRIPTION_MODES).
+    """
+    return describe_project(readme_content, repo_info, frameworks, languages, topics, llm, mode)[0]
+
+
+def describe_project(readme_content: str, repo_info: dict, frameworks: list, languages: dict, topics: list,
+                     llm=None, mode: str | None = None) -> tuple[str, bool]:
+    """``generate_project_description`` that also tells whether the time budget forced the fallback"""
+    if resolve_description_mode(mode, llm) == "extractive":
+        with stage("extractive_description"):
+            return offline_project_description(readme_content, repo_info, frameworks, languages, topics), False
+    return _llm_project_description(readme_content, repo_info, frameworks, languages, topics, llm)
+
+
+def offline_project_description(readme_content: str | None, repo_info: dict, frameworks: list, languages: dict,
+                                topics: list) -> str:
+    """Description without an LLM: README summary, or the template fallback if it has no prose"""
+    from readme_summarizer import extractive_description
+
+    return (extractive_description(readme_content, repo_info, frameworks, topics)
+            or fallback_project_description(repo_info, frameworks, languages.get("primary", "Unknown")))
+
+
+@timed("llm_description")
+def _llm_project_description(readme_content: str, repo_info: dict, frameworks: list, languages: dict, topics: list,
+                             llm=None) -> tuple[str, bool]:
     # Prepare the context
     tech_stack = ", ".join(frameworks) if frameworks else "Not detected"
     primary_language = languages.get("primary", "Unknown")
     language_breakdown = ", ".join([f"{lang} ({pct}%)" for lang, pct in list(languages.get("percent", {}).items())[:3]])
     topics_str = ", ".join(topics) if topics else "No topics"
+    readme_excerpt = None
+    if readme_content:
+        # Badges, logos and install snippets removed; the most relevant sections within the budget
+        query = [repo_info.get("name"), repo_info.get("description")] + list(topics or []) + list(frameworks or [])
+        with stage("readme_normalize"):
+            readme_excerpt = normalize_readme(readme_content, README_PROMPT_TOKENS, query).text
 
     system_prompt = """Bạn là một chuyên gia phân tích dự án phần mềm. Hãy tạo ra một mô tả ngắn gọn và chuyên nghiệp về dự án dựa trên thông tin được cung cấp. 
 
@@ -423,38 +940,120 @@ Yêu cầu:
     - Topics: {topics_str}
     - Stars: {repo_info.get('stars', 0)}
 
-    README content (trích đoạn đầu):
-    {readme_content[:1000] if readme_content else "Không có README"}
+    README (các phần mô tả dự án):
+    {readme_excerpt or "Không có README"}
 
     Hãy tạo mô tả dự án phù hợp cho CV:
     """
 
+    step = f"llm_description:{repo_info.get('name', 'unknown')}"
+    if not has_budget(DESCRIPTION_MIN_SECONDS):
+        record_degraded(step, "time budget too low for an LLM call")
+        return offline_project_description(readme_content, repo_info, frameworks, languages, topics), True
     try:
         messages = [
             ("system", system_prompt),
             ("human", user_prompt)
         ]
-        response = llm.invoke(messages)
-        return response.content.strip()
+        client = llm or get_description_llm()
+        response = call_with_deadline(client.invoke, messages, what="llm_description",
+                                      reserve=DESCRIPTION_RESERVE_SECONDS, timeout_arg=llm_timeout_arg(client))
+        return response.content.strip(), False
+    except DeadlineExceeded as e:
+        record_degraded(step, str(e))
+        return offline_project_description(readme_content, repo_info, frameworks, languages, topics), True
     except Exception as e:
-        # Fallback description
-        fallback = f"Dự án {repo_info.get('name', 'phần mềm')} được phát triển bằng {primary_language}"
-        if frameworks:
-            fallback += f" sử dụng {frameworks[0]}"
-        if repo_info.get('description'):
-            fallback += f". {repo_info['description']}"
-        return fallback
+        return fallback_project_description(repo_info, frameworks, primary_language), False
 
 
-def analyze_repo(repo_url: str, token: str | None = None, include_ai_description: bool = True):
-    """Complete repository analysis with optional AI-generated description"""
-    owner, repo = parse_owner_repo(repo_url)
+def fallback_project_description(repo_info: dict, frameworks: list, primary_language: str) -> str:
+    """Template description used when the LLM is unavailable or out of time"""
+    fallback = f"Dự án {repo_info.get('name', 'phần mềm')} được phát triển bằng {primary_language}"
+    if frameworks:
+        fallback += f" sử dụng {frameworks[0]}"
+    if repo_info.get('description'):
+        fallback += f". {repo_info['description']}"
+    return fallback
+
+
+@timed("analyze_repo")
+def analyze_repo(repo_url: str, token: str | None = None, include_ai_description: bool = True, llm=None,
+                 repo_data: dict | None = None, ignore=TREE_IGNORE, max_items: int | None = TREE_MAX_ITEMS,
+                 backend: str = "api", deep_scan=False):
+    """Complete repository analysis with optional AI-generated description
 
-    # Get all information
-    repo_info = get_repo_info(owner, repo, token)
-    langs = get_languages(owner, repo, token)
-    topics = get_topics(owner, repo, token)
-    fw_analysis = detect_frameworks(owner, repo, token)
+    ``repo_data`` is a repository object already fetched from a listing
+    endpoint; when given, the repo info (and topics, if present) are taken
+    from it instead of being requested again.
+
+    Requests run as a dependency graph: repo info, languages, topics and the
+    README start at once; the tree walk starts when the default branch is
+    known and each manifest download starts as soon as its directory is
+    listed. Latency is close to the longest chain rather than the sum.
+
+    ``ignore`` globs and ``max_items`` prune the tree walk (see TREE_IGNORE);
+    what was pruned is reported under ``tree_stats``.
+
+    ``deep_scan`` (True, or "auto" for repos without manifests) also detects
+    frameworks from the imports of sampled source files, listed under
+    ``deep_scan`` in the result (see ``source_imports``).
+
+    ``degraded`` is set when the run's time budget (see ``deadline``) forced
+    the fallback description; such results should not be cached.
+
+    ``backend="tarball"`` reads one tarball of the default branch instead of
+    walking the contents API (see ``repo_snapshot.analyze_tarball``);
+    ``backend="local"`` treats ``repo_url`` as a path to a checkout or bare
+    repository on disk (see ``repo_snapshot.analyze_local``).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if backend == "tarball":
+        from repo_snapshot import analyze_tarball
+
+        return analyze_tarball(repo_url, token=token, include_ai_description=include_ai_description, llm=llm,
+                               repo_data=repo_data, ignore=ignore, max_items=max_items, deep_scan=deep_scan)
+    if backend == "local":
+        from repo_snapshot import analyze_local
+
+        return analyze_local(repo_url, include_ai_description=include_ai_description, llm=llm,
+                             ignore=ignore, max_items=max_items, deep_scan=deep_scan)
+    if backend != "api":
+        raise ValueError(f"Unknown analysis backend: {backend!r}")
+
+    owner, repo = parse_owner_repo(repo_url)
+    fetched = {}
+    listings, scanners = {}, {}
+    tree_filter = _TreeFilter(ignore, max_items)
+
+    with ThreadPoolExecutor(max_workers=ANALYZE_WORKERS) as pool:
+        graph = _FetchGraph(pool)
+
+        def store(key):
+            return lambda value: fetched.__setitem__(key, value)
+
+        def on_repo_data(data):
+            fetched["info"] = repo_info_from_data(data)
+            fetched["ref"] = data.get("default_branch") or "main"
+            _start_tree_scan(graph, owner, repo, fetched["ref"], token, listings, scanners, tree_filter)
+
+        # Get all information
+        if repo_data:
+            on_repo_data(repo_data)
+        else:
+            graph.start(on_repo_data, get_repo_data, owner, repo, token)
+        graph.start(store("languages"), get_languages, owner, repo, token)
+        if repo_data and "topics" in repo_data:
+            fetched["topics"] = repo_data["topics"]
+        else:
+            graph.start(store("topics"), get_topics, owner, repo, token)
+        if include_ai_description:
+            graph.start(store("readme"), get_readme, owner, repo, token)
+        graph.run()
+
+    repo_info, langs, topics = fetched["info"], fetched["languages"], fetched["topics"]
+    fw_analysis = _deep_scan_api(_frameworks_from_tree(listings, scanners, fetched["ref"], tree_filter),
+                                 listings, token, deep_scan)
 
     result = {
         "owner": owner,
@@ -466,21 +1065,82 @@ def analyze_repo(repo_url: str, token: str | None = None, include_ai_description
         "framework_categories": fw_analysis["category_summary"],
         "evidence": fw_analysis["evidence"],
         "checked_files": fw_analysis["checked_files"],
+        "manifest_notes": fw_analysis["manifest_notes"],
+        "tree_stats": fw_analysis["tree_stats"],
         "default_branch": fw_analysis["ref"],
     }
+    if "deep_scan" in fw_analysis:
+        result["deep_scan"] = fw_analysis["deep_scan"]
 
     # Add AI-generated description if requested
     if include_ai_description:
-        readme_content = get_readme_content(owner, repo, fw_analysis["ref"], token)
-        ai_description = generate_project_description(
-            readme_content, repo_info, fw_analysis["frameworks"], langs, topics
-        )
-        result["ai_description"] = ai_description
-        result["readme_found"] = readme_content is not None
+        _describe_result(result, fetched["readme"], llm)
+
+    return result
+
 
+def _describe_result(result: dict, readme_content: str | None, llm=None):
+    ai_description, degraded = describe_project(
+        readme_content, result["info"], result["frameworks"], result["languages"], result["topics"], llm=llm
+    )
+    result["ai_description"] = ai_description
+    result["readme_found"] = readme_content is not None
+    if degraded:
+        result["degraded"] = True
+
+
+def add_project_description(analysis: dict, token: str | None = None, llm=None) -> dict:
+    """Copy of an ``include_ai_description=False`` analysis completed with the AI description
+
+    Only the README is fetched; metadata, tree and manifests are reused, so
+    this costs one request plus the description instead of a new analysis.
+    """
+    result = dict(analysis)
+    readme_content = get_readme(analysis["owner"], analysis["repo"], token)
+    _describe_result(result, readme_content, llm)
     return result
 
 
+def scan_portfolio(owner: str, token: str | None = None, max_workers: int = 4, include_ai_description: bool = True,
+                   llm=None, **filters):
+    """Analyze every repository of a user/org that passes ``filters``, streaming results.
+
+    Yields ``(repo_url, analysis, error)`` tuples in completion order. At most
+    ``2 * max_workers`` analyses are in flight and the repository listing is
+    consumed lazily, so memory stays bounded for very large accounts and the
+    first results arrive after the first page. ``filters`` are passed to
+    :func:`iter_owner_repos`.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from cv_metrics import submit
+
+    def analyze(data):
+        return analyze_repo(data["html_url"], token=token, include_ai_description=include_ai_description,
+                            llm=llm, repo_data=data)
+
+    def drain(done):
+        for future in done:
+            url = in_flight.pop(future)
+            try:
+                yield url, future.result(), None
+            except Exception as e:
+                yield url, None, e
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    in_flight = {}
+    try:
+        for data in iter_owner_repos(owner, token, **filters):
+            in_flight[submit(pool, analyze, data)] = data["html_url"]
+            if len(in_flight) >= 2 * max_workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from drain(done)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from drain(done)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 def print_analysis_report(analysis: dict):
     """Print a formatted analysis report"""
     print(f"\nPHÂN TÍCH DỰ ÁN: {analysis['info']['name']}")
@@ -510,6 +1170,14 @@ def print_analysis_report(analysis: dict):
         print(f"\nTOPICS: {', '.join(analysis['topics'])}")
 
     print(f"\nFiles đã kiểm tra: {', '.join(analysis['checked_files'])}")
+    tree_stats = analysis.get("tree_stats")
+    if tree_stats and (tree_stats["skipped_paths"] or tree_stats["truncated"]):
+        print(f"Bỏ qua {tree_stats['skipped_paths']} thư mục/file vendored/build"
+              + (f", dừng sau {tree_stats['items']} mục" if tree_stats["truncated"] else ""))
+    deep = analysis.get("deep_scan")
+    if deep:
+        print(f"Quét import từ {len(deep['sampled_files'])} file mã nguồn ({deep['bytes']} bytes, {deep['seconds']}s)"
+              + (" - hết thời gian, kết quả chưa đầy đủ" if deep["timed_out"] else ""))
 
 
 # Example usage
@@ -518,6 +1186,8 @@ if __name__ == "__main__":
     repo_url = "https://github.com/ultralytics/ultralytics"  # Example
     
     # Check GitHub token
+    load_env()
+    GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
     if GITHUB_TOKEN:
         print("✅ Đã tìm thấy GitHub token - Rate limit: 5000 requests/hour")
     else:
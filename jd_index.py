@@ -0,0 +1,176 @@
+"""Near-duplicate job descriptions, found with MinHash and LSH.
+
+Recruiters post slight variants of the same job description: reworded
+bullets, a different company blurb, a changed salary line. Each JD is
+normalized to lowercase terms (``readme_normalizer.tokenize`` after
+stripping markup) and reduced to word 3-gram shingles. A MinHash signature
+of ``num_perm`` values then estimates the Jaccard similarity between two
+shingle sets. Signatures are split into ``bands`` LSH bands, so a lookup
+compares only the stored JDs that share at least one band, not every JD.
+
+Entries are scoped by a caller-chosen key (for ``CVSystem``, a fingerprint
+of the CV being optimized). A JD only matches JDs stored under the same
+scope.
+"""
+import random
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from readme_normalizer import strip_markup, tokenize
+
+NUM_PERM = 128
+BANDS = 32
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity of shingles above which two JDs count as the same job
+DEFAULT_THRESHOLD = 0.75
+MAX_ENTRIES = 1024
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+@dataclass(frozen=True)
+class Match:
+    value: Any
+    similarity: float   # estimated Jaccard similarity, 1.0 for the same normalized JD
+    exact: bool
+
+
+@dataclass
+class _Entry:
+    scope: Hashable
+    digest: str
+    signature: Tuple[int, ...]
+    value: Any
+
+
+def normalize_jd(text: str) -> List[str]:
+    """JD reduced to lowercase terms: no markup, punctuation, stopwords or case"""
+    return tokenize(strip_markup(text or ""))
+
+
+def shingles(terms: List[str], size: int = SHINGLE_SIZE) -> set:
+    """Hashed word ``size``-grams of ``terms`` (the terms themselves if there are fewer)"""
+    if len(terms) < size:
+        grams = terms
+    else:
+        grams = [" ".join(terms[i:i + size]) for i in range(len(terms) - size + 1)]
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+class JDIndex:
+    """MinHash/LSH index of job descriptions with a value stored per JD, thread-safe.
+
+    ``lookup`` returns the stored value of the most similar JD in the same
+    scope whose estimated similarity is at least ``threshold``. Least
+    recently used entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS,
+                 max_entries: int = MAX_ENTRIES, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[tuple, set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+
+    def signature(self, text: str) -> Tuple[Tuple[int, ...], str]:
+        """(MinHash signature, digest of the normalized JD)"""
+        terms = normalize_jd(text)
+        digest = hashlib.sha1(" ".join(terms).encode("utf-8")).hexdigest()
+        values = shingles(terms) or {0}
+        signature = tuple(min((a * x + b) % _MERSENNE_PRIME for x in values) for a, b in self._perms)
+        return signature, digest
+
+    def _band_keys(self, scope: Hashable, signature: Tuple[int, ...]) -> List[tuple]:
+        return [(scope, band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def similarity(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def lookup(self, scope: Hashable, text: str) -> Optional[Match]:
+        """Stored value of the most similar JD above the threshold in ``scope``, or None"""
+        signature, digest = self.signature(text)
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for key in self._band_keys(scope, signature):
+                candidates.update(self._buckets.get(key, ()))
+            best = None
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                exact = entry.digest == digest
+                score = 1.0 if exact else self.similarity(signature, entry.signature)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (entry_id, score, exact)
+            if best is None:
+                return None
+            entry_id, score, exact = best
+            self._entries.move_to_end(entry_id)
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            return Match(self._entries[entry_id].value, score, exact)
+
+    def put(self, scope: Hashable, text: str, value: Any):
+        """Store ``value`` for the JD ``text`` in ``scope`` (replacing the same normalized JD)"""
+        signature, digest = self.signature(text)
+        keys = self._band_keys(scope, signature)
+        with self._lock:
+            for entry_id in set().union(*(self._buckets.get(key, ()) for key in keys)):
+                if self._entries[entry_id].digest == digest:
+                    self._remove(entry_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(scope, digest, signature, value)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry.scope, entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Lookups, exact and near-duplicate hits, misses and hit rate since creation"""
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            return {
+                "lookups": self.lookups,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.lookups - hits,
+                "hit_rate": hits / self.lookups if self.lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,86 @@
+"""Relevance of projects and skills to a job description, computed locally.
+
+Texts are embedded with a hashing vectorizer (unigrams and bigrams hashed
+into a fixed number of signed buckets, no vocabulary to fit or store). The
+vectors are weighted by sublinear TF and by IDF over the batch. Relevance is
+the cosine similarity to the job description, computed for the whole batch
+as one matrix-vector product. ``CVSystem`` uses this to keep the top-k
+repositories before any LLM call, so prompts and CVs stay focused as
+portfolios grow.
+"""
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from readme_normalizer import tokenize
+
+HASH_DIM = 1 << 14
+# Repeats of each tech_stack/topic entry in a project document: they are the strongest signal
+TECH_WEIGHT = 2
+
+
+def _features(text: str) -> List[str]:
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed(documents: Sequence[str], dim: int = HASH_DIM) -> np.ndarray:
+    """L2-normalized TF-IDF hashing vectors, one row per document (IDF over ``documents``)"""
+    rows, cols, signs = [], [], []
+    for row, text in enumerate(documents):
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            cols.append(h % dim)
+            signs.append(1.0 if h & 0x80000000 else -1.0)
+
+    counts = np.zeros((len(documents), dim), dtype=np.float32)
+    if rows:
+        np.add.at(counts, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+    tf = np.sign(counts) * np.log1p(np.abs(counts))
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + len(documents)) / (1.0 + df)) + 1.0
+    vectors = tf * idf.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def relevance(query: str, documents: Sequence[str], dim: int = HASH_DIM) -> np.ndarray:
+    """Cosine similarity of each document to ``query``"""
+    if not documents:
+        return np.zeros(0, dtype=np.float32)
+    vectors = embed([query, *documents], dim)
+    return vectors[1:] @ vectors[0]
+
+
+def top_k(query: str, documents: Sequence[str], k: int) -> List[int]:
+    """Indices of the ``k`` documents most relevant to ``query``, best first (ties by position)"""
+    scores = relevance(query, documents)
+    order = np.lexsort((np.arange(len(documents)), -scores))
+    return [int(i) for i in order[:k]]
+
+
+def project_document(analysis: Optional[Dict] = None, project: Optional[Dict] = None, name: str = "") -> str:
+    """Text describing a repository for ranking, from its analyze_repo result and/or CV project"""
+    parts = [name]
+    tech = []
+    if analysis:
+        info = analysis.get("info", {})
+        parts += [info.get("name") or "", info.get("description") or "",
+                  analysis.get("languages", {}).get("primary") or ""]
+        tech += list(analysis.get("frameworks", [])) + list(analysis.get("topics", []))
+    if project:
+        parts += [project.get("name") or "", project.get("description") or ""] + list(project.get("highlights", []))
+        tech += list(project.get("tech_stack", []))
+    return " ".join(parts + tech * TECH_WEIGHT)
+
+
+def rank_skills(job_description: str, skills: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Each skill group reordered so skills the job description asks for come first (stable otherwise)"""
+    flat = [(group, skill) for group, items in skills.items() for skill in items]
+    if not flat:
+        return skills
+    scores = relevance(job_description, [skill for _, skill in flat])
+    score_of = {(group, skill): float(s) for (group, skill), s in zip(flat, scores)}
+    return {group: sorted(items, key=lambda skill: -score_of[(group, skill)]) for group, items in skills.items()}
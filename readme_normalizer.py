@@ -0,0 +1,273 @@
+"""README normalization: the most informative prose of a README under a token budget.
+
+READMEs open with logos, badges and install snippets. Sending their first N
+characters to an LLM pays for tokens that carry no signal. The normalizer:
+- strips badges, images, HTML, tables and code;
+- splits what remains into heading sections;
+- keeps the introduction plus the sections that best describe the project
+  (by heading and by overlap with the repo's name, topics and frameworks),
+  in README order, until the token budget is spent.
+
+Results are cached by README hash, so repeated analyses of the same README
+cost nothing. ``readme_summarizer`` uses the same section parsing.
+"""
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_TOKEN_BUDGET = 300
+# Rough size of a token for English/Vietnamese prose; good enough for budgeting
+CHARS_PER_TOKEN = 4
+CACHE_SIZE = 512
+# Sections (other than the introduction) with fewer words are noise ("Star us!", "TBD")
+MIN_SECTION_WORDS = 5
+
+# Section headings that describe the project vs. ones that never help a CV description
+HIGH_SIGNAL_HEADINGS = ("about", "overview", "introduction", "description", "feature", "highlight", "what",
+                        "why", "motivation", "architecture", "how it works", "summary", "project", "demo")
+LOW_SIGNAL_HEADINGS = ("install", "setup", "set up", "requirement", "prerequisite", "license", "contribut",
+                       "citation", "cite", "changelog", "acknowledg", "credit", "faq", "support", "sponsor",
+                       "contents", "toc", "star history", "author", "contact", "todo", "roadmap", "badge")
+
+_CODE_FENCE_RE = re.compile(r"^\s*(```|~~~).*?^\s*\1[^\n]*$", re.M | re.S)
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_HTML_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+_IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)|!\[[^\]]*\]\[[^\]]*\]")
+_BADGE_LINK_RE = re.compile(r"\[\s*\]\([^)]*\)")
+_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_REF_DEF_RE = re.compile(r"^\s*\[[^\]]+\]:\s*\S+.*$", re.M)
+_INLINE_CODE_RE = re.compile(r"`([^`]*)`")
+_EMPHASIS_RE = re.compile(r"(\*\*|__|\*|_)(?=\S)(.+?)(?<=\S)\1")
+_URL_RE = re.compile(r"https?://\S+")
+_HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$|^(\S[^\n]*)\n\s*(=+|-+)\s*$", re.M)
+_LIST_ITEM_RE = re.compile(r"^([-*+]|\d+[.)])\s+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by can for from has have in into is it its of on or that the this to was were will with
+you your we our it's which using use used via also more most than then there these those their they not but all
+""".split())
+
+
+@dataclass(frozen=True)
+class Section:
+    title: str          # "" for the text before the first heading
+    paragraphs: Tuple[str, ...]
+    priority: int       # 0 = never useful, 1 = neutral, 2 = describes the project, 3 = introduction
+
+
+@dataclass(frozen=True)
+class NormalizedReadme:
+    text: str
+    original_tokens: int
+    tokens: int
+    sections: Tuple[str, ...]
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms without stopwords; camelCase and snake/kebab names are split"""
+    text = _CAMEL_RE.sub(" ", text).replace("_", " ").replace("-", " ")
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def strip_markup(text: str) -> str:
+    """Markdown/HTML reduced to prose lines; headings are kept, code, images and badges removed"""
+    text = _CODE_FENCE_RE.sub("\n", text)
+    text = _HTML_COMMENT_RE.sub("", text)
+    text = _IMAGE_RE.sub("", text)
+    text = _BADGE_LINK_RE.sub("", text)
+    text = _HTML_TAG_RE.sub(" ", text)
+    text = _REF_DEF_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _INLINE_CODE_RE.sub(r"\1", text)
+    text = _EMPHASIS_RE.sub(r"\2", text)
+    text = _URL_RE.sub("", text)
+    return text
+
+
+def _paragraphs(text: str) -> List[str]:
+    """Prose paragraphs and list items of stripped text; tables, quotes, shell lines and indented code dropped"""
+    paragraphs = []
+
+    def flush(lines):
+        paragraph = re.sub(r"\s+", " ", " ".join(lines)).strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+        lines.clear()
+
+    for block in re.split(r"\n\s*\n", text):
+        lines = []
+        for line in block.splitlines():
+            stripped = line.strip()
+            if (not stripped or stripped.startswith(("#", "|", ">", "$ ")) or line.startswith(("    ", "\t"))
+                    or set(stripped) <= set("-=*_|: ")):
+                continue
+            item = _LIST_ITEM_RE.match(stripped)
+            if item:  # each list item stands alone, punctuated or not
+                flush(lines)
+                lines.append(stripped[item.end():])
+                flush(lines)
+            else:
+                lines.append(stripped)
+        flush(lines)
+    return paragraphs
+
+
+def _heading_priority(title: str) -> int:
+    lower = title.lower()
+    if any(word in lower for word in LOW_SIGNAL_HEADINGS):
+        return 0
+    if any(word in lower for word in HIGH_SIGNAL_HEADINGS):
+        return 2
+    return 1
+
+
+def readme_sections(text: str, min_section_words: int = MIN_SECTION_WORDS) -> List[Section]:
+    """README split at its headings, each section reduced to prose paragraphs"""
+    stripped = strip_markup(text or "")
+    sections, title, start = [], "", 0
+    for m in _HEADING_RE.finditer(stripped):
+        sections.append((title, stripped[start:m.start()]))
+        title = (m.group(2) if m.group(1) else m.group(3)).strip()
+        start = m.end()
+    sections.append((title, stripped[start:]))
+
+    result = []
+    for i, (title, body) in enumerate(sections):
+        paragraphs = tuple(_paragraphs(body))
+        if not paragraphs:
+            continue
+        # Text before the first heading, or under the title heading, introduces the project
+        intro = not result and (i == 0 or _heading_priority(title) != 0)
+        if not intro and sum(len(p.split()) for p in paragraphs) < min_section_words:
+            continue
+        result.append(Section(title, paragraphs, 3 if intro else _heading_priority(title)))
+    return result
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """``text`` cut at the last sentence (or word) boundary before ``max_chars``"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    ends = [m.start() for m in _SENTENCE_END_RE.finditer(cut)]
+    if ends and ends[-1] > max_chars // 2:
+        return cut[:ends[-1]]
+    return cut.rsplit(" ", 1)[0] + " …"
+
+
+def _fallback(text: str, token_budget: int) -> str:
+    """Prose of every section that can describe the project, short ones included, cut to the budget"""
+    paragraphs = [p for section in readme_sections(text, min_section_words=0) if section.priority
+                  for p in section.paragraphs]
+    return _truncate("\n".join(paragraphs), token_budget * CHARS_PER_TOKEN)
+
+
+def _select(sections: List[Section], token_budget: int, query_terms: Iterable[str]) -> NormalizedReadme:
+    query = set(tokenize(" ".join(query_terms)))
+
+    def score(item):
+        i, section = item
+        words = tokenize(section.title + " " + " ".join(section.paragraphs))
+        overlap = len(query.intersection(words)) / len(query) if query else 0.0
+        return section.priority + overlap, -i
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    chosen = {}
+    for i, section in sorted(enumerate(sections), key=score, reverse=True):
+        if section.priority == 0 or budget_chars <= 0:
+            continue
+        header = f"## {section.title}\n" if section.title else ""
+        body = "\n".join(section.paragraphs)
+        if len(header) + len(body) > budget_chars:
+            if budget_chars - len(header) < 20 * CHARS_PER_TOKEN:
+                continue
+            body = _truncate(body, budget_chars - len(header))
+        chosen[i] = header + body
+        budget_chars -= len(chosen[i]) + 2
+
+    text = "\n\n".join(chosen[i] for i in sorted(chosen))
+    return NormalizedReadme(text=text, original_tokens=0, tokens=estimate_tokens(text),
+                            sections=tuple(sections[i].title for i in sorted(chosen)))
+
+
+class _Cache:
+    """LRU of normalized READMEs keyed by content hash, budget and query, with usage counters"""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._items: "OrderedDict[tuple, NormalizedReadme]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "cache_hits": 0, "original_tokens": 0, "tokens": 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value: NormalizedReadme):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def count(self, value: NormalizedReadme, hit: bool):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["cache_hits"] += hit
+            self.stats["original_tokens"] += value.original_tokens
+            self.stats["tokens"] += value.tokens
+
+
+_cache = _Cache()
+
+
+def normalize_readme(text: str, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                     query_terms: Iterable[str] = ()) -> NormalizedReadme:
+    """The README's most informative prose within ``token_budget`` (cached by README hash)"""
+    query_terms = tuple(t for t in query_terms if t)
+    key = (hashlib.sha1((text or "").encode("utf-8")).hexdigest(), token_budget, query_terms)
+    result = _cache.get(key)
+    hit = result is not None
+    if not hit:
+        selected = _select(readme_sections(text), token_budget, query_terms)
+        if not selected.text:
+            # Nothing passed the section filters (only short sections): keep their prose instead
+            fallback = _fallback(text or "", token_budget)
+            selected = NormalizedReadme(text=fallback, original_tokens=0, tokens=estimate_tokens(fallback),
+                                        sections=())
+        result = NormalizedReadme(text=selected.text, original_tokens=estimate_tokens(text or ""),
+                                  tokens=selected.tokens, sections=selected.sections)
+        _cache.put(key, result)
+    _cache.count(result, hit)
+    return result
+
+
+def normalize_stats() -> Dict[str, int]:
+    """Calls, cache hits and tokens in/out of normalize_readme since start (or reset)"""
+    with _cache._lock:
+        stats = dict(_cache.stats)
+    stats["tokens_saved"] = stats["original_tokens"] - stats["tokens"]
+    return stats
+
+
+def reset_normalizer():
+    """Empty the cache and zero the counters"""
+    global _cache
+    _cache = _Cache(_cache.size)
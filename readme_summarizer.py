@@ -0,0 +1,100 @@
+"""Offline extractive project descriptions from a README.
+
+The README is reduced to prose by ``readme_normalizer`` (no badges, images,
+HTML, code, tables, or install/license sections) and split into sentences.
+The opening paragraphs are scored by TF-IDF cosine similarity against what
+is known about the repo: its name, description, topics and detected
+frameworks. The best 2-3 sentences are
+returned in their original order. There is no network round trip, so a
+description takes milliseconds; ``get_readme`` uses this as the
+``extractive`` description mode.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from readme_normalizer import readme_sections, tokenize
+
+MAX_SENTENCES = 3
+MAX_WORDS = 150
+# Only the opening of a README describes the project; later sections are usage/API docs
+MAX_PARAGRAPHS = 12
+MIN_SENTENCE_WORDS = 5
+MAX_SENTENCE_WORDS = 60
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9À-Ỹ])")
+
+
+def readme_paragraphs(text: str) -> List[str]:
+    """Prose paragraphs of a README in order, without sections that never describe the project"""
+    return [p for section in readme_sections(text) if section.priority for p in section.paragraphs]
+
+
+def _tfidf(tokens: List[str], idf: Dict[str, float]) -> Dict[str, float]:
+    counts = Counter(tokens)
+    vector = {term: (1 + math.log(n)) * idf.get(term, 0.0) for term, n in counts.items()}
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {term: w / norm for term, w in vector.items()} if norm else {}
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(term, 0.0) for term, w in a.items())
+
+
+def summarize_readme(readme: str, query_terms: List[str] = (), max_sentences: int = MAX_SENTENCES,
+                     max_words: int = MAX_WORDS) -> Optional[str]:
+    """The ``max_sentences`` opening sentences most relevant to ``query_terms``, in README order
+
+    Sentences are weighted by TF-IDF cosine similarity to the query (IDF over
+    the README's own sentences) plus a bonus for coming early, since READMEs
+    open with what the project is. Returns None if the README has no prose.
+    """
+    sentences = []
+    for paragraph in readme_paragraphs(readme or "")[:MAX_PARAGRAPHS]:
+        for sentence in _SENTENCE_RE.split(paragraph):
+            n_words = len(sentence.split())
+            if MIN_SENTENCE_WORDS <= n_words <= MAX_SENTENCE_WORDS:
+                sentences.append(sentence.strip())
+    if not sentences:
+        return None
+
+    tokenized = [tokenize(s) for s in sentences]
+    df = Counter(term for tokens in tokenized for term in set(tokens))
+    n = len(sentences)
+    idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+    query = _tfidf(tokenize(" ".join(query_terms)), idf)
+
+    scores = []
+    for i, tokens in enumerate(tokenized):
+        relevance = _cosine(_tfidf(tokens, idf), query) if query else 0.0
+        scores.append((relevance + 1.0 / (1 + i), i))
+
+    chosen, words = [], 0
+    for _, i in sorted(scores, reverse=True):
+        n_words = len(sentences[i].split())
+        if words + n_words > max_words:
+            continue
+        chosen.append(i)
+        words += n_words
+        if len(chosen) >= max_sentences:
+            break
+    return " ".join(sentences[i] for i in sorted(chosen)) or None
+
+
+def extractive_description(readme_content: Optional[str], repo_info: dict, frameworks: list,
+                           topics: list) -> Optional[str]:
+    """2-3 sentence CV description extracted from the README, or None if it has no usable prose"""
+    query = [repo_info.get("name") or "", repo_info.get("description") or ""]
+    query += list(topics or []) + list(frameworks or [])
+    summary = summarize_readme(readme_content or "", query)
+    description = (repo_info.get("description") or "").strip()
+    if summary and description and description.lower().rstrip(".") not in summary.lower():
+        # The repo's one-line description is the author's own summary: lead with it
+        lead = description if description.endswith((".", "!", "?")) else description + "."
+        first = summarize_readme(readme_content or "", query, max_sentences=MAX_SENTENCES - 1,
+                                 max_words=MAX_WORDS - len(lead.split()))
+        return f"{lead} {first}" if first else lead
+    return summary or None
@@ -0,0 +1,509 @@
+"""Analyze a repository from a single snapshot instead of per-file API calls.
+
+``analyze_tarball`` streams a ``.tar.gz`` of the repository (downloaded from
+the GitHub tarball endpoint, or read from a local file) through ``tarfile``
+without extracting it. ``analyze_local`` reads a checkout or bare git
+repository on disk. File patterns, manifests, the README and a language
+breakdown by file extension are all collected in one pass over the tree. The
+result has the same shape as ``get_readme.analyze_repo``.
+"""
+import io
+import os
+import posixpath
+import subprocess
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from cv_metrics import stage, timed, record_http
+from deadline import remaining_timeout
+from source_imports import (
+    DEEP_SCAN_MAX_BYTES, DEEP_SCAN_MAX_FILES, SOURCE_FILE_MAX_BYTES, deep_scan as run_deep_scan, merge_deep_scan,
+    sample_priority, should_deep_scan, source_kind,
+)
+from get_readme import (
+    API_HEADERS, MANIFEST_CHUNK_SIZE, MANIFEST_MAX_BYTES, TREE_IGNORE, TREE_MAX_ITEMS,
+    ManifestScanner, _TreeFilter, _frameworks_from_tree, describe_project, get_repo_data,
+    get_session, get_topics, is_manifest, language_summary, parse_owner_repo, repo_info_from_data,
+)
+import get_readme
+
+# Compressed bytes read from a tarball before the walk stops (result marked truncated)
+TARBALL_MAX_BYTES = 200 * 1024 * 1024
+README_MAX_BYTES = 512 * 1024
+
+# File extension -> language, for the byte breakdown the languages API would return
+EXTENSION_LANGUAGES = {
+    ".py": "Python", ".ipynb": "Jupyter Notebook", ".js": "JavaScript", ".jsx": "JavaScript",
+    ".mjs": "JavaScript", ".cjs": "JavaScript", ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".go": "Go", ".rs": "Rust", ".java": "Java", ".kt": "Kotlin", ".kts": "Kotlin",
+    ".scala": "Scala", ".rb": "Ruby", ".php": "PHP", ".cs": "C#", ".fs": "F#",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".cxx": "C++", ".hpp": "C++",
+    ".swift": "Swift", ".m": "Objective-C", ".dart": "Dart", ".ex": "Elixir", ".exs": "Elixir",
+    ".erl": "Erlang", ".hs": "Haskell", ".lua": "Lua", ".r": "R", ".jl": "Julia",
+    ".sh": "Shell", ".bash": "Shell", ".ps1": "PowerShell", ".html": "HTML", ".htm": "HTML",
+    ".css": "CSS", ".scss": "SCSS", ".sass": "Sass", ".less": "Less", ".vue": "Vue",
+    ".svelte": "Svelte", ".sql": "SQL", ".tf": "HCL",
+}
+
+
+class _LimitedReader:
+    """File-like wrapper that reports EOF after ``limit`` bytes"""
+
+    def __init__(self, raw, limit: int):
+        self.raw = raw
+        self.remaining = limit
+        self.bytes_read = 0
+        self.exhausted = False
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            self.exhausted = True
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        self.bytes_read += len(data)
+        return data
+
+
+def _readme_rank(name: str) -> Optional[tuple]:
+    lower = name.lower()
+    if not lower.startswith("readme"):
+        return None
+    return (not lower.endswith(".md"), lower)
+
+
+def read_manifest(name: str, stream, max_bytes: int = MANIFEST_MAX_BYTES) -> ManifestScanner:
+    """Feed a manifest stream through a ManifestScanner in chunks"""
+    scanner = ManifestScanner(name, max_bytes, keep_text=name.lower() == "package.json")
+    while True:
+        chunk = stream.read(MANIFEST_CHUNK_SIZE)
+        if not chunk or not scanner.feed(chunk):
+            break
+    scanner.close()
+    return scanner
+
+
+class SnapshotScan:
+    """Accumulates one pass over a repository's files.
+
+    ``add_file``/``add_dir`` take repo-relative POSIX paths; ``listings`` and
+    ``scanners`` come out in the same form ``get_readme`` builds from the
+    contents API, so framework detection is shared with the API backend.
+    """
+
+    def __init__(self, ignore=TREE_IGNORE, max_items: int | None = TREE_MAX_ITEMS, max_depth: int = 3,
+                 max_manifest_bytes: int = MANIFEST_MAX_BYTES, keep_source_bytes: int = 0):
+        self.tree_filter = _TreeFilter(ignore, max_items)
+        self.max_depth = max_depth
+        self.max_manifest_bytes = max_manifest_bytes
+        self.listings: Dict[str, list] = {}
+        self.scanners: Dict[str, ManifestScanner] = {}
+        self.language_bytes: Dict[str, int] = {}
+        self.readme: Optional[str] = None
+        self.readme_path: Optional[str] = None
+        self.manifest_paths = []
+        # Source files kept while streaming, for the import deep scan (see source_imports)
+        self.sources: Dict[str, bytes] = {}
+        self.keep_source_bytes = keep_source_bytes
+        self._kept: Dict[str, tuple] = {}
+        self._kept_bytes = 0
+        self._readme_rank = None
+        self._dirs: Dict[str, bool] = {}
+        self._ignored_dirs: Dict[str, bool] = {}
+
+    def _expanded(self, path: str) -> bool:
+        """Whether the walk lists the contents of directory ``path``.
+
+        Mirrors the API walk: a directory shows up in its parent's listing if
+        the parent is expanded and the filter keeps it, and is itself expanded
+        only above ``max_depth``.
+        """
+        if path == "":
+            return True
+        expanded = self._dirs.get(path)
+        if expanded is None:
+            expanded = False
+            parent = posixpath.dirname(path)
+            item = {"name": posixpath.basename(path), "path": path, "type": "dir", "size": 0}
+            if self._expanded(parent) and self.tree_filter.filter([item]):
+                self.listings.setdefault(parent, []).append(item)
+                expanded = path.count("/") <= self.max_depth - 2
+                if expanded:
+                    self.listings.setdefault(path, [])
+            self._dirs[path] = expanded
+        return expanded
+
+    def add_dir(self, path: str):
+        self._expanded(path)
+
+    def add_file(self, path: str, size: int, opener=None) -> bool:
+        """Record a file; returns True if it is part of the walked tree.
+
+        With ``opener`` (returning a readable stream), README and manifest
+        content is read right away, as a streaming source must; otherwise the
+        caller reads ``content_paths`` later and passes them to ``add_content``.
+        """
+        name = posixpath.basename(path)
+        if not self._counts_for_languages(path):
+            return False
+        language = EXTENSION_LANGUAGES.get(posixpath.splitext(name)[1].lower())
+        if language:
+            self.language_bytes[language] = self.language_bytes.get(language, 0) + size
+
+        parent = posixpath.dirname(path)
+        item = {"name": name, "path": path, "type": "file", "size": size}
+        if not self._expanded(parent) or not self.tree_filter.filter([item]):
+            return False
+        self.listings.setdefault(parent, []).append(item)
+
+        rank = _readme_rank(name) if not parent else None
+        if rank is not None and (self._readme_rank is None or rank < self._readme_rank):
+            self.readme_path, self._readme_rank = path, rank
+            if opener is not None:
+                self.add_content(path, opener())
+        elif is_manifest(name) and size <= self.max_manifest_bytes:
+            self.manifest_paths.append(path)
+            if opener is not None:
+                self.add_content(path, opener())
+        elif opener is not None and self.keep_source_bytes and 0 < size <= SOURCE_FILE_MAX_BYTES and source_kind(name):
+            self._keep_source(item, opener)
+        return True
+
+    def _keep_source(self, item: dict, opener):
+        """Keep the best-ranked source files seen so far within the byte and file budget
+
+        A stream cannot be rewound, so lower-ranked files are evicted as better
+        ones arrive; the kept set ends up the same sample the other backends read.
+        """
+        rank = sample_priority(item)
+        while self._kept and (self._kept_bytes + item["size"] > self.keep_source_bytes
+                              or len(self._kept) >= DEEP_SCAN_MAX_FILES):
+            worst = max(self._kept, key=self._kept.get)
+            if self._kept[worst] < rank:
+                return
+            self._kept_bytes -= len(self.sources.pop(worst))
+            del self._kept[worst]
+        if self._kept_bytes + item["size"] > self.keep_source_bytes:
+            return
+        self.sources[item["path"]] = opener().read(item["size"])
+        self._kept[item["path"]] = rank
+        self._kept_bytes += len(self.sources[item["path"]])
+
+    def add_content(self, path: str, stream):
+        """Consume the content of the README or a manifest registered by ``add_file``"""
+        if stream is None:
+            return
+        if path == self.readme_path:
+            self.readme = stream.read(README_MAX_BYTES).decode("utf-8", "replace")
+        else:
+            self.scanners[path] = read_manifest(posixpath.basename(path), stream, self.max_manifest_bytes)
+
+    def is_ignored_dir(self, path: str) -> bool:
+        """True if ``path`` or one of its parents matches an ignore glob (memoized per directory)"""
+        if path == "":
+            return False
+        ignored = self._ignored_dirs.get(path)
+        if ignored is None:
+            ignored = (self.is_ignored_dir(posixpath.dirname(path))
+                       or self.tree_filter.is_ignored({"name": posixpath.basename(path), "path": path}))
+            self._ignored_dirs[path] = ignored
+        return ignored
+
+    def _counts_for_languages(self, path: str) -> bool:
+        """Ignored (vendored/build) paths do not count towards languages either"""
+        if self.is_ignored_dir(posixpath.dirname(path)):
+            return False
+        return not self.tree_filter.is_ignored({"name": posixpath.basename(path), "path": path})
+
+    def finish(self):
+        # The contents API lists entries sorted by path; match it so results are identical
+        for items in self.listings.values():
+            items.sort(key=lambda item: item["path"])
+
+    def languages(self) -> dict:
+        return language_summary(dict(sorted(self.language_bytes.items(), key=lambda x: -x[1])))
+
+
+def scan_tarball(fileobj, scan: SnapshotScan, max_bytes: int = TARBALL_MAX_BYTES) -> Dict:
+    """Stream a gzipped tarball through ``scan`` in one pass; returns read statistics
+
+    The archive is expected to hold one top-level directory (``owner-repo-sha/``
+    on GitHub, stripped from member paths) or ``./``-relative paths.
+    """
+    reader = _LimitedReader(fileobj, max_bytes)
+    truncated = False
+    prefix = None
+    try:
+        with tarfile.open(fileobj=reader, mode="r|gz") as tar:
+            for member in tar:
+                name = member.name
+                if prefix is None:
+                    relative = name.startswith("./") or name == "."
+                    prefix = "" if relative or not member.isdir() else name.rstrip("/") + "/"
+                    if prefix:
+                        continue
+                if name.startswith("./"):
+                    name = name[2:]
+                elif prefix and name.startswith(prefix):
+                    name = name[len(prefix):]
+                name = name.rstrip("/")
+                if not name or name == ".":
+                    continue
+                if member.isdir():
+                    scan.add_dir(name)
+                elif member.isfile():
+                    scan.add_file(name, member.size, lambda m=member: tar.extractfile(m))
+    except (tarfile.TarError, EOFError, OSError):
+        if not reader.exhausted:
+            raise
+        truncated = True
+    scan.finish()
+    return {"bytes_read": reader.bytes_read, "truncated": truncated or reader.exhausted}
+
+
+def _walked_items(scan: SnapshotScan):
+    return [item for items in scan.listings.values() for item in items]
+
+
+def _result(owner: str, repo: str, repo_info: dict, topics: list, scan: SnapshotScan, ref: str, read_stats: dict,
+            include_ai_description: bool, llm, source: str, deep_scan=False, read_source=None) -> Dict:
+    fw_analysis = _frameworks_from_tree(scan.listings, scan.scanners, ref, scan.tree_filter, scan.max_manifest_bytes)
+    if should_deep_scan(deep_scan, fw_analysis):
+        items = _walked_items(scan)
+        if read_source is None:  # streamed snapshot: only the files kept on the way are available
+            items = [item for item in items if item["path"] in scan.sources]
+            read_source = lambda item: scan.sources.get(item["path"])
+        merge_deep_scan(fw_analysis, run_deep_scan(items, read_source))
+    tree_stats = dict(fw_analysis["tree_stats"])
+    if read_stats.get("truncated"):
+        tree_stats["truncated"] = True
+    langs = scan.languages()
+    result = {
+        "owner": owner,
+        "repo": repo,
+        "info": repo_info,
+        "languages": langs,
+        "topics": topics,
+        "frameworks": fw_analysis["frameworks"],
+        "framework_categories": fw_analysis["category_summary"],
+        "evidence": fw_analysis["evidence"],
+        "checked_files": fw_analysis["checked_files"],
+        "manifest_notes": fw_analysis["manifest_notes"],
+        "tree_stats": tree_stats,
+        "default_branch": ref,
+        "source": source,
+    }
+    if "deep_scan" in fw_analysis:
+        result["deep_scan"] = fw_analysis["deep_scan"]
+    if include_ai_description:
+        result["ai_description"], degraded = describe_project(
+            scan.readme, repo_info, fw_analysis["frameworks"], langs, topics, llm=llm
+        )
+        result["readme_found"] = scan.readme is not None
+        if degraded:
+            result["degraded"] = True
+    return result
+
+
+@timed("analyze_tarball")
+def analyze_tarball(repo_url: str, token: str | None = None, include_ai_description: bool = True, llm=None,
+                    repo_data: dict | None = None, tarball_path: str | None = None,
+                    max_bytes: int = TARBALL_MAX_BYTES, ignore=TREE_IGNORE, max_items: int | None = TREE_MAX_ITEMS,
+                    deep_scan=False):
+    """Analyze a repository from one tarball of its default branch.
+
+    With ``tarball_path`` the archive is read from disk and, unless
+    ``repo_data`` is given, no GitHub request is made at all (repo info is
+    derived from the URL). Otherwise the repository object (and topics, if
+    it lacks them) is fetched unless ``repo_data`` is given, and the tarball
+    is streamed from the API. At most ``max_bytes`` compressed bytes are read;
+    a larger archive is analyzed up to that point and ``tree_stats`` is
+    marked truncated.
+
+    With ``deep_scan``, the best-ranked source files (up to
+    DEEP_SCAN_MAX_BYTES) are kept while streaming for the import deep scan.
+    """
+    owner, repo = parse_owner_repo(repo_url)
+    scan = SnapshotScan(ignore, max_items, keep_source_bytes=DEEP_SCAN_MAX_BYTES if deep_scan else 0)
+
+    if tarball_path is not None:
+        data = repo_data or {"name": repo, "full_name": f"{owner}/{repo}"}
+        ref = data.get("default_branch") or ""
+        with open(tarball_path, "rb") as f:
+            read_stats = scan_tarball(f, scan, max_bytes)
+        source = "tarball:local"
+    else:
+        data = repo_data or get_repo_data(owner, repo, token)
+        ref = data.get("default_branch") or "main"
+        headers = API_HEADERS.copy()
+        if token: headers["Authorization"] = f"Bearer {token}"
+        url = f"{get_readme.GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{ref}"
+        with stage("github.tarball"):
+            with get_session().get(url, headers=headers, timeout=remaining_timeout(60, "github.tarball"),
+                                   stream=True) as r:
+                r.raise_for_status()
+                r.raw.decode_content = False  # tarfile does the gunzip itself
+                read_stats = scan_tarball(r.raw, scan, max_bytes)
+            record_http(read_stats["bytes_read"])
+        source = "tarball"
+
+    if "topics" in data or tarball_path is not None:
+        topics = data.get("topics") or []
+    else:
+        topics = get_topics(owner, repo, token)
+    return _result(owner, repo, repo_info_from_data(data), topics, scan, ref, read_stats,
+                   include_ai_description, llm, source, deep_scan)
+
+
+def _walk_checkout(root: str, scan: SnapshotScan):
+    """Feed a working tree to ``scan`` with os.scandir, never descending into ignored directories"""
+    stack = [("", root)]
+    while stack:
+        rel, full = stack.pop()
+        try:
+            entries = os.scandir(full)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                path = f"{rel}/{entry.name}" if rel else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name == ".git":
+                            continue
+                        scan.add_dir(path)
+                        if not scan.is_ignored_dir(path):
+                            stack.append((path, entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        scan.add_file(path, entry.stat(follow_symlinks=False).st_size)
+                except OSError:
+                    continue
+
+
+def _read_checkout_files(root: str, scan: SnapshotScan, max_workers: int):
+    """Read the README and manifests registered during the walk, in parallel"""
+    def read(path):
+        try:
+            with open(os.path.join(root, *path.split("/")), "rb") as f:
+                scan.add_content(path, f)
+        except OSError:
+            pass
+
+    paths = list(scan.manifest_paths) + ([scan.readme_path] if scan.readme_path else [])
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(read, paths))
+
+
+def _read_file(path: str, max_bytes: int = SOURCE_FILE_MAX_BYTES) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read(max_bytes)
+    except OSError:
+        return None
+
+
+def _git(git_dir: str, *args: str, stdin: bytes | None = None) -> bytes:
+    return subprocess.run(["git", f"--git-dir={git_dir}", *args], input=stdin, capture_output=True,
+                          check=True).stdout
+
+
+def _walk_git(git_dir: str, ref: str, scan: SnapshotScan) -> Dict[str, bytes]:
+    """Feed the tree at ``ref`` of a (bare) repository to ``scan``: one ls-tree, one cat-file --batch
+
+    Returns the object ids of the walked files by path.
+    """
+    blobs = {}
+    listing = _git(git_dir, "ls-tree", "-r", "-t", "-l", "-z", "--full-tree", ref)
+    for record in listing.split(b"\0"):
+        if not record:
+            continue
+        meta, raw_path = record.split(b"\t", 1)
+        _, kind, oid, size = meta.split()
+        path = os.fsdecode(raw_path)
+        if kind == b"tree":
+            scan.add_dir(path)
+        elif kind == b"blob" and scan.add_file(path, int(size)):
+            blobs[path] = oid
+
+    wanted = [p for p in scan.manifest_paths + ([scan.readme_path] if scan.readme_path else []) if p in blobs]
+    if not wanted:
+        return blobs
+    out = io.BytesIO(_git(git_dir, "cat-file", "--batch", stdin=b"".join(blobs[p] + b"\n" for p in wanted)))
+    for path in wanted:
+        header = out.readline().split()
+        if len(header) < 3 or header[1] != b"blob":
+            continue
+        content = out.read(int(header[2]))
+        out.read(1)  # trailing newline
+        scan.add_content(path, io.BytesIO(content))
+    return blobs
+
+
+def _git_dir(path: str) -> Optional[str]:
+    """The git directory of a bare repo or checkout at ``path`` (None if it is neither)"""
+    if os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(os.path.join(path, "objects")):
+        return path
+    dot_git = os.path.join(path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    if os.path.isfile(dot_git):  # worktree/submodule: "gitdir: <path>"
+        with open(dot_git, encoding="utf-8") as f:
+            line = f.read().strip()
+        if line.startswith("gitdir:"):
+            return os.path.normpath(os.path.join(path, line[len("gitdir:"):].strip()))
+    return None
+
+
+def _head_branch(git_dir: Optional[str]) -> str:
+    try:
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+    except (OSError, TypeError):
+        return ""
+    return head.removeprefix("ref: refs/heads/") if head.startswith("ref: ") else ""
+
+
+@timed("analyze_local")
+def analyze_local(path: str, include_ai_description: bool = True, llm=None, repo_url: str | None = None,
+                  ref: str | None = None, ignore=TREE_IGNORE, max_items: int | None = TREE_MAX_ITEMS,
+                  max_workers: int = 8, deep_scan=False):
+    """Analyze a repository on disk without any GitHub request.
+
+    ``path`` (or a ``file://`` URL) is either a working tree, walked with
+    os.scandir with manifests read in parallel, or a bare repository, read at
+    ``ref`` (default HEAD) with ``git ls-tree``/``git cat-file --batch``.
+    ``repo_url`` only names the result (owner/repo); by default the owner is
+    ``local`` and the repo is the directory name. ``deep_scan`` reads sampled
+    source files straight from disk (or the object store).
+    """
+    if path.startswith("file://"):
+        path = path[len("file://"):]
+    path = os.path.abspath(path)
+    if not os.path.isdir(path):
+        raise ValueError(f"Không tìm thấy thư mục repository: {path}")
+
+    git_dir = _git_dir(path)
+    bare = git_dir == path
+    if repo_url:
+        owner, repo = parse_owner_repo(repo_url)
+    else:
+        owner, repo = "local", os.path.basename(path).removesuffix(".git")
+
+    scan = SnapshotScan(ignore, max_items)
+    with stage("local_walk"):
+        if bare:
+            blobs = _walk_git(git_dir, ref or "HEAD", scan)
+            read_source = lambda item: _git(git_dir, "cat-file", "blob", blobs[item["path"]].decode())
+        else:
+            _walk_checkout(path, scan)
+            _read_checkout_files(path, scan, max_workers)
+            read_source = lambda item: _read_file(os.path.join(path, *item["path"].split("/")))
+        scan.finish()
+
+    branch = ref or _head_branch(git_dir)
+    data = {"name": repo, "full_name": f"{owner}/{repo}", "default_branch": branch}
+    return _result(owner, repo, repo_info_from_data(data), [], scan, branch, {}, include_ai_description, llm,
+                   "git" if bare else "local", deep_scan, read_source)
@@ -0,0 +1,85 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block and receive the same result (or exception). With
+    ``cache_results`` the successful result is kept and returned to every later
+    caller until :meth:`forget`/:meth:`clear`. Failures are never cached, so a
+    later call retries.
+    """
+
+    def __init__(self, cache_results: bool = True):
+        self.cache_results = cache_results
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+        self.hits = 0
+        self.errors = 0
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                owner = True
+            else:
+                owner = False
+                if call.done.is_set():
+                    self.hits += 1
+                else:
+                    self.shared += 1
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+                self._calls.pop(key, None)
+            raise
+        else:
+            if not self.cache_results:
+                with self._lock:
+                    self._calls.pop(key, None)
+            return call.result
+        finally:
+            call.done.set()
+
+    def has_result(self, key: Hashable) -> bool:
+        """True if a successful result for ``key`` is cached"""
+        with self._lock:
+            call = self._calls.get(key)
+            return call is not None and call.done.is_set() and call.error is None
+
+    def forget(self, key: Hashable):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._calls.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"executions": self.executions, "shared": self.shared, "hits": self.hits, "errors": self.errors}
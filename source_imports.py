@@ -0,0 +1,258 @@
+"""Framework detection from the imports of sampled source files.
+
+Repositories without a manifest (research code, notebooks turned into
+scripts) show no frameworks from ``detect_frameworks``. The deep scan picks a
+sample of ``.py``/``.js``/``.ts``/``.go`` files under a byte budget, extracts
+their imports with regexes in a process pool and maps the imported modules
+through ``FRAMEWORK_PATTERNS``. Everything runs under one latency budget: what
+has not been read or parsed when it runs out is left out and the scan is
+marked timed out.
+"""
+import os
+import re
+import time
+import posixpath
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cv_metrics import stage, record_http
+from deadline import current_deadline, remaining_timeout
+
+SOURCE_EXTENSIONS = {
+    ".py": "python",
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".go": "go",
+}
+DEEP_SCAN_MAX_BYTES = 512 * 1024
+DEEP_SCAN_MAX_FILES = 40
+SOURCE_FILE_MAX_BYTES = 64 * 1024
+DEEP_SCAN_TIMEOUT = 5.0
+# Below this many bytes parsing inline is cheaper than a round trip to the pool
+INLINE_PARSE_BYTES = 64 * 1024
+
+# Import names that differ from the package/pattern name
+IMPORT_ALIASES = {"cv2": "opencv", "pil": "pillow", "skimage": "scikit-image"}
+
+# Likely entry points are sampled first, tests and examples last
+_ENTRY_NAMES = {"main", "app", "index", "server", "train", "model", "models", "run", "cli", "manage", "api"}
+_LOW_SIGNAL_DIRS = {"test", "tests", "__tests__", "spec", "examples", "example", "docs", "scripts"}
+
+_PY_IMPORT_RE = re.compile(r"^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import\b|import[ \t]+([\w., \t]+))", re.M)
+_JS_IMPORT_RE = re.compile(
+    r"""(?:\bimport\s+(?:[\w*{}\s,]+?\s+from\s+)?|\bexport\s+[\w*{}\s,]+?\s+from\s+|"""
+    r"""\brequire\s*\(\s*|\bimport\s*\(\s*)["']([^"'\n]+)["']"""
+)
+_GO_IMPORT_RE = re.compile(r'^\s*import\s+(?:[\w.]+\s+)?"([^"]+)"|^\s*import\s*\(([^)]*)\)', re.M)
+_GO_BLOCK_RE = re.compile(r'"([^"]+)"')
+
+_pool = None
+_pool_workers = 0
+
+
+def extract_imports(text: str, kind: str) -> List[str]:
+    """Imported module names of one source file (``kind`` as in SOURCE_EXTENSIONS)"""
+    found = []
+    if kind == "python":
+        for m in _PY_IMPORT_RE.finditer(text):
+            if m.group(1):
+                found.append(m.group(1))
+            else:
+                found.extend(part.split()[0] for part in m.group(2).split(",") if part.strip())
+    elif kind == "js":
+        found.extend(m.group(1) for m in _JS_IMPORT_RE.finditer(text))
+    elif kind == "go":
+        for m in _GO_IMPORT_RE.finditer(text):
+            if m.group(1):
+                found.append(m.group(1))
+            else:
+                found.extend(_GO_BLOCK_RE.findall(m.group(2)))
+    # Relative imports say nothing about frameworks
+    return [name for name in dict.fromkeys(found) if not name.startswith(".")]
+
+
+def _extract_batch(batch: List[tuple]) -> Dict[str, List[str]]:
+    """Worker entry point: ``(path, kind, bytes)`` tuples -> imports per path"""
+    return {path: extract_imports(data.decode("utf-8", "replace"), kind) for path, kind, data in batch}
+
+
+def source_kind(path: str) -> Optional[str]:
+    return SOURCE_EXTENSIONS.get(posixpath.splitext(path)[1].lower())
+
+
+def sample_priority(item: dict) -> tuple:
+    """Sort key of a source file for sampling (lower is read first)"""
+    path = item["path"]
+    parts = path.lower().split("/")
+    stem = posixpath.splitext(parts[-1])[0]
+    low_signal = any(part in _LOW_SIGNAL_DIRS for part in parts[:-1]) or stem.startswith("test")
+    return low_signal, len(parts), stem not in _ENTRY_NAMES, item.get("size", 0), path
+
+
+def sample_source_files(items: Iterable[dict], max_bytes: int = DEEP_SCAN_MAX_BYTES,
+                        max_files: int = DEEP_SCAN_MAX_FILES) -> List[dict]:
+    """Pick the source files worth reading, within ``max_bytes`` and ``max_files``
+
+    Shallow files and likely entry points come first; tests, examples and
+    files over SOURCE_FILE_MAX_BYTES (usually generated or minified) last or
+    not at all.
+    """
+    candidates = [item for item in items if item.get("type") == "file" and source_kind(item["path"])
+                  and 0 < item.get("size", 0) <= SOURCE_FILE_MAX_BYTES]
+    sample, total = [], 0
+    for item in sorted(candidates, key=sample_priority):
+        if len(sample) >= max_files:
+            break
+        if total + item["size"] > max_bytes:
+            continue
+        sample.append(item)
+        total += item["size"]
+    return sample
+
+
+def _get_pool(max_workers: int | None = None):
+    """Warm process pool shared by all deep scans
+
+    Workers are spawned rather than forked: callers run thread pools (repo
+    prefetch, deadline threads), and forking a threaded process can deadlock.
+    """
+    global _pool, _pool_workers
+    if _pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        _pool_workers = max_workers or min(4, os.cpu_count() or 1)
+        _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def parse_sources(sources: List[tuple], timeout: float | None = None, max_workers: int | None = None):
+    """Extract imports of ``(path, kind, bytes)`` sources; returns (imports per path, timed_out)"""
+    if sum(len(data) for _, _, data in sources) <= INLINE_PARSE_BYTES:
+        return _extract_batch(sources), False
+
+    from concurrent.futures import wait
+
+    pool = _get_pool(max_workers)
+    n_batches = min(len(sources), 2 * _pool_workers)
+    futures = [pool.submit(_extract_batch, sources[i::n_batches]) for i in range(n_batches)]
+    done, not_done = wait(futures, timeout=timeout)
+    for future in not_done:
+        future.cancel()
+    imports = {}
+    for future in done:
+        imports.update(future.result())
+    return imports, bool(not_done)
+
+
+def match_import(module: str):
+    """``(category, tech)`` a module name maps to through FRAMEWORK_PATTERNS, or None"""
+    from get_readme import FRAMEWORK_PATTERNS
+
+    name = module.lower()
+    if "/" in name and "." in name.split("/", 1)[0]:  # Go module path, matched by prefix
+        for pattern, target in FRAMEWORK_PATTERNS.items():
+            if "/" in pattern and (name == pattern or name.startswith(pattern + "/")):
+                return target
+        return None
+    if name in FRAMEWORK_PATTERNS:
+        return FRAMEWORK_PATTERNS[name]
+    root = re.split(r"[./]", name.lstrip("@"), 1)[0]
+    root = IMPORT_ALIASES.get(root, root)
+    for candidate in (root, root[:-2] if root.endswith("js") else None):
+        if candidate and candidate in FRAMEWORK_PATTERNS:
+            return FRAMEWORK_PATTERNS[candidate]
+    return None
+
+
+def fetch_source(download_url: str, token: str | None = None,
+                 max_bytes: int = SOURCE_FILE_MAX_BYTES) -> bytes | None:
+    """Download at most ``max_bytes`` of a source file from the raw endpoint"""
+    from get_readme import RAW_HEADERS, get_session
+
+    headers = RAW_HEADERS.copy()
+    if token: headers["Authorization"] = f"Bearer {token}"
+    with stage("github.raw"):
+        try:
+            with get_session().get(download_url, headers=headers, timeout=remaining_timeout(10, "github.raw"),
+                                   stream=True) as r:
+                if not r.ok:
+                    return None
+                data = r.raw.read(max_bytes, decode_content=True)
+        except Exception:
+            return None
+        record_http(len(data))
+    return data
+
+
+def deep_scan(items: Iterable[dict], read: Callable[[dict], Optional[bytes]], timeout: float = DEEP_SCAN_TIMEOUT,
+              max_bytes: int = DEEP_SCAN_MAX_BYTES, max_files: int = DEEP_SCAN_MAX_FILES,
+              read_workers: int = 8) -> Dict:
+    """Sample source files from ``items``, read them with ``read(item)`` and match their imports
+
+    Reads run in a thread pool and parsing in the process pool; both share
+    the ``timeout`` budget (capped by the run's deadline, if any). Returns the sampled files, the frameworks found as
+    ``(category, tech, module, path)`` tuples and whether time ran out.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+    from cv_metrics import submit
+
+    start = time.perf_counter()
+    run_deadline = current_deadline()
+    if run_deadline is not None:
+        timeout = min(timeout, run_deadline.remaining())
+    deadline = start + timeout
+    sample = sample_source_files(items, max_bytes, max_files)
+    sources = []
+    timed_out = False
+    with stage("deep_scan"):
+        if sample:
+            pool = ThreadPoolExecutor(max_workers=read_workers)
+            try:
+                futures = {submit(pool, read, item): item for item in sample}
+                done, not_done = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+                timed_out = bool(not_done)
+                for future in futures:  # sample order, so results do not depend on timing
+                    if future in done and future.exception() is None and future.result():
+                        path = futures[future]["path"]
+                        sources.append((path, source_kind(path), future.result()))
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        imports = {}
+        if sources:
+            imports, parse_timed_out = parse_sources(sources, max(0.0, deadline - time.perf_counter()))
+            timed_out = timed_out or parse_timed_out
+
+    matches = []
+    for path, _, _ in sources:
+        for module in imports.get(path, ()):
+            target = match_import(module)
+            if target:
+                matches.append((target[0], target[1], module, path))
+    return {
+        "sampled_files": [path for path, _, _ in sources],
+        "bytes": sum(len(data) for _, _, data in sources),
+        "parsed_files": len(imports),
+        "matches": matches,
+        "timed_out": timed_out,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def merge_deep_scan(fw_analysis: Dict, scan: Dict):
+    """Add deep-scan matches to a ``_frameworks_from_tree`` result (manifest evidence wins)"""
+    from get_readme import _add_tech
+
+    found = set(fw_analysis["frameworks"])
+    for category, tech, module, path in scan["matches"]:
+        _add_tech(found, fw_analysis["evidence"], fw_analysis["category_summary"], category, tech,
+                  f"Import: '{module}' in {path}")
+    fw_analysis["frameworks"] = sorted(found)
+    fw_analysis["deep_scan"] = {key: value for key, value in scan.items() if key != "matches"}
+    return fw_analysis
+
+
+def should_deep_scan(mode, fw_analysis: Dict) -> bool:
+    """``mode`` is True/False, or "auto" to scan only repos without any manifest"""
+    if mode == "auto":
+        return not fw_analysis["checked_files"]
+    return bool(mode)
@@ -0,0 +1,146 @@
+"""Static analysis of the CV fields a template reads.
+
+Field paths start at ``cv`` and use ``[]`` for list/mapping items and ``{}``
+for mapping keys, e.g. ``cv.projects[].highlights`` or ``cv.skills{}``. Loop
+variables are resolved to the collection they iterate, so
+``{% for p in cv.projects %}{{ p.name }}`` yields ``cv.projects[].name``.
+"""
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set
+
+from jinja2 import Environment, meta, nodes
+
+# Mapping views whose loop items are the mapping's values
+_MAPPING_VIEWS = ("items", "values", "keys")
+
+
+@dataclass(frozen=True)
+class TemplateFields:
+    """Paths a template reads.
+
+    ``reads`` are paths the template accesses (printed, tested or iterated);
+    ``opaque`` are values handed over whole (printed, filtered, passed to a
+    call), so everything below them counts as used.
+    """
+    reads: FrozenSet[str]
+    opaque: FrozenSet[str]
+
+    def uses(self, path: str) -> bool:
+        """True if rendering may depend on ``path`` or anything below it"""
+        for read in self.reads:
+            if read == path or read.startswith((path + ".", path + "[", path + "{")):
+                return True
+        for whole in self.opaque:
+            if path == whole or path.startswith((whole + ".", whole + "[")):
+                return True
+        return False
+
+    @classmethod
+    def everything(cls) -> "TemplateFields":
+        return cls(frozenset(), frozenset({"cv"}))
+
+
+class _Collector:
+    def __init__(self):
+        self.reads: Set[str] = set()
+        self.opaque: Set[str] = set()
+
+    def path(self, node: nodes.Node, aliases: Dict[str, str]) -> Optional[str]:
+        if isinstance(node, nodes.Name):
+            return aliases.get(node.name, "cv" if node.name == "cv" else None)
+        if isinstance(node, nodes.Getattr):
+            base = self.path(node.node, aliases)
+            if base and base.endswith("{}"):  # string method on a mapping key
+                return base
+            return f"{base}.{node.attr}" if base else None
+        if isinstance(node, nodes.Getitem) and isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, str):
+            base = self.path(node.node, aliases)
+            return f"{base}.{node.arg.value}" if base else None
+        if (isinstance(node, nodes.Call) and isinstance(node.node, nodes.Getattr)
+                and node.node.attr in _MAPPING_VIEWS and not node.args):
+            return self.path(node.node.node, aliases)
+        return None
+
+    def expr(self, node: nodes.Node, aliases: Dict[str, str], whole: bool):
+        path = self.path(node, aliases)
+        if path is not None:
+            self.reads.add(path)
+            if whole:
+                self.opaque.add(path)
+            return
+        if isinstance(node, nodes.Filter):
+            if node.node is not None:
+                self.expr(node.node, aliases, True)
+            for child in node.args + [kw.value for kw in node.kwargs]:
+                self.expr(child, aliases, True)
+            return
+        if isinstance(node, nodes.Call):
+            self.expr(node.node, aliases, False)
+            for child in node.args + [kw.value for kw in node.kwargs]:
+                self.expr(child, aliases, True)
+            return
+        for child in node.iter_child_nodes():
+            self.expr(child, aliases, whole and isinstance(child, nodes.Expr))
+
+    def stmt(self, node: nodes.Node, aliases: Dict[str, str]):
+        if isinstance(node, nodes.Output):
+            for child in node.nodes:
+                if not isinstance(child, nodes.TemplateData):
+                    self.expr(child, aliases, True)
+        elif isinstance(node, nodes.For):
+            self.expr(node.iter, aliases, False)
+            source = self.path(node.iter, aliases)
+            inner = dict(aliases)
+            targets = node.target.items if isinstance(node.target, nodes.Tuple) else [node.target]
+            for i, target in enumerate(targets):
+                if not isinstance(target, nodes.Name):
+                    continue
+                if source is None:
+                    inner.pop(target.name, None)
+                elif len(targets) == 2 and i == 0 and isinstance(node.iter, nodes.Call):
+                    inner[target.name] = source + "{}"   # key of a .items() loop
+                else:
+                    inner[target.name] = source + "[]"
+            if node.test is not None:
+                self.expr(node.test, inner, False)
+            for child in node.body:
+                self.stmt(child, inner)
+            for child in node.else_:
+                self.stmt(child, aliases)
+        elif isinstance(node, nodes.Assign) and isinstance(node.target, nodes.Name):
+            source = self.path(node.node, aliases)
+            if source is None:
+                self.expr(node.node, aliases, True)
+                aliases.pop(node.target.name, None)
+            else:
+                aliases[node.target.name] = source
+        elif isinstance(node, nodes.Expr):
+            self.expr(node, aliases, True)
+        else:
+            for child in node.iter_child_nodes():
+                if isinstance(child, nodes.Expr):
+                    self.expr(child, aliases, False)
+                else:
+                    self.stmt(child, aliases)
+
+
+def analyze_template(env: Environment, name: str, _seen: Optional[Set[str]] = None) -> TemplateFields:
+    """Collect the ``cv`` fields read by template ``name`` and the templates it includes/extends"""
+    seen = _seen if _seen is not None else set()
+    seen.add(name)
+    source, _, _ = env.loader.get_source(env, name)
+    ast = env.parse(source)
+
+    collector = _Collector()
+    if "cv" in meta.find_undeclared_variables(ast):
+        collector.stmt(ast, {})
+    reads, opaque = set(collector.reads), set(collector.opaque)
+
+    for ref in meta.find_referenced_templates(ast):
+        if ref is None:  # dynamic include: cannot tell what it reads
+            return TemplateFields.everything()
+        if ref not in seen:
+            sub = analyze_template(env, ref, seen)
+            reads |= sub.reads
+            opaque |= sub.opaque
+    return TemplateFields(frozenset(reads), frozenset(opaque))
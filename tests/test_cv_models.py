@@ -0,0 +1,19 @@
+from cv_models import load_cv_file
+
+
+def test_yaml_dates_are_read_as_iso_strings(tmp_path):
+    path = tmp_path / "a.yaml"
+    path.write_text(
+        "personal_info:\n"
+        "  name: Nguyễn Văn A\n"
+        "certifications:\n"
+        "  - name: AWS Solutions Architect\n"
+        "    date: 2023-05-01\n"
+        "experience:\n"
+        "  - title: Developer\n"
+        "    duration: 2021-01-01 12:30:00\n",
+        encoding="utf-8",
+    )
+    cv = load_cv_file(str(path))
+    assert cv.certifications[0].date == "2023-05-01"
+    assert cv.experience[0].duration == "2021-01-01T12:30:00"
@@ -0,0 +1,52 @@
+from readme_normalizer import normalize_readme, reset_normalizer
+
+SHORT_INTRO_README = """# ripgrep-lite
+
+Fast log parser.
+
+| Flag | Meaning |
+|------|---------|
+| -n   | numbers |
+
+## Installation
+
+```bash
+cargo install ripgrep-lite
+```
+
+$ cargo install ripgrep-lite --locked
+
+Run the installer from the repository root before building anything else.
+
+## License
+
+Licensed under the MIT license, see LICENSE for the full terms and conditions.
+"""
+
+BULLETS_ONLY_README = """# tool
+
+```bash
+pip install tool
+```
+
+- supports csv
+- supports json
+"""
+
+
+def setup_function():
+    reset_normalizer()
+
+
+def test_short_intro_keeps_intro_without_install_or_license():
+    result = normalize_readme(SHORT_INTRO_README)
+    assert "Fast log parser." in result.text
+    for noise in ("cargo install", "installer", "Licensed", "MIT", "| -n"):
+        assert noise not in result.text
+    assert result.tokens < result.original_tokens // 2
+
+
+def test_short_bullets_are_not_dropped():
+    result = normalize_readme(BULLETS_ONLY_README)
+    assert "supports csv" in result.text
+    assert "pip install" not in result.text